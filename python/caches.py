@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Define a two-tier cache for pathway query results.
+
+Results of pw.evaluate_input are kept in a bounded in-memory LRU tier
+and optionally in JSON files of a cache directory, which survive
+restarts. Cached results are bound to a version hash of the data
+context, so results of earlier data are never returned after new data
+is loaded.
+
+Classes
+-------
+QueryCache
+    LRU and on-disk cache of query results.
+
+Functions
+---------
+query_key
+    Return normalized cache key of a query.
+version_context
+    Return version hash of a data context.
+
+"""
+
+
+import collections as cl
+import hashlib
+import json
+import os
+import shutil
+
+
+# Context keys mapping to data derived from other keys.
+_DERIVED = frozenset(
+    ['bitsets', 'cache', 'landmarks', 'profile', 'reachability'])
+
+# Length of version and key hash strings.
+_HASH_LENGTH = 16
+
+
+class QueryCache:
+    """
+    Cache of pw.evaluate_input results.
+
+    The memory tier holds at most maxsize results and discards the least
+    recently used first. If path is given, results are also written to
+    JSON files of a version subdirectory of path. Subdirectories of
+    other data versions are removed on initialization.
+
+    Parameters
+    ----------
+    context : dict
+        Data context of the cached queries, see version_context.
+    maxsize : int
+        The maximum amount of results in memory. Default 128.
+    path : string
+        Directory path of the on-disk tier. Default None, in which case
+        results are cached only in memory.
+
+    """
+
+    __slots__ = ('maxsize', 'path', 'version', '_results')
+
+    def __init__(self, context={}, maxsize=128, path=None):
+        self.maxsize = maxsize
+        self.version = version_context(context)
+        self._results = cl.OrderedDict()
+        if path is None:
+            self.path = None
+        else:
+            self.path = os.path.join(path, self.version)
+            _prune(path, self.version)
+            os.makedirs(self.path, exist_ok=True)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._results)
+
+    def _filename(self, key):
+        digest = hashlib.sha256(_dumps(key).encode())
+        return os.path.join(self.path, digest.hexdigest()[:_HASH_LENGTH]
+                            + '.json')
+
+    def clear(self):
+        """
+        Remove all results from both tiers.
+
+        """
+        self._results.clear()
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.makedirs(self.path, exist_ok=True)
+
+    def get(self, key, default=None):
+        """
+        Return cached results of a query key, or default if missing.
+
+        """
+        try:
+            results = self._results[key]
+        except KeyError:
+            pass
+        else:
+            self._results.move_to_end(key)
+            return results
+        if self.path is None:
+            return default
+        try:
+            with open(self._filename(key)) as file:
+                entry = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return default
+        if entry['key'] != json.loads(_dumps(key)):
+            return default
+        results = [(value, tuple(item)) for value, item in entry['results']]
+        self._remember(key, results)
+        return results
+
+    def put(self, key, results):
+        """
+        Cache results of a query key in both tiers.
+
+        """
+        results = [(value, tuple(item)) for value, item in results]
+        self._remember(key, results)
+        if self.path is None:
+            return
+        filename = self._filename(key)
+        temporary = '{}.{}'.format(filename, os.getpid())
+        with open(temporary, 'w') as file:
+            json.dump({'key': key, 'results': results}, file)
+        os.replace(temporary, filename)
+
+    def _remember(self, key, results):
+        self._results[key] = results
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+
+def _dumps(obj):
+    return json.dumps(obj, sort_keys=True, default=_sorted_set)
+
+
+def _prune(path, version):
+    """
+    Remove cache subdirectories of other versions than version.
+
+    """
+    try:
+        names = os.listdir(path)
+    except FileNotFoundError:
+        return
+    for name in names:
+        subpath = os.path.join(path, name)
+        if (name != version and len(name) == _HASH_LENGTH
+                and os.path.isdir(subpath)):
+            shutil.rmtree(subpath, ignore_errors=True)
+
+
+def _sorted_set(obj):
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError('{} not JSON serializable'.format(type(obj).__name__))
+
+
+def query_key(n, compounds=[], enzymes=[], k=1, constrained=False,
+              weighted=False):
+    """
+    Return normalized cache key of a pw.evaluate_input query.
+
+    Compound order is kept, enzymes are sorted and deduplicated.
+
+    Parameters
+    ----------
+    n, compounds, enzymes, k, constrained, weighted
+        See pw.evaluate_input.
+
+    Returns
+    -------
+    tuple
+
+    """
+    return (n, tuple(compounds), tuple(sorted(set(enzymes))), k,
+            bool(constrained), bool(weighted))
+
+
+def version_context(context):
+    """
+    Return version hash of a data context.
+
+    Keys mapping to derived data, such as graph indices and the cache
+    itself, are excluded. Data of a context with method fingerprint,
+    such as contexts.LazyContext, is versioned by its fingerprints, so
+    that data isn't loaded.
+
+    Parameters
+    ----------
+    context : dict
+        Mappings from ID strings to data, see pw.evaluate_input.
+
+    Returns
+    -------
+    string
+        Hexadecimal hash, which changes whenever context data does.
+
+    """
+    fingerprint = getattr(context, 'fingerprint', context.get)
+    digest = hashlib.sha256()
+    for key in sorted(context):
+        if key not in _DERIVED:
+            digest.update(_dumps([key, fingerprint(key)]).encode())
+    return digest.hexdigest()[:_HASH_LENGTH]
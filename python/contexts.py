@@ -0,0 +1,556 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Define data context mappings for pathway analysis.
+
+A data context maps names such as stoichiometrics and prices to data,
+see pw.evaluate_input. A plain dict holds all data in memory. A
+LazyContext reads each JSON file or derives each index only when its
+key is first accessed, so a process loads only the data its queries
+use. A CompactContext holds reaction and compound data in arrays
+indexed by interned integer IDs, and translates to strings only when
+accessed by key.
+
+Classes
+-------
+CompactContext
+    Data context of integer ID tables.
+IdRegistry
+    Registry of ID strings interned to dense integers.
+LazyContext
+    Data context loading values on first access.
+
+"""
+
+
+import collections.abc
+import itertools as it
+import os
+
+import numpy as np
+
+import files
+
+
+# Context keys of CompactContext tables.
+_TABLE_KEYS = (
+    'compound_reactions',
+    'demands',
+    'ec_reactions',
+    'prices',
+    'reaction_ecs',
+    'stoichiometrics',
+    )
+
+
+class CompactContext(collections.abc.MutableMapping):
+    """
+    Data context of integer ID tables.
+
+    Compounds, reactions and EC numbers are interned to integers of
+    IdRegistry attributes, and their data is held in NumPy arrays
+    indexed by the integers. Keys compound_reactions, demands,
+    ec_reactions, prices, reaction_ecs and stoichiometrics return
+    read-only mappings, which translate the arrays to ID strings on
+    access. Other keys, such as equations and graph indices, are held
+    in a LazyContext, see derive.
+
+    Parameters
+    ----------
+    context : dict or LazyContext
+        Data context with keys compound_reactions, demands,
+        ec_reactions, prices, reaction_ecs and stoichiometrics, see
+        pw.evaluate_input. Data of other keys is kept as is. Table data
+        of a LazyContext is unloaded from it.
+
+    Attributes
+    ----------
+    compounds, enzymes, reactions : IdRegistry
+        Interned ChEBI IDs, EC numbers and Rhea IDs.
+    substrates, products : Table
+        Compound rows of reactions with stoichiometric coefficients.
+    consumers, producers : Table
+        Reaction rows of compounds.
+    reaction_enzymes, enzyme_reactions : Table
+        EC number rows of reactions and reaction rows of EC numbers.
+    prices, demands : numpy.ndarray
+        Float values of compounds, NaN if missing.
+    values : tuple of 2 numpy.ndarray
+        Sums of price times demand of substrates and products of each
+        reaction, see pw.evaluate_pathway. NaN if a value is missing.
+
+    """
+
+    __slots__ = (
+        'compounds', 'enzymes', 'reactions',
+        'substrates', 'products', 'consumers', 'producers',
+        'reaction_enzymes', 'enzyme_reactions',
+        'prices', 'demands', 'values',
+        '_extra', '_fingerprints',
+        )
+
+    def __init__(self, context):
+        stoichiometrics = context['stoichiometrics']
+        compound_reactions = context['compound_reactions']
+        reaction_ecs = context['reaction_ecs']
+        ec_reactions = context['ec_reactions']
+        prices = context['prices']
+        demands = context['demands']
+        self.reactions = IdRegistry(stoichiometrics)
+        self.compounds = IdRegistry(compound_reactions)
+        self.enzymes = IdRegistry(ec_reactions)
+
+        rows = [stoichiometrics[reaction] for reaction in self.reactions.ids]
+        self.substrates = Table.from_rows(
+            self.reactions, self.compounds, stoichiometrics,
+            [substrates for substrates, __ in rows])
+        self.products = Table.from_rows(
+            self.reactions, self.compounds, stoichiometrics,
+            [products for __, products in rows])
+        self.consumers = Table.from_rows(
+            self.compounds, self.reactions, compound_reactions,
+            [consumers for consumers, __ in compound_reactions.values()])
+        self.producers = Table.from_rows(
+            self.compounds, self.reactions, compound_reactions,
+            [producers for __, producers in compound_reactions.values()])
+        self.reaction_enzymes = Table.from_rows(
+            self.reactions, self.enzymes, reaction_ecs,
+            list(reaction_ecs.values()))
+        self.enzyme_reactions = Table.from_rows(
+            self.enzymes, self.reactions, ec_reactions,
+            list(ec_reactions.values()))
+        for compound in it.chain(prices, demands):
+            self.compounds.intern(compound)
+        self.prices = _values(self.compounds, prices)
+        self.demands = _values(self.compounds, demands)
+        self.values = tuple(
+            np.array([_value(side, prices, demands) for side in sides],
+                     np.float64)
+            for sides in zip(*rows))
+
+        if isinstance(context, LazyContext):
+            self._fingerprints = {key: context.fingerprint(key)
+                                  for key in _TABLE_KEYS}
+            context.unload(*_TABLE_KEYS)
+            self._extra = context
+        else:
+            self._fingerprints = {}
+            self._extra = LazyContext({
+                key: value for key, value in context.items()
+                if key not in _TABLE_KEYS})
+
+    def __contains__(self, key):
+        return key in _TABLE_KEYS or key in self._extra
+
+    def __delitem__(self, key):
+        if key in _TABLE_KEYS:
+            raise TypeError('table key {} is read-only'.format(key))
+        del self._extra[key]
+
+    def __getitem__(self, key):
+        if key == 'stoichiometrics':
+            return _Pairs(self.substrates, self.products)
+        elif key == 'compound_reactions':
+            return _Pairs(self.consumers, self.producers)
+        elif key == 'reaction_ecs':
+            return self.reaction_enzymes
+        elif key == 'ec_reactions':
+            return self.enzyme_reactions
+        elif key == 'prices':
+            return _Values(self.compounds, self.prices)
+        elif key == 'demands':
+            return _Values(self.compounds, self.demands)
+        return self._extra[key]
+
+    def __iter__(self):
+        return iter(dict.fromkeys(it.chain(_TABLE_KEYS, self._extra)))
+
+    def __len__(self):
+        return sum(1 for __ in self)
+
+    def __setitem__(self, key, value):
+        if key in _TABLE_KEYS:
+            raise TypeError('table key {} is read-only'.format(key))
+        self._extra[key] = value
+
+    def derive(self, key, function, *args):
+        """
+        Set value of key to be derived on access, see LazyContext.
+
+        """
+        if key in _TABLE_KEYS:
+            raise TypeError('table key {} is read-only'.format(key))
+        self._extra.derive(key, function, *args)
+
+    def fingerprint(self, key):
+        """
+        Return JSON serializable fingerprint of the value of key.
+
+        Tables built from a LazyContext are fingerprinted by their
+        source files, see LazyContext.fingerprint.
+
+        """
+        if key in self._fingerprints:
+            return self._fingerprints[key]
+        elif key in _TABLE_KEYS:
+            return dict(self[key].items())
+        return self._extra.fingerprint(key)
+
+    def loaded(self):
+        """
+        Return set of keys, whose values are in memory.
+
+        """
+        return set(_TABLE_KEYS) | self._extra.loaded()
+
+    def unload(self, *keys):
+        """
+        Unload values of keys other than tables, see LazyContext.
+
+        """
+        if not keys:
+            keys = [key for key in self._extra if key not in _TABLE_KEYS]
+        self._extra.unload(*keys)
+
+
+class IdRegistry:
+    """
+    Registry of ID strings interned to dense integers.
+
+    Integers are assigned in the order IDs are interned, starting from
+    0. Each ID string is held once.
+
+    Parameters
+    ----------
+    ids : iterable
+        ID strings to intern.
+
+    """
+
+    __slots__ = ('ids', 'index')
+
+    def __init__(self, ids=[]):
+        self.ids = []
+        self.index = {}
+        for id_ in ids:
+            self.intern(id_)
+
+    def __contains__(self, id_):
+        return id_ in self.index
+
+    def __getitem__(self, i):
+        return self.ids[i]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def intern(self, id_):
+        """
+        Return integer of an ID string, assigning a new one if missing.
+
+        """
+        try:
+            return self.index[id_]
+        except KeyError:
+            i = self.index[id_] = len(self.ids)
+            self.ids.append(id_)
+            return i
+
+
+class LazyContext(collections.abc.MutableMapping):
+    """
+    Data context loading values on first access.
+
+    Values of source keys are read from JSON files and values of
+    derived keys are returned by a function call, see derive, both when
+    the key is first accessed. Membership tests and iteration don't
+    load values. Loaded values can be unloaded to free memory, they are
+    loaded again on next access.
+
+    Parameters
+    ----------
+    data : dict
+        Keys and values, which are held in memory.
+    sources : dict
+        Keys and (path, filename) pair values of JSON files.
+
+    """
+
+    __slots__ = ('_data', '_derived', '_sources')
+
+    def __init__(self, data={}, sources={}):
+        self._data = dict(data)
+        self._derived = {}
+        self._sources = dict(sources)
+
+    def __contains__(self, key):
+        return (key in self._data or key in self._sources
+                or key in self._derived)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._data.pop(key, None)
+        self._derived.pop(key, None)
+        self._sources.pop(key, None)
+
+    def __getitem__(self, key):
+        try:
+            return self._data[key]
+        except KeyError:
+            pass
+        if key in self._sources:
+            value = files.get_json(*self._sources[key])
+        elif key in self._derived:
+            function, args = self._derived[key]
+            value = function(*args)
+        else:
+            raise KeyError(key)
+        self._data[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(dict.fromkeys(key for keys in (
+            self._data, self._sources, self._derived) for key in keys))
+
+    def __len__(self):
+        return sum(1 for __ in self)
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._derived.pop(key, None)
+        self._sources.pop(key, None)
+
+    def derive(self, key, function, *args):
+        """
+        Set value of key to be derived by function(*args) on access.
+
+        Arguments may include the context itself, for example
+        pw.initialize_bitsets may derive bitsets from the context.
+
+        """
+        self._data.pop(key, None)
+        self._sources.pop(key, None)
+        self._derived[key] = (function, args)
+
+    def fingerprint(self, key):
+        """
+        Return JSON serializable fingerprint of the value of key.
+
+        The fingerprint of a source key is the name, size and
+        modification time of its file, so its data isn't loaded.
+        Otherwise the value itself is returned.
+
+        """
+        if key in self._sources:
+            path, filename = self._sources[key]
+            stat = os.stat(os.path.join(path, filename))
+            return [filename, stat.st_size, stat.st_mtime_ns]
+        return self[key]
+
+    def loaded(self):
+        """
+        Return set of keys, whose values are in memory.
+
+        """
+        return set(self._data)
+
+    def unload(self, *keys):
+        """
+        Remove loaded values of source and derived keys from memory.
+
+        Parameters
+        ----------
+        keys
+            Keys to unload. If none are given, all source and derived
+            values are unloaded.
+
+        """
+        if not keys:
+            keys = list(self._sources) + list(self._derived)
+        for key in keys:
+            if key in self._sources or key in self._derived:
+                self._data.pop(key, None)
+
+
+class Table(collections.abc.Mapping):
+    """
+    Read-only mapping of ID string rows to ID strings in NumPy arrays.
+
+    Items of row i are items[offsets[i]:offsets[i + 1]], the integers
+    of column IDs, with optional coefficients. A row maps to a list of
+    column ID strings, or to a dict of column ID strings and
+    coefficients.
+
+    Attributes
+    ----------
+    rows, columns : IdRegistry
+        ID strings of rows and columns.
+    present : numpy.ndarray
+        True for rows of the table, indexed by row integers.
+    offsets, items : numpy.ndarray
+        Row offsets and column integers.
+    coefficients : numpy.ndarray
+        Coefficients of items, or None.
+
+    """
+
+    __slots__ = ('rows', 'columns', 'present', 'offsets', 'items',
+                 'coefficients')
+
+    def __init__(self, rows, columns, present, offsets, items,
+                 coefficients=None):
+        self.rows = rows
+        self.columns = columns
+        self.present = present
+        self.offsets = offsets
+        self.items = items
+        self.coefficients = coefficients
+
+    @classmethod
+    def from_rows(cls, rows, columns, keys, values):
+        """
+        Return Table of keys and values, interning column IDs.
+
+        Values are lists of column ID strings or dicts of column ID
+        strings and coefficients, and their indices match keys.
+
+        """
+        entries = []
+        for key, value in zip(keys, values):
+            i = rows.intern(key)
+            entries.append((i, [columns.intern(id_) for id_ in value], value))
+        # Rows are stored in the order of their integers.
+        entries.sort(key=lambda entry: entry[0])
+        present = np.zeros(len(rows), bool)
+        sizes = np.zeros(len(rows), np.int64)
+        for i, items, __ in entries:
+            present[i] = True
+            sizes[i] = len(items)
+        offsets = np.zeros(len(rows) + 1, np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        items = np.fromiter(
+            it.chain.from_iterable(items for __, items, __ in entries),
+            np.int32, int(offsets[-1]))
+        coefficients = None
+        if entries and isinstance(entries[0][2], dict):
+            coefficients = np.fromiter(
+                it.chain.from_iterable(
+                    value.values() for __, __, value in entries),
+                np.int64, int(offsets[-1]))
+        return cls(rows, columns, present, offsets, items, coefficients)
+
+    def __contains__(self, key):
+        i = self.rows.index.get(key)
+        return i is not None and i < len(self.present) and self.present[i]
+
+    def __getitem__(self, key):
+        i = self.rows.index[key]
+        if i >= len(self.present) or not self.present[i]:
+            raise KeyError(key)
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        ids = [self.columns.ids[j] for j in self.items[start:stop].tolist()]
+        if self.coefficients is None:
+            return ids
+        return dict(zip(ids, self.coefficients[start:stop].tolist()))
+
+    def __iter__(self):
+        ids = self.rows.ids
+        return (ids[i] for i in np.flatnonzero(self.present).tolist())
+
+    def __len__(self):
+        return int(np.count_nonzero(self.present))
+
+    def row(self, key):
+        """
+        Return list of column integers of the row of an ID string.
+
+        Raises
+        ------
+        KeyError
+            If key is not a row of the table.
+
+        """
+        i = self.rows.index[key]
+        if i >= len(self.present) or not self.present[i]:
+            raise KeyError(key)
+        return self.items[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+
+class _Pairs(collections.abc.Mapping):
+    """
+    Read-only mapping of keys to [first[key], second[key]] lists.
+
+    """
+
+    __slots__ = ('first', 'second')
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+
+    def __contains__(self, key):
+        return key in self.first
+
+    def __getitem__(self, key):
+        return [self.first[key], self.second[key]]
+
+    def __iter__(self):
+        return iter(self.first)
+
+    def __len__(self):
+        return len(self.first)
+
+
+class _Values(collections.abc.Mapping):
+    """
+    Read-only mapping of ID strings to values of an array, NaN missing.
+
+    """
+
+    __slots__ = ('registry', 'array')
+
+    def __init__(self, registry, array):
+        self.registry = registry
+        self.array = array
+
+    def __contains__(self, key):
+        i = self.registry.index.get(key)
+        return i is not None and not np.isnan(self.array[i])
+
+    def __getitem__(self, key):
+        value = self.array[self.registry.index[key]]
+        if np.isnan(value):
+            raise KeyError(key)
+        return float(value)
+
+    def __iter__(self):
+        ids = self.registry.ids
+        return (ids[i] for i in np.flatnonzero(~np.isnan(self.array)).tolist())
+
+    def __len__(self):
+        return int(np.count_nonzero(~np.isnan(self.array)))
+
+
+def _value(compounds, prices, demands):
+    """
+    Return sum of price times demand of compounds, or NaN if missing.
+
+    """
+    try:
+        return sum(prices[c] * demands[c] for c in compounds)
+    except KeyError:
+        return np.nan
+
+
+def _values(registry, values):
+    """
+    Return float array of values of registry IDs, NaN if missing.
+
+    """
+    array = np.full(len(registry), np.nan)
+    for id_, value in values.items():
+        array[registry.index[id_]] = value
+    return array
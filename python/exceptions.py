@@ -32,6 +32,10 @@ class RxnError(FileFormatError):
     pass
 
 
+class ScenarioError(FileFormatError):
+    pass
+
+
 class TsvError(FileFormatError):
     pass
 
@@ -20,6 +20,8 @@ RdRecord
     collections.namedtuple for rd records.
 Rxn
     collections.namedtuple for rxn data.
+Scenario
+    collections.namedtuple for benchmark scenarios.
 Tsv
     collections.namedtuple for tsv data.
 
@@ -31,14 +33,20 @@ get_contents
     Yield content lists of text files.
 get_json
     Return object from a JSON file.
+get_rds
+    Yield rd entries of rd files, streaming their records.
 parse_ctab
     Parse a ctab entry. NOT IMPLEMENTED
 parse_mol
     Parse a mol entry.
 parse_rd
     Parse an rd entry.
+parse_rd_file
+    Parse an open rd file, streaming its records.
 parse_rxn
     Parse an rxn entry.
+parse_scenarios
+    Parse benchmark scenarios.
 parse_tsv
     Parse a tsv entry.
 write_json
@@ -48,6 +56,10 @@ write_jsons
 
 Constants
 ---------
+BENCHMARK_BASELINE
+BENCHMARK_MICRO
+BENCHMARK_REPORT
+BENCHMARK_SCENARIOS
 CHEBI_COMPOUNDS
 CHEBI_DATA
 CHEBI_RELATIONS
@@ -67,8 +79,11 @@ MOL_PRICES
 MOL_REACTIONS
 MOL_RELATIONS
 MOL_VALUES
+RXN_COMPLEXITIES
 RXN_ECS
 RXN_EQUATIONS
+RXN_GRAPH
+RXN_LANDMARKS
 RXN_STOICHIOMETRICS
 JS_MOL_NAMES
 JS_MOL_PRICES
@@ -99,6 +114,7 @@ from exceptions import (
     MolError,
     RdError,
     RxnError,
+    ScenarioError,
     TsvError,
     )
 
@@ -114,6 +130,12 @@ _EXTENSION_TSV = '.tsv'
 _EXTENSION_RD = '.rd'
 
 
+# Benchmark files
+BENCHMARK_BASELINE = 'micro_baseline' + _EXTENSION_JSON
+BENCHMARK_MICRO = 'micro' + _EXTENSION_JSON
+BENCHMARK_REPORT = 'report' + _EXTENSION_JSON
+BENCHMARK_SCENARIOS = 'scenarios' + _EXTENSION_JSON
+
 # ChEBI files
 CHEBI_COMPOUNDS = 'compounds' + _EXTENSION_TSV
 CHEBI_DATA = 'chemical_data' + _EXTENSION_TSV
@@ -145,10 +167,15 @@ MOL_RELATIONS = _PREFIX_MOL + 'relations' + _EXTENSION_JSON
 MOL_VALUES = _PREFIX_MOL + 'values' + _EXTENSION_JSON
 
 _PREFIX_RXN = 'rxn_'
+RXN_COMPLEXITIES = _PREFIX_RXN + 'complexities' + _EXTENSION_JSON
 RXN_ECS = _PREFIX_RXN + 'ecs' + _EXTENSION_JSON
 RXN_EQUATIONS = _PREFIX_RXN + 'equations' + _EXTENSION_JSON
+RXN_LANDMARKS = _PREFIX_RXN + 'landmarks' + _EXTENSION_JSON
 RXN_STOICHIOMETRICS = _PREFIX_RXN + 'stoichiometrics' + _EXTENSION_JSON
 
+# Snapshot files
+RXN_GRAPH = _PREFIX_RXN + 'graph' + _EXTENSION_DAT
+
 # JS files
 JS_MOL_DEMANDS = _PREFIX_MOL + 'demands' + _EXTENSION_JS
 JS_MOL_NAMES = _PREFIX_MOL + 'names' + _EXTENSION_JS
@@ -171,6 +198,10 @@ Rxn = namedtuple('RXN', ['name', 'comment', 'n_reactants', 'n_products',
                          'mols'])
 Tsv = namedtuple('TSV', ['fields', 'data'])
 
+# Benchmark scenarios.
+Scenario = namedtuple('Scenario', ['name', 'reference', 'n_start', 'n_stop',
+                                   'compounds', 'enzymes'])
+
 
 def get_content(path, filename, strip_newlines=True):
     """
@@ -246,6 +277,42 @@ def get_contents(path, filenames, strip_newlines=True):
         yield get_content(path, filename, strip_newlines)
 
 
+def get_rds(path, filenames):
+    """
+    Yield rd entries of rd files, streaming their records.
+
+    Each file is kept open until the next rd entry is requested, so
+    the records of an entry must be consumed before that.
+
+    Parameters
+    ----------
+    path : string
+        Directory path to files.
+    filenames : list of strings
+        Names of the files. Names must include extension.
+
+    Yields
+    ------
+    collections.namedtuple
+        Rd entries, see parse_rd_file.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the path or a file does not exist.
+    TypeError
+        If filenames is not a list.
+
+    """
+    if not isinstance(path, str):
+        raise TypeError('`path` must be str')
+    elif not isinstance(filenames, list):
+        raise TypeError('`filenames` must be list')
+    for filename in filenames:
+        with open(os.path.join(path, filename)) as file:
+            yield parse_rd_file(file)
+
+
 def get_json(path, filename):
     """
     Return data object from a JSON file.
@@ -433,6 +500,64 @@ def parse_rd(contents):
     return Rd(version='1', time=time, records=records)
 
 
+def parse_rd_file(file):
+    """
+    Parse an open rd file, streaming its records.
+
+    Only the header is read at once. Records are read from file and
+    parsed one at a time when iterated, so that only one record is
+    held in memory.
+
+    Parameters
+    ----------
+    file : file object
+        Rd file opened in text mode.
+
+    Returns
+    -------
+    collections.namedtuple
+        Properties: version, time, records. Records is a generator of
+        RdRecord, which must be consumed before file is closed.
+
+    Raises
+    ------
+    RdError
+        If rd file header has invalid formatting.
+
+    See also
+    --------
+    parse_rd
+
+    """
+    header = [line.rstrip('\n') for __, line in zip(range(2), file)]
+    if len(header) < 2:
+        raise RdError('RD file too short: less than 2 lines found')
+    elif header[0] != '$RDFILE 1':
+        raise RdError('identifier "$RDFILE 1" not found at begin')
+    elif not header[1].startswith('$DATM '):
+        raise RdError('Time stamp "$DATM " not found at begin')
+    *__, time = header[1].partition(' ')
+    return Rd(version='1', time=time, records=_read_rd_records(file))
+
+
+def _read_rd_records(file):
+    """
+    Yield RdRecords of lines of an open rd file.
+
+    """
+    contents = []
+    for line in file:
+        line = line.rstrip('\n')
+        if line.startswith('$RFMT'):
+            if contents:
+                yield _parse_rd_record(contents)
+            contents = [line]
+        elif contents:
+            contents.append(line)
+    if contents:
+        yield _parse_rd_record(contents)
+
+
 def _parse_rd_record(contents):
     """
     """
@@ -508,6 +633,54 @@ def parse_rxn(contents):
     return Rxn(name, comment, n_reactants, n_products, mols)
 
 
+def parse_scenarios(data, names=None):
+    """
+    Parse benchmark scenarios.
+
+    Parameters
+    ----------
+    data : dict
+        Scenario names mapped to dicts with keys reference, n_start,
+        n_stop, compounds and enzymes, as read from a JSON file. See
+        main.run_analysis for the meaning of the values.
+    names : iterable
+        Names of scenarios to be parsed. Default None, in which case all
+        scenarios are parsed.
+
+    Returns
+    -------
+    list
+        Scenario collections.namedtuples in the order of names, or of
+        data if names is None.
+
+    Raises
+    ------
+    KeyError
+        If a name is not in data.
+    ScenarioError
+        If a scenario has missing or invalid fields.
+
+    """
+    if names is None:
+        names = list(data)
+    scenarios = []
+    for name in names:
+        entry = data[name]
+        try:
+            scenario = Scenario(
+                name,
+                [str(reaction) for reaction in entry['reference']],
+                int(entry['n_start']),
+                int(entry['n_stop']),
+                [[str(c) for c in C] for C in entry['compounds']],
+                [[str(e) for e in E] for E in entry['enzymes']],
+                )
+        except (KeyError, TypeError, ValueError) as error:
+            raise ScenarioError('scenario {}: {!r}'.format(name, error))
+        scenarios.append(scenario)
+    return scenarios
+
+
 def parse_tsv(contents, fields_header=[]):
     """
     Parse tsv file.
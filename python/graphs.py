@@ -0,0 +1,1575 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Define compact reaction graph for pathway analysis.
+
+Rhea ID strings are interned to dense integer indices and forward and
+reverse adjacencies are stored in compressed sparse row (CSR) form in
+array.array objects. Search functions operate on the integer indices.
+
+Classes
+-------
+LandmarkIndex
+    Landmark distance oracle of a ReactionGraph.
+ReachabilityIndex
+    Strongly connected component reachability index of a ReactionGraph.
+ReactionGraph
+    Directed reaction graph in CSR form.
+
+Functions
+---------
+astar_path
+    Return a lowest cost path between two node indices by A* search.
+bidirectional_shortest_path
+    Return a shortest path between two node indices.
+constrained_shortest_paths
+    Return shortest paths from or to a node index passing constraints.
+dump_landmarks
+    Return JSON serializable data of a LandmarkIndex.
+dump_reachability
+    Return JSON serializable data of a ReachabilityIndex.
+from_edges
+    Build ReactionGraph from weighted edges.
+initialize_landmarks
+    Initialize LandmarkIndex of a graph.
+initialize_reachability
+    Initialize ReachabilityIndex of a graph.
+load_landmarks
+    Return LandmarkIndex from data returned by dump_landmarks.
+load_reachability
+    Return ReachabilityIndex from data returned by dump_reachability.
+load_snapshot
+    Return memory-mapped ReactionGraph from a snapshot file.
+lowest_cost_paths
+    Return lowest cost paths from or to a node index.
+multi_shortest_paths
+    Return shortest paths between all source and target node indices.
+save_snapshot
+    Write ReactionGraph to a snapshot file.
+shortest_paths
+    Return shortest paths from or to a node index.
+shortest_simple_paths
+    Yield loopless paths between two node indices in cost order.
+
+"""
+
+
+import heapq as hq
+import itertools as it
+import mmap
+import os
+import struct
+import sys
+
+from array import array
+
+
+# array.array typecode of CSR offsets, targets and weights.
+_TYPECODE = 'l'
+
+# Distance of unreachable nodes in LandmarkIndex arrays.
+_UNREACHABLE = -1
+
+# The amount of times constrained searches raise their length limit by
+# one before searching without the limit.
+_DEEPENING_STEPS = 2
+
+INFINITY = float('inf')
+
+# Snapshot file header: magic, format, data version, array item size,
+# byte order, node count, edge count and ID table size in bytes.
+_SNAPSHOT_FORMAT = 1
+_SNAPSHOT_HEADER = struct.Struct('<8sI16sBBxxqqq')
+_SNAPSHOT_MAGIC = b'PWGRAPH\0'
+# Snapshot sections are aligned to multiples of this many bytes.
+_SNAPSHOT_ALIGNMENT = 64
+
+
+class LandmarkIndex:
+    """
+    Landmark distance oracle of a ReactionGraph.
+
+    Holds breadth-first search distances from and to landmark nodes.
+    By the triangle inequality these give lower and upper bounds of the
+    distance between any two nodes in O(#landmarks) time. The lower
+    bound is infinite when a landmark proves that there's no path.
+
+    Parameters
+    ----------
+    landmarks : list
+        Landmark node indices.
+    distances_from : list of array.array
+        Distances from each landmark to all node indices, -1 if
+        unreachable.
+    distances_to : list of array.array
+        Distances from all node indices to each landmark, -1 if
+        unreachable.
+
+    See also
+    --------
+    initialize_landmarks
+
+    """
+
+    __slots__ = ('landmarks', 'distances_from', 'distances_to')
+
+    def __init__(self, landmarks=[], distances_from=[], distances_to=[]):
+        self.landmarks = list(landmarks)
+        self.distances_from = list(distances_from)
+        self.distances_to = list(distances_to)
+
+    def may_reach(self, source, target):
+        """
+        Return false if target is proven unreachable from source.
+
+        """
+        return self.lower_bound(source, target) < INFINITY
+
+    def lower_bound(self, source, target):
+        """
+        Return lower bound of shortest path length between node indices.
+
+        Path length is the amount of edges. Returns INFINITY if target is
+        unreachable from source.
+
+        """
+        bound = 0
+        for d_from, d_to in zip(self.distances_from, self.distances_to):
+            # Landmark reaches source but not target, or target reaches
+            # landmark but source doesn't.
+            ls, lt = d_from[source], d_from[target]
+            if ls != _UNREACHABLE:
+                if lt == _UNREACHABLE:
+                    return INFINITY
+                elif lt - ls > bound:
+                    bound = lt - ls
+            sl, tl = d_to[source], d_to[target]
+            if tl != _UNREACHABLE:
+                if sl == _UNREACHABLE:
+                    return INFINITY
+                elif sl - tl > bound:
+                    bound = sl - tl
+        return bound
+
+    def upper_bound(self, source, target):
+        """
+        Return upper bound of shortest path length between node indices.
+
+        Returns INFINITY if no landmark connects source to target.
+
+        """
+        bound = INFINITY
+        for d_from, d_to in zip(self.distances_from, self.distances_to):
+            sl, lt = d_to[source], d_from[target]
+            if sl != _UNREACHABLE and lt != _UNREACHABLE and sl + lt < bound:
+                bound = sl + lt
+        return bound
+
+    def within(self, source, target, length):
+        """
+        Return whether shortest path length is at most length.
+
+        Returns
+        -------
+        bool or None
+            None if the bounds don't decide, in which case a search is
+            needed.
+
+        """
+        if self.lower_bound(source, target) > length:
+            return False
+        elif self.upper_bound(source, target) <= length:
+            return True
+        return None
+
+
+class ReachabilityIndex:
+    """
+    Strongly connected component reachability index of a ReactionGraph.
+
+    Nodes are condensed to their strongly connected components, which
+    are numbered in reverse topological order: an edge between two
+    components always goes from a higher to a lower number. Components
+    are further labeled with post-order intervals of depth-first
+    traversals of the condensed graph, so that the interval of a
+    reachable component is contained in the interval of the reaching
+    component.
+
+    Parameters
+    ----------
+    components : array.array
+        Component number of each node index.
+    dag_offsets, dag_targets : array.array
+        Condensed graph adjacency in CSR form.
+    labels : list of tuples of 2 array.arrays
+        Interval lower and upper bounds of each component.
+
+    See also
+    --------
+    initialize_reachability
+
+    """
+
+    __slots__ = ('components', 'dag_offsets', 'dag_targets', 'labels')
+
+    def __init__(
+            self,
+            components=array(_TYPECODE),
+            dag_offsets=array(_TYPECODE, [0]),
+            dag_targets=array(_TYPECODE),
+            labels=[],
+            ):
+        self.components = components
+        self.dag_offsets = dag_offsets
+        self.dag_targets = dag_targets
+        self.labels = list(labels)
+
+    def _may_reach_component(self, source, target):
+        if source < target:
+            return False
+        for lows, highs in self.labels:
+            if lows[target] < lows[source] or highs[target] > highs[source]:
+                return False
+        return True
+
+    def may_reach(self, source, target):
+        """
+        Return false if target is proven unreachable from source.
+
+        Takes constant time. A true value is certain only if source and
+        target belong to the same component, see reachable.
+
+        """
+        components = self.components
+        return self._may_reach_component(components[source],
+                                         components[target])
+
+    def reachable(self, source, target):
+        """
+        Return true if target is reachable from source.
+
+        Searches the condensed graph depth-first, if the labels of the
+        components don't decide. Components that cannot reach the target
+        component are not entered.
+
+        """
+        source = self.components[source]
+        target = self.components[target]
+        if source == target:
+            return True
+        elif not self._may_reach_component(source, target):
+            return False
+        offsets, adjacency = self.dag_offsets, self.dag_targets
+        seen = set([source])
+        stack = [source]
+        while stack:
+            v = stack.pop()
+            for w in adjacency[offsets[v]:offsets[v + 1]]:
+                if w == target:
+                    return True
+                elif w not in seen and self._may_reach_component(w, target):
+                    seen.add(w)
+                    stack.append(w)
+        return False
+
+
+class ReactionGraph:
+    """
+    Directed reaction graph in compressed sparse row form.
+
+    Successors of node index i are succ_targets[succ_offsets[i]:
+    succ_offsets[i + 1]] and predecessors correspondingly in pred_*
+    arrays. Adjacencies are sorted by node index.
+
+    Parameters
+    ----------
+    ids : list
+        Rhea ID strings, list index is the node index.
+    succ_offsets, succ_targets, succ_weights : array.array
+        Forward adjacency in CSR form.
+    pred_offsets, pred_targets, pred_weights : array.array
+        Reverse adjacency in CSR form. Memoryviews of a snapshot file
+        are also accepted, see load_snapshot.
+
+    """
+
+    __slots__ = (
+        'ids',
+        'index',
+        'succ_offsets',
+        'succ_targets',
+        'succ_weights',
+        'pred_offsets',
+        'pred_targets',
+        'pred_weights',
+        )
+
+    def __init__(
+            self,
+            ids=[],
+            succ_offsets=array(_TYPECODE, [0]),
+            succ_targets=array(_TYPECODE),
+            succ_weights=array(_TYPECODE),
+            pred_offsets=array(_TYPECODE, [0]),
+            pred_targets=array(_TYPECODE),
+            pred_weights=array(_TYPECODE),
+            ):
+        self.ids = list(ids)
+        self.index = {node: i for i, node in enumerate(self.ids)}
+        self.succ_offsets = succ_offsets
+        self.succ_targets = succ_targets
+        self.succ_weights = succ_weights
+        self.pred_offsets = pred_offsets
+        self.pred_targets = pred_targets
+        self.pred_weights = pred_weights
+
+    def __contains__(self, node):
+        return node in self.index
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __reduce__(self):
+        # Memoryviews of snapshot graphs can't be pickled, arrays can.
+        arrays = [array(_TYPECODE, getattr(self, name))
+                  for name in self.__slots__[2:]]
+        return (ReactionGraph, (self.ids, *arrays))
+
+    def edges(self, nbunch=None):
+        """
+        Return list of (u, v) Rhea ID string pairs.
+
+        Parameters
+        ----------
+        nbunch : iterable
+            Rhea ID strings, limits edges to those starting from these
+            nodes. Default None, in which case all edges are returned.
+
+        """
+        ids = self.ids
+        offsets = self.succ_offsets
+        targets = self.succ_targets
+        if nbunch is None:
+            indices = range(len(ids))
+        else:
+            indices = [self.index[node] for node in nbunch if node in self]
+        return [(ids[i], ids[j]) for i in indices
+                for j in targets[offsets[i]:offsets[i + 1]]]
+
+    def has_edge(self, u, v):
+        """Return True if edge (u, v) exists."""
+        try:
+            i, j = self.index[u], self.index[v]
+        except KeyError:
+            return False
+        offsets = self.succ_offsets
+        return j in self.succ_targets[offsets[i]:offsets[i + 1]]
+
+    def nodes(self):
+        """Return list of Rhea ID strings."""
+        return list(self.ids)
+
+    def number_of_edges(self):
+        """Return the amount of edges."""
+        return len(self.succ_targets)
+
+    def predecessors(self, node):
+        """Return list of Rhea ID strings of predecessor nodes."""
+        i = self.index[node]
+        offsets = self.pred_offsets
+        return [self.ids[j] for j in self.pred_targets[offsets[i]:
+                                                       offsets[i + 1]]]
+
+    def successors(self, node):
+        """Return list of Rhea ID strings of successor nodes."""
+        i = self.index[node]
+        offsets = self.succ_offsets
+        return [self.ids[j] for j in self.succ_targets[offsets[i]:
+                                                       offsets[i + 1]]]
+
+    def weight(self, u, v):
+        """
+        Return weight of edge (u, v).
+
+        Raises
+        ------
+        KeyError
+            If the edge doesn't exist.
+
+        """
+        i, j = self.index[u], self.index[v]
+        start, stop = self.succ_offsets[i], self.succ_offsets[i + 1]
+        for position in range(start, stop):
+            if self.succ_targets[position] == j:
+                return self.succ_weights[position]
+        raise KeyError((u, v))
+
+
+def astar_path(
+        graph,
+        source,
+        target,
+        heuristic=None,
+        weighted=False,
+        ignore_nodes=frozenset(),
+        ignore_edges=frozenset(),
+        ):
+    """
+    Return a lowest cost path between two node indices by A* search.
+
+    The priority queue is a heapq list of plain integers, that encode
+    both estimated cost and node index, so that no tuples are built or
+    compared.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph to search.
+    source, target : int
+        Node indices.
+    heuristic : callable
+        Called with a node index and target, returns an integer lower
+        bound of the cost from the node to target or INFINITY, for
+        example LandmarkIndex.lower_bound. Default None, in which case
+        the search is Dijkstra's.
+    weighted : bool
+        If true, path cost is the sum of edge weights, otherwise the
+        amount of edges.
+    ignore_nodes : set
+        Node indices that the path must not pass through.
+    ignore_edges : set
+        (u, v) node index pairs that the path must not use.
+
+    Returns
+    -------
+    list or None
+        Node indices from source to target, None if there's no path.
+
+    """
+    n = len(graph)
+    offsets, adjacency = graph.succ_offsets, graph.succ_targets
+    weights = graph.succ_weights
+    if heuristic is None:
+        estimate = 0
+    else:
+        estimate = heuristic(source, target)
+        if estimate == INFINITY:
+            return None
+    parents = {source: None}
+    costs = {source: 0}
+    closed = set()
+    queue = [estimate * n + source]
+    while queue:
+        __, v = divmod(hq.heappop(queue), n)
+        if v == target:
+            path = []
+            while v is not None:
+                path.append(v)
+                v = parents[v]
+            path.reverse()
+            return path
+        elif v in closed:
+            continue
+        closed.add(v)
+        cost_v = costs[v]
+        for position in range(offsets[v], offsets[v + 1]):
+            w = adjacency[position]
+            if w in closed or w in ignore_nodes or (v, w) in ignore_edges:
+                continue
+            cost = cost_v + (weights[position] if weighted else 1)
+            if costs.get(w, INFINITY) <= cost:
+                continue
+            if heuristic is None:
+                estimate = 0
+            else:
+                estimate = heuristic(w, target)
+                if estimate == INFINITY:
+                    continue
+            costs[w] = cost
+            parents[w] = v
+            hq.heappush(queue, (cost + estimate) * n + w)
+    return None
+
+
+def bidirectional_shortest_path(
+        graph,
+        source,
+        target,
+        ignore_nodes=frozenset(),
+        ignore_edges=frozenset(),
+        ):
+    """
+    Return a shortest path between two node indices.
+
+    Expands alternately the smaller of forward and reverse frontiers.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph to search.
+    source, target : int
+        Node indices.
+    ignore_nodes : set
+        Node indices that the path must not pass through.
+    ignore_edges : set
+        (u, v) node index pairs that the path must not use.
+
+    Returns
+    -------
+    list or None
+        Node indices from source to target, None if there's no path.
+
+    """
+    if source == target:
+        return [source]
+    succ_offsets, succ_targets = graph.succ_offsets, graph.succ_targets
+    pred_offsets, pred_targets = graph.pred_offsets, graph.pred_targets
+    pred = {source: None}
+    succ = {target: None}
+    forward_fringe = [source]
+    reverse_fringe = [target]
+    meeting = None
+    while forward_fringe and reverse_fringe and meeting is None:
+        if len(forward_fringe) <= len(reverse_fringe):
+            this_level, forward_fringe = forward_fringe, []
+            for v in this_level:
+                for w in succ_targets[succ_offsets[v]:succ_offsets[v + 1]]:
+                    if w in ignore_nodes or (v, w) in ignore_edges:
+                        continue
+                    if w not in pred:
+                        forward_fringe.append(w)
+                        pred[w] = v
+                    if w in succ:
+                        meeting = w
+                        break
+                if meeting is not None:
+                    break
+        else:
+            this_level, reverse_fringe = reverse_fringe, []
+            for v in this_level:
+                for w in pred_targets[pred_offsets[v]:pred_offsets[v + 1]]:
+                    if w in ignore_nodes or (w, v) in ignore_edges:
+                        continue
+                    if w not in succ:
+                        reverse_fringe.append(w)
+                        succ[w] = v
+                    if w in pred:
+                        meeting = w
+                        break
+                if meeting is not None:
+                    break
+    if meeting is None:
+        return None
+    path = []
+    node = meeting
+    while node is not None:
+        path.append(node)
+        node = pred[node]
+    path.reverse()
+    node = succ[meeting]
+    while node is not None:
+        path.append(node)
+        node = succ[node]
+    return path
+
+
+def constrained_shortest_paths(
+        graph,
+        roots,
+        goals=None,
+        allow_node=None,
+        allow_step=None,
+        reverse=False,
+        max_length=None,
+        width=None,
+        ):
+    """
+    Return shortest loopless paths that pass given constraints.
+
+    Searches breadth-first from all roots at once over path states, so
+    that a step can be rejected based on the two nodes preceding it. A
+    node keeps a state per distinct preceding node, the first one
+    reached, so the shortest path passing the constraints is found to
+    every node from the nearest root. Each state keeps the set of nodes
+    on its path, so loops are rejected without walking the path.
+    Rejected path prefixes are never extended.
+
+    If goals are given, nodes farther from the remaining goals than the
+    length limit allows, by unconstrained distances, are not expanded.
+    The limit is first the unconstrained length of the shortest path
+    to a goal, and goals not found are searched again with the limit
+    raised by one, up to _DEEPENING_STEPS times, and then with
+    max_length. Searches stop as soon as no path was cut by the limit.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph to search.
+    roots : iterable
+        Node indices.
+    goals : iterable
+        Node indices. The search stops when all goals have been
+        reached. Default None, in which case all nodes are searched.
+    allow_node : callable
+        Called with a node index, returns false if paths must not pass
+        through the node. Default None, all nodes are allowed.
+    allow_step : callable
+        Called with three consecutive node indices of a path in path
+        order, returns false if the last step is not allowed. Default
+        None, all steps are allowed.
+    reverse : bool
+        If true, search paths to roots along reversed edges. Paths are
+        still listed in root-last order.
+    max_length : int
+        The maximum amount of nodes in a path. Default None, in which
+        case paths of any length are searched.
+    width : int
+        If given, the maximum amount of states per node. Paths are then
+        not necessarily the shortest ones passing the constraints, but
+        at most width times the nodes of a plain search are expanded.
+        With width 1 the sets of nodes on paths are not kept. Default
+        None.
+
+    Returns
+    -------
+    dict
+        Node index keys, the first found shortest path list values
+        from any of roots.
+
+    """
+    if allow_node is not None:
+        roots = [root for root in roots if allow_node(root)]
+    roots = list(dict.fromkeys(roots))
+    if goals is None:
+        found, __ = _constrained_search(
+            graph, roots, None, allow_node, allow_step, reverse,
+            max_length, width)
+    else:
+        goals = set(goals)
+        found = dict((root, (root,)) for root in roots if root in goals)
+        remaining = goals - set(roots)
+        # Unconstrained distances to goals bound constrained ones.
+        bounds = _bounded_distances(graph, remaining, not reverse,
+                                    len(graph))
+        lengths = [bounds[root] + 1 for root in roots if root in bounds]
+        limit = min(lengths, default=None)
+        steps = 0
+        while remaining and limit is not None:
+            if max_length is not None and limit >= max_length:
+                limit = max_length
+            elif steps > _DEEPENING_STEPS:
+                limit = max_length
+            paths, cut = _constrained_search(
+                graph, roots, remaining, allow_node, allow_step, reverse,
+                limit, width, bounds)
+            reached = remaining.intersection(paths)
+            found.update((node, paths[node]) for node in reached)
+            remaining -= reached
+            if not cut or limit == max_length:
+                break
+            elif reached:
+                bounds = _bounded_distances(graph, remaining, not reverse,
+                                            len(graph))
+            limit += 1
+            steps += 1
+    if reverse:
+        return dict((node, list(reversed(path)))
+                    for node, path in found.items())
+    return dict((node, list(path)) for node, path in found.items())
+
+
+def _constrained_search(
+        graph,
+        roots,
+        goals=None,
+        allow_node=None,
+        allow_step=None,
+        reverse=False,
+        max_length=None,
+        width=None,
+        bounds=None,
+        ):
+    """
+    Return path tuples and whether max_length cut paths.
+
+    See constrained_shortest_paths. Roots must be allowed and unique.
+    Bounds is a dict of unconstrained distances to goals, nodes not in
+    it are not expanded.
+
+    """
+    if reverse:
+        offsets, adjacency = graph.pred_offsets, graph.pred_targets
+    else:
+        offsets, adjacency = graph.succ_offsets, graph.succ_targets
+    remaining = None if goals is None else set(goals)
+    # States are (path tuple, nodes of path) tuples in search order.
+    # With one state per node, nodes of a path are first reached in path
+    # order, so paths can't loop and the nodes of paths are not kept.
+    level = [((root,), None if width == 1 else frozenset([root]))
+             for root in roots]
+    found = dict((root, (root,)) for root in roots)
+    # Preceding nodes of the states of nodes, if width is not 1.
+    preceding = dict((root, [None]) for root in roots)
+    # Nodes with width states, not allowed or unreachable from goals are
+    # skipped at once.
+    full = set(roots) if width == 1 else set()
+    cut = False
+    length = 1
+    while level and (remaining is None or remaining):
+        if max_length is not None and length >= max_length:
+            cut = True
+            break
+        length += 1
+        next_level = []
+        for path, visited in level:
+            v = path[-1]
+            prev = path[-2] if length > 2 else None
+            for w in adjacency[offsets[v]:offsets[v + 1]]:
+                if w in full:
+                    continue
+                elif allow_node is not None and not allow_node(w):
+                    full.add(w)
+                    continue
+                elif bounds is not None and w not in bounds:
+                    # No goal is reachable from w.
+                    full.add(w)
+                    continue
+                elif bounds is not None and max_length is not None \
+                        and length + bounds[w] > max_length:
+                    # Paths only get longer, so w is never reached.
+                    full.add(w)
+                    cut = True
+                    continue
+                if visited is not None:
+                    nodes = preceding.setdefault(w, [])
+                    if v in nodes or w in visited:
+                        continue
+                if prev is not None and allow_step is not None:
+                    if reverse and not allow_step(w, v, prev):
+                        continue
+                    elif not reverse and not allow_step(prev, v, w):
+                        continue
+                next_path = path + (w,)
+                if visited is None:
+                    full.add(w)
+                    next_level.append((next_path, None))
+                else:
+                    nodes.append(v)
+                    if width is not None and len(nodes) >= width:
+                        full.add(w)
+                    next_level.append((next_path, visited | set([w])))
+                if w not in found:
+                    found[w] = next_path
+                    if remaining is not None:
+                        remaining.discard(w)
+        level = next_level
+    return found, cut
+
+
+def _bounded_distances(graph, roots, reverse=False, max_distance=0):
+    """
+    Return dict of node indices within max_distance of roots.
+
+    """
+    if reverse:
+        offsets, adjacency = graph.pred_offsets, graph.pred_targets
+    else:
+        offsets, adjacency = graph.succ_offsets, graph.succ_targets
+    distances = dict.fromkeys(roots, 0)
+    level = list(distances)
+    distance = 0
+    while level and distance < max_distance:
+        distance += 1
+        next_level = []
+        for v in level:
+            for w in adjacency[offsets[v]:offsets[v + 1]]:
+                if w not in distances:
+                    distances[w] = distance
+                    next_level.append(w)
+        level = next_level
+    return distances
+
+
+def _distances(graph, root, reverse=False):
+    """
+    Return array of breadth-first search distances from a node index.
+
+    """
+    if reverse:
+        offsets, adjacency = graph.pred_offsets, graph.pred_targets
+    else:
+        offsets, adjacency = graph.succ_offsets, graph.succ_targets
+    distances = array(_TYPECODE, [_UNREACHABLE]) * len(graph)
+    distances[root] = 0
+    level = [root]
+    distance = 0
+    while level:
+        distance += 1
+        next_level = []
+        for v in level:
+            for w in adjacency[offsets[v]:offsets[v + 1]]:
+                if distances[w] == _UNREACHABLE:
+                    distances[w] = distance
+                    next_level.append(w)
+        level = next_level
+    return distances
+
+
+def dump_landmarks(graph, landmarks, version=None):
+    """
+    Return JSON serializable data of a LandmarkIndex.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph of the index.
+    landmarks : LandmarkIndex
+        Index to be dumped.
+    version : string
+        Version of the data the graph was built from, see
+        save_snapshot. Default None.
+
+    Returns
+    -------
+    dict
+        Key nodes maps to Rhea ID strings of the graph, landmarks to
+        Rhea ID strings of landmarks, distances_from and distances_to
+        to lists of distance lists and version to version.
+
+    See also
+    --------
+    load_landmarks
+
+    """
+    return {
+        'nodes': graph.ids,
+        'landmarks': [graph.ids[i] for i in landmarks.landmarks],
+        'distances_from': [list(d) for d in landmarks.distances_from],
+        'distances_to': [list(d) for d in landmarks.distances_to],
+        'version': version,
+        }
+
+
+def dump_reachability(graph, reachability):
+    """
+    Return JSON serializable data of a ReachabilityIndex.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph of the index.
+    reachability : ReachabilityIndex
+        Index to be dumped.
+
+    Returns
+    -------
+    dict
+        Key nodes maps to Rhea ID strings of the graph, components,
+        dag_offsets and dag_targets to lists of integers and labels to
+        a list of interval bound list pairs.
+
+    See also
+    --------
+    load_reachability
+
+    """
+    return {
+        'nodes': graph.ids,
+        'components': list(reachability.components),
+        'dag_offsets': list(reachability.dag_offsets),
+        'dag_targets': list(reachability.dag_targets),
+        'labels': [[list(lows), list(highs)]
+                   for lows, highs in reachability.labels],
+        }
+
+
+def _compress(n, edges):
+    """
+    Return CSR offsets, targets and weights of (u, v, weight) triples.
+
+    """
+    counts = [0] * (n + 1)
+    for u, __, __ in edges:
+        counts[u + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    offsets = array(_TYPECODE, counts)
+    targets = array(_TYPECODE, [0]) * len(edges)
+    weights = array(_TYPECODE, [0]) * len(edges)
+    position = counts[:-1]
+    for u, v, weight in sorted(edges):
+        targets[position[u]] = v
+        weights[position[u]] = weight
+        position[u] += 1
+    return offsets, targets, weights
+
+
+def from_edges(edges):
+    """
+    Build a reaction graph from weighted edges.
+
+    Parameters
+    ----------
+    edges : dict
+        (u, v) Rhea ID string pair keys, integer weight values.
+
+    Returns
+    -------
+    ReactionGraph
+        Nodes are the Rhea IDs present in edges in sorted order.
+
+    """
+    ids = sorted(set(node for edge in edges for node in edge))
+    index = {node: i for i, node in enumerate(ids)}
+    forward = [(index[u], index[v], w) for (u, v), w in edges.items()]
+    reverse = [(v, u, w) for u, v, w in forward]
+    succ_offsets, succ_targets, succ_weights = _compress(len(ids), forward)
+    pred_offsets, pred_targets, pred_weights = _compress(len(ids), reverse)
+    return ReactionGraph(ids, succ_offsets, succ_targets, succ_weights,
+                         pred_offsets, pred_targets, pred_weights)
+
+
+def initialize_landmarks(graph, landmarks=None, n=16):
+    """
+    Initialize landmark distance oracle of a graph.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph to index.
+    landmarks : iterable
+        Landmark node indices. Default None, in which case n nodes of
+        the highest total degree are used.
+    n : int
+        The amount of landmarks chosen if landmarks is None.
+
+    Returns
+    -------
+    LandmarkIndex
+
+    """
+    if landmarks is None:
+        succ, pred = graph.succ_offsets, graph.pred_offsets
+        degrees = [succ[i + 1] - succ[i] + pred[i + 1] - pred[i]
+                   for i in range(len(graph))]
+        landmarks = sorted(range(len(graph)), key=lambda i: -degrees[i])[:n]
+    distances_from = [_distances(graph, landmark) for landmark in landmarks]
+    distances_to = [_distances(graph, landmark, True)
+                    for landmark in landmarks]
+    return LandmarkIndex(landmarks, distances_from, distances_to)
+
+
+def _strong_components(graph):
+    """
+    Return component numbers of nodes and the amount of components.
+
+    Iterative Tarjan's algorithm. Components are numbered in reverse
+    topological order.
+
+    """
+    n = len(graph)
+    offsets, adjacency = graph.succ_offsets, graph.succ_targets
+    order = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    components = array(_TYPECODE, [-1]) * n
+    stack = []
+    counter = 0
+    n_components = 0
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [[root, offsets[root]]]
+        while work:
+            frame = work[-1]
+            v, position = frame
+            if position < offsets[v + 1]:
+                frame[1] += 1
+                w = adjacency[position]
+                if order[w] == -1:
+                    order[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append([w, offsets[w]])
+                elif on_stack[w] and order[w] < low[v]:
+                    low[v] = order[w]
+                continue
+            work.pop()
+            if work and low[v] < low[work[-1][0]]:
+                low[work[-1][0]] = low[v]
+            if low[v] == order[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    components[w] = n_components
+                    if w == v:
+                        break
+                n_components += 1
+    return components, n_components
+
+
+def _interval_labels(n, offsets, adjacency, reverse_children=False):
+    """
+    Return post-order interval labels of a DAG in CSR form.
+
+    """
+    lows = array(_TYPECODE, [-1]) * n
+    highs = array(_TYPECODE, [-1]) * n
+    rank = 0
+    # Components are numbered sinks first, start from the sources.
+    for root in range(n - 1, -1, -1):
+        if highs[root] != -1:
+            continue
+        work = [[root, None]]
+        while work:
+            frame = work[-1]
+            v, children = frame
+            if children is None:
+                children = list(adjacency[offsets[v]:offsets[v + 1]])
+                if not reverse_children:
+                    children.reverse()
+                frame[1] = children
+                lows[v] = rank
+            if children:
+                w = children.pop()
+                if highs[w] == -1 and lows[w] == -1:
+                    work.append([w, None])
+                continue
+            work.pop()
+            for w in adjacency[offsets[v]:offsets[v + 1]]:
+                if lows[w] < lows[v]:
+                    lows[v] = lows[w]
+            highs[v] = rank
+            rank += 1
+    return lows, highs
+
+
+def initialize_reachability(graph, n_labels=2):
+    """
+    Initialize reachability index of a graph.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph to index.
+    n_labels : int
+        The amount of interval labelings, 1 or 2. Each labeling is
+        traversed in a different child order to reject more unreachable
+        pairs in constant time.
+
+    Returns
+    -------
+    ReachabilityIndex
+
+    """
+    components, n_components = _strong_components(graph)
+    offsets, adjacency = graph.succ_offsets, graph.succ_targets
+    edges = set()
+    for v in range(len(graph)):
+        for w in adjacency[offsets[v]:offsets[v + 1]]:
+            if components[v] != components[w]:
+                edges.add((components[v], components[w], 0))
+    dag_offsets, dag_targets, __ = _compress(n_components, edges)
+    labels = [_interval_labels(n_components, dag_offsets, dag_targets, i)
+              for i in (False, True)[:n_labels]]
+    return ReachabilityIndex(components, dag_offsets, dag_targets, labels)
+
+
+def load_landmarks(graph, data, version=None):
+    """
+    Return LandmarkIndex from data returned by dump_landmarks.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph of the index.
+    data : dict
+        See dump_landmarks.
+    version : string
+        Data version the index must have. Default None, in which case
+        any version is accepted.
+
+    Returns
+    -------
+    LandmarkIndex
+
+    Raises
+    ------
+    ValueError
+        If the index was built from another graph or version.
+
+    """
+    if version is not None and data.get('version') != version:
+        raise ValueError('landmark index version not {}'.format(version))
+    elif data['nodes'] != graph.ids:
+        raise ValueError('landmark index nodes differ from graph nodes')
+    landmarks = [graph.index[landmark] for landmark in data['landmarks']]
+    distances_from = [array(_TYPECODE, d) for d in data['distances_from']]
+    distances_to = [array(_TYPECODE, d) for d in data['distances_to']]
+    return LandmarkIndex(landmarks, distances_from, distances_to)
+
+
+def load_reachability(graph, data):
+    """
+    Return ReachabilityIndex from data returned by dump_reachability.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph of the index.
+    data : dict
+        See dump_reachability.
+
+    Returns
+    -------
+    ReachabilityIndex
+
+    Raises
+    ------
+    ValueError
+        If the index was built from another graph.
+
+    """
+    if data['nodes'] != graph.ids:
+        raise ValueError('reachability index nodes differ from graph nodes')
+    return ReachabilityIndex(
+        array(_TYPECODE, data['components']),
+        array(_TYPECODE, data['dag_offsets']),
+        array(_TYPECODE, data['dag_targets']),
+        [(array(_TYPECODE, lows), array(_TYPECODE, highs))
+         for lows, highs in data['labels']],
+        )
+
+
+def load_snapshot(path, filename, version=None):
+    """
+    Return ReactionGraph from a snapshot file written by save_snapshot.
+
+    Adjacency arrays of the returned graph are read-only memoryviews of
+    the memory-mapped file, so nothing is rebuilt and pages are read
+    only when searches touch them.
+
+    Parameters
+    ----------
+    path : string
+        Directory path to file.
+    filename : string
+        Name of the snapshot file.
+    version : string
+        Data version the snapshot must have. Default None, in which case
+        any version is accepted.
+
+    Returns
+    -------
+    ReactionGraph
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file doesn't exist.
+    ValueError
+        If the file isn't a snapshot of this format, platform or
+        version.
+
+    """
+    with open(os.path.join(path, filename), 'rb') as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError('empty snapshot file')
+    if len(buffer) < _SNAPSHOT_HEADER.size:
+        raise ValueError('truncated snapshot header')
+    (magic, form, data_version, itemsize, little, n_nodes, n_edges,
+     ids_size) = _SNAPSHOT_HEADER.unpack_from(buffer)
+    if magic != _SNAPSHOT_MAGIC or form != _SNAPSHOT_FORMAT:
+        raise ValueError('not a snapshot of format {}'.format(
+            _SNAPSHOT_FORMAT))
+    elif (itemsize != array(_TYPECODE).itemsize
+          or bool(little) != (sys.byteorder == 'little')):
+        raise ValueError('snapshot written on an incompatible platform')
+    elif version is not None and data_version != _encode_version(version):
+        raise ValueError('snapshot version not {}'.format(version))
+    view = memoryview(buffer)
+    lengths = [n_nodes + 1, n_edges, n_edges] * 2
+    arrays = []
+    position = _SNAPSHOT_HEADER.size
+    for length in lengths:
+        position = _align(position)
+        stop = position + length * itemsize
+        if stop > len(buffer):
+            raise ValueError('truncated snapshot')
+        arrays.append(view[position:stop].cast(_TYPECODE))
+        position = stop
+    position = _align(position)
+    if position + ids_size > len(buffer):
+        raise ValueError('truncated snapshot')
+    ids = bytes(view[position:position + ids_size]).decode()
+    ids = ids.split('\n') if n_nodes else []
+    return ReactionGraph(ids, *arrays)
+
+
+def lowest_cost_paths(graph, root, goals=None, reverse=False):
+    """
+    Return lowest cost paths from a node index by Dijkstra's algorithm.
+
+    Path cost is the sum of edge weights. See astar_path for the
+    priority queue.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph to search.
+    root : int
+        Node index.
+    goals : iterable
+        Node indices. The search stops when all goals have been
+        reached. Default None, in which case all nodes are searched.
+    reverse : bool
+        If true, search paths to root along reversed edges. Paths are
+        still listed in root-last order.
+
+    Returns
+    -------
+    dict
+        Node index keys, path list values in increasing cost order.
+
+    """
+    n = len(graph)
+    if reverse:
+        offsets, adjacency = graph.pred_offsets, graph.pred_targets
+        weights = graph.pred_weights
+    else:
+        offsets, adjacency = graph.succ_offsets, graph.succ_targets
+        weights = graph.succ_weights
+    if goals is None:
+        remaining = None
+    else:
+        remaining = set(goals)
+    parents = {root: None}
+    costs = {root: 0}
+    paths = {}
+    queue = [root]
+    while queue and (remaining is None or remaining):
+        cost_v, v = divmod(hq.heappop(queue), n)
+        if v in paths or cost_v > costs[v]:
+            continue
+        path = []
+        node = v
+        while node is not None:
+            path.append(node)
+            node = parents[node]
+        if not reverse:
+            path.reverse()
+        paths[v] = path
+        if remaining is not None:
+            remaining.discard(v)
+        for position in range(offsets[v], offsets[v + 1]):
+            w = adjacency[position]
+            cost = cost_v + weights[position]
+            if w not in paths and cost < costs.get(w, INFINITY):
+                costs[w] = cost
+                parents[w] = v
+                hq.heappush(queue, cost * n + w)
+    if goals is not None:
+        paths = {node: path for node, path in paths.items() if node in goals}
+    return paths
+
+
+def multi_shortest_paths(
+        graph,
+        sources,
+        targets,
+        may_reach=None,
+        weighted=False,
+        reverse=None,
+        counts=None,
+        ):
+    """
+    Return shortest paths between all source and target node indices.
+
+    Runs one breadth-first search per source, or one reverse search
+    per target if there are fewer targets than sources. A search stops
+    as soon as all of its goals have been reached. The path found for
+    a pair depends only on the search direction, not on the other
+    sources or targets.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph to search.
+    sources, targets : iterable
+        Node indices.
+    may_reach : callable
+        Called with source and target node indices, returns false if
+        target is proven unreachable, see LandmarkIndex.may_reach and
+        ReachabilityIndex.may_reach. If given, unreachable goals are
+        not waited for, and searches without reachable goals are
+        skipped.
+    weighted : bool
+        If true, search lowest cost paths by Dijkstra's algorithm
+        instead, see lowest_cost_paths.
+    reverse : bool
+        If true, search from targets, if false from sources. Default
+        None, in which case the direction with fewer searches is chosen.
+    counts : dict
+        If given, the amount of nodes reached by breadth-first searches
+        is added to key expanded. Default None.
+
+    Returns
+    -------
+    dict
+        (source, target) index pair keys, path list values of node
+        indices from source to target. Unreachable pairs are omitted.
+
+    """
+    sources = list(dict.fromkeys(sources))
+    targets = list(dict.fromkeys(targets))
+    if reverse is None:
+        reverse = len(targets) < len(sources)
+    if reverse:
+        roots, goals = targets, sources
+        offsets, adjacency = graph.pred_offsets, graph.pred_targets
+    else:
+        roots, goals = sources, targets
+        offsets, adjacency = graph.succ_offsets, graph.succ_targets
+    paths = {}
+    for root in roots:
+        parents = {root: None}
+        if may_reach is None:
+            remaining = set(goals)
+        elif reverse:
+            remaining = set(goal for goal in goals if may_reach(goal, root))
+        else:
+            remaining = set(goal for goal in goals if may_reach(root, goal))
+        if weighted:
+            found = lowest_cost_paths(graph, root, remaining - set([root]),
+                                      reverse)
+            if root in remaining:
+                found[root] = [root]
+            for goal, path in found.items():
+                if reverse:
+                    paths[goal, root] = path
+                else:
+                    paths[root, goal] = path
+            continue
+        remaining.discard(root)
+        level = [root]
+        while level and remaining:
+            next_level = []
+            for v in level:
+                for w in adjacency[offsets[v]:offsets[v + 1]]:
+                    if w not in parents:
+                        parents[w] = v
+                        next_level.append(w)
+                        remaining.discard(w)
+            level = next_level
+        if counts is not None:
+            counts['expanded'] = counts.get('expanded', 0) + len(parents)
+        for goal in goals:
+            if goal not in parents:
+                continue
+            # Parent chain runs from goal to root.
+            path = []
+            node = goal
+            while node is not None:
+                path.append(node)
+                node = parents[node]
+            if reverse:
+                paths[goal, root] = path
+            else:
+                path.reverse()
+                paths[root, goal] = path
+    return paths
+
+
+def _align(position):
+    return -(-position // _SNAPSHOT_ALIGNMENT) * _SNAPSHOT_ALIGNMENT
+
+
+def _encode_version(version):
+    encoded = version.encode('ascii')
+    if len(encoded) > 16:
+        raise ValueError('version longer than 16 characters')
+    return encoded.ljust(16, b'\0')
+
+
+def save_snapshot(graph, path, filename, version=''):
+    """
+    Write ReactionGraph to a snapshot file.
+
+    The file has a fixed size header followed by the CSR arrays in the
+    native item size and byte order of this platform and the
+    newline-separated Rhea ID strings. Sections start at aligned
+    offsets, so load_snapshot can map the arrays without copying.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph to be written. Node IDs must be strings without newlines.
+    path : string
+        Directory path to file.
+    filename : string
+        Name of the snapshot file.
+    version : string
+        Data version of the graph, at most 16 ASCII characters. Default
+        empty string.
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    ValueError
+        If version is too long.
+
+    """
+    arrays = [graph.succ_offsets, graph.succ_targets, graph.succ_weights,
+              graph.pred_offsets, graph.pred_targets, graph.pred_weights]
+    ids = '\n'.join(graph.ids).encode()
+    sections = [array(_TYPECODE, data).tobytes() for data in arrays]
+    sections.append(ids)
+    header = _SNAPSHOT_HEADER.pack(
+        _SNAPSHOT_MAGIC, _SNAPSHOT_FORMAT, _encode_version(version),
+        array(_TYPECODE).itemsize, sys.byteorder == 'little', len(graph),
+        graph.number_of_edges(), len(ids))
+    filepath = os.path.join(path, filename)
+    temporary = '{}.{}'.format(filepath, os.getpid())
+    with open(temporary, 'wb') as file:
+        file.write(header)
+        for section in sections:
+            file.write(b'\0' * (_align(file.tell()) - file.tell()))
+            file.write(section)
+    os.replace(temporary, filepath)
+
+
+def shortest_paths(graph, root, reverse=False):
+    """
+    Return shortest paths from a node index to all reachable nodes.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph to search.
+    root : int
+        Node index.
+    reverse : bool
+        If true, search paths to roots along reversed edges. Paths are
+        still listed in root-last order.
+
+    Returns
+    -------
+    dict
+        Node index keys, path list values in breadth-first order.
+
+    """
+    if reverse:
+        offsets, targets = graph.pred_offsets, graph.pred_targets
+    else:
+        offsets, targets = graph.succ_offsets, graph.succ_targets
+    paths = {root: [root]}
+    level = [root]
+    while level:
+        next_level = []
+        for v in level:
+            path = paths[v]
+            for w in targets[offsets[v]:offsets[v + 1]]:
+                if w not in paths:
+                    if reverse:
+                        paths[w] = [w] + path
+                    else:
+                        paths[w] = path + [w]
+                    next_level.append(w)
+        level = next_level
+    return paths
+
+
+def shortest_simple_paths(
+        graph,
+        source,
+        target,
+        weighted=False,
+        heuristic=None,
+        ):
+    """
+    Yield loopless paths between two node indices in cost order.
+
+    Implements Yen's k shortest paths algorithm lazily: the next path is
+    searched only when requested. Spur searches of each new path reuse
+    its root paths shared with the paths yielded earlier, and candidate
+    paths found on earlier rounds are kept for later ones.
+
+    Parameters
+    ----------
+    graph : ReactionGraph
+        Graph to search.
+    source, target : int
+        Node indices.
+    weighted : bool
+        If true, path cost is the sum of edge weights, otherwise the
+        amount of edges.
+    heuristic : callable
+        Lower bound of cost to target, see astar_path. Used only if
+        weighted is true.
+
+    Yields
+    ------
+    list
+        Node indices from source to target. Paths of equal cost are
+        yielded in the order they were found.
+
+    See also
+    --------
+    astar_path, bidirectional_shortest_path
+
+    """
+    if weighted:
+        def search(spur, ignore_nodes=frozenset(), ignore_edges=frozenset()):
+            return astar_path(graph, spur, target, heuristic, True,
+                              ignore_nodes, ignore_edges)
+
+        def cost(path):
+            return sum(graph.weight(graph.ids[u], graph.ids[v])
+                       for u, v in zip(path[:-1], path[1:]))
+    else:
+        def search(spur, ignore_nodes=frozenset(), ignore_edges=frozenset()):
+            return bidirectional_shortest_path(
+                graph, spur, target, ignore_nodes, ignore_edges)
+        cost = len
+    path = search(source)
+    if path is None:
+        return
+    found = [path]
+    candidates = []
+    seen = set([tuple(path)])
+    counter = it.count()
+    while True:
+        yield path
+        ignore_nodes = set()
+        for i in range(1, len(path)):
+            root = path[:i]
+            ignore_edges = set((p[i - 1], p[i]) for p in found
+                               if p[:i] == root)
+            spur = search(root[-1], ignore_nodes, ignore_edges)
+            if spur is not None:
+                candidate = root[:-1] + spur
+                key = tuple(candidate)
+                if key not in seen:
+                    seen.add(key)
+                    hq.heappush(candidates,
+                                (cost(candidate), next(counter), candidate))
+            ignore_nodes.add(root[-1])
+        if not candidates:
+            return
+        __, __, path = hq.heappop(candidates)
+        found.append(path)
@@ -10,39 +10,107 @@ databases ChEBI, IntEnz and Rhea (also some irrelevant data is saved at
 the moment). Defines also functions for running an analysis assessing
 the performance of PathWalue application.
 
+Classes
+-------
+Parameters
+    collections.namedtuple for analysis run parameters.
+Pathway
+    collections.namedtuple for pathway compared to reference pathway.
+Result
+    collections.namedtuple for analysis run results.
+
 Functions
 ---------
 compare_pathways
     Compare pathways to reference pathway.
+compare_pathways_batch
+    Compare pathways to multiple reference pathways at once.
 initialize_chebi
     Read ChEBI files and save data to json files.
+initialize_context
+    Load data context and reaction graph.
 initialize_intenz
     Read IntEnz file and save data to json files.
+initialize_landmarks
+    Build reaction graph landmark index and save to json file.
 initialize_market
     Evaluate price, demand and complexity values and save to json files.
 initialize_rhea
     Read Rhea files and save data to json files.
+initialize_snapshot
+    Build reaction graph and save to snapshot file.
 main
     Initialize context, run analysis and display results.
 run_analysis
     Run analysis with given parameters.
+run_benchmarks
+    Run benchmark scenarios and save a report.
+run_scenario
+    Run a benchmark scenario and return its report.
 show_results
     Print and save analysis results.
+sweep_analysis
+    Yield analysis results of a parameter grid.
+
+Constants
+---------
+MAIN_SCENARIOS
+    Names of benchmark scenarios run by main.
 
 """
 
 
+import concurrent.futures as cf
+import itertools as it
+import multiprocessing as mp
+import time
+
 from collections import namedtuple
 
+import numpy as np
+
+import caches
 import chebi
+import contexts
 import files
+import graphs
 import intenz
 import market
 import paths
 import pw
+import records
 import rhea
 
 
+# Analysis records. Module level, so that worker processes can return
+# them.
+Parameters = namedtuple('Parameters', ['n', 'C', 'E'])
+Pathway = namedtuple('Pathway', ['path', 'score', 's_s', 's_p', 's_mol',
+                                 's_rxn'])
+Result = namedtuple('Result', ['pathways', 'parameters'])
+
+# Benchmark scenarios run by main.
+MAIN_SCENARIOS = ['ETH', 'ISO']
+
+# Context keys and names of their JSON files in paths.JSON.
+_CONTEXT_FILES = {
+    'complexities': files.RXN_COMPLEXITIES,
+    'compound_reactions': files.MOL_REACTIONS,
+    'demands': files.MOL_DEMANDS,
+    'ec_reactions': files.ENZ_REACTIONS,
+    'equations': files.RXN_EQUATIONS,
+    'prices': files.MOL_PRICES,
+    'reaction_ecs': files.RXN_ECS,
+    'stoichiometrics': files.RXN_STOICHIOMETRICS,
+    }
+
+# Timed stages of benchmark queries.
+_STAGES = ('search', 'filter', 'score', 'compare')
+
+# Graph, reference and context of analysis worker processes.
+_WORKER = {}
+
+
 def compare_pathways(pathways_raw, reactions_ref, context):
     """
     Compare pathways to a reference pathway.
@@ -57,37 +125,120 @@ def compare_pathways(pathways_raw, reactions_ref, context):
     context : dict
         Data context, must contain stoichiometrics.
     """
-    Pathway = namedtuple('Pathway', ['path', 'score', 's_s', 's_p', 's_mol',
-                                     's_rxn'])
-    pathways = []
-    substrates_ref = set()
-    products_ref = set()
-    for reaction in reactions_ref:
-        substrates_ref.update(context['stoichiometrics'][reaction][0])
-        products_ref.update(context['stoichiometrics'][reaction][1])
-    compounds_ref = substrates_ref | products_ref
-    for score, reactions in pathways_raw:
-        substrates = set()
-        products = set()
-        for reaction in reactions:
-            substrates.update(context['stoichiometrics'][reaction][0])
-            products.update(context['stoichiometrics'][reaction][1])
-        compounds = substrates | products
-        intersect_c = compounds & compounds_ref
-        intersect_s = substrates & substrates_ref
-        intersect_p = products & products_ref
-        intersect_r = set(reactions) & set(reactions_ref)
-        union_c = compounds | compounds_ref
-        union_s = substrates | substrates_ref
-        union_p = products | products_ref
-        union_r = set(reactions) | set(reactions_ref)
-        s_s = len(intersect_s) / len(union_s)
-        s_p = len(intersect_p) / len(union_p)
-        s_m = len(intersect_c) / len(union_c)
-        s_r = len(intersect_r) / len(union_r)
-        pathway = Pathway(reactions, score, s_s, s_p, s_m, s_r)
-        pathways.append(pathway)
-    return pathways
+    return compare_pathways_batch(pathways_raw, [reactions_ref], context)[0]
+
+
+def compare_pathways_batch(pathways_raw, references, context):
+    """
+    Compare pathways to multiple reference pathways.
+
+    Pathways and references are represented as sparse binary incidence
+    matrices over substrates, products, compounds and reactions, and
+    Jaccard similarities of all pathway and reference pairs are
+    computed with a single matrix product per matrix.
+
+    Parameters
+    ----------
+    pathways_raw : iterable of number, iterable of string pairs
+        [0] score of pathway, [1] pathway iterable of reaction ID
+        strings.
+    references : list
+        Reference pathways, iterables of reaction ID strings.
+    context : dict
+        Data context, must contain stoichiometrics.
+
+    Returns
+    -------
+    list
+        Lists of Pathway, list [j][i] compares pathway i to reference j.
+
+    Raises
+    ------
+    ZeroDivisionError
+        If both a pathway and a reference have no compounds or
+        reactions.
+
+    See also
+    --------
+    compare_pathways
+
+    """
+    pathways_raw = list(pathways_raw)
+    references = [list(reference) for reference in references]
+    rows = [list(reactions) for __, reactions in pathways_raw] + references
+    n_pathways = len(pathways_raw)
+    n_rows = len(rows)
+
+    # Column indices of distinct reactions.
+    steps = list(it.chain.from_iterable(rows))
+    reaction_ids = list(dict.fromkeys(steps))
+    reaction_index = {reaction: i for i, reaction in enumerate(reaction_ids)}
+    if isinstance(context, contexts.CompactContext):
+        # Compounds are counted by their integers, not ID strings.
+        reactants = [(context.substrates.row(reaction),
+                      context.products.row(reaction))
+                     for reaction in reaction_ids]
+    else:
+        stoichiometrics = context['stoichiometrics']
+        reactants = [stoichiometrics[reaction] for reaction in reaction_ids]
+    compound_index = {}
+    substrates = []
+    products = []
+    for reaction_substrates, reaction_products in reactants:
+        substrates.append([
+            compound_index.setdefault(compound, len(compound_index))
+            for compound in reaction_substrates])
+        products.append([
+            compound_index.setdefault(compound, len(compound_index))
+            for compound in reaction_products])
+    compounds = [s + p for s, p in zip(substrates, products)]
+    occurrences = np.fromiter(map(reaction_index.__getitem__, steps),
+                              np.int64, len(steps))
+    row_indices = np.repeat(np.arange(n_rows),
+                            [len(row) for row in rows]).astype(np.int64)
+
+    similarities = []
+    for columns, n_columns in [
+            (substrates, len(compound_index)),
+            (products, len(compound_index)),
+            (compounds, len(compound_index)),
+            ([[i] for i in range(len(reaction_ids))], len(reaction_ids)),
+            ]:
+        codes = pw.incidence_codes(columns, occurrences, row_indices,
+                                   max(n_columns, 1))
+        similarities.append(_jaccard(codes, n_pathways, n_rows,
+                                     max(n_columns, 1)).tolist())
+    s_s, s_p, s_m, s_r = similarities
+
+    comparisons = []
+    for j in range(len(references)):
+        comparisons.append([
+            Pathway(reactions, score, s_s[i][j], s_p[i][j], s_m[i][j],
+                    s_r[i][j])
+            for i, (score, reactions) in enumerate(pathways_raw)])
+    return comparisons
+
+
+def _jaccard(codes, n_pathways, n_rows, n_columns):
+    """
+    Return Jaccard similarities of pathway rows and reference rows.
+
+    """
+    rows, columns = np.divmod(codes, n_columns)
+    sizes = np.bincount(rows, minlength=n_rows)
+    is_reference = rows >= n_pathways
+    # Only columns of references matter for intersections.
+    universe = np.unique(columns[is_reference])
+    in_universe = np.isin(columns, universe)
+    positions = np.searchsorted(universe, columns[in_universe])
+    matrix = np.zeros((n_rows, len(universe)), np.int64)
+    matrix[rows[in_universe], positions] = 1
+    intersections = matrix[:n_pathways] @ matrix[n_pathways:].T
+    unions = (sizes[:n_pathways, None] + sizes[None, n_pathways:]
+              - intersections)
+    if not unions.all():
+        raise ZeroDivisionError('division by zero')
+    return intersections / unions
 
 
 def initialize_chebi(rhea_chebis=set()):
@@ -154,6 +305,66 @@ def initialize_chebi(rhea_chebis=set()):
     return data
 
 
+def initialize_context(compact=False):
+    """
+    Load data context and reaction graph from JSON and snapshot files.
+
+    Only the data the graph is built from is loaded. Other data and
+    graph indices are loaded or derived on first access, so that
+    queries load only the data they use.
+
+    Parameters
+    ----------
+    compact : bool
+        If True, reaction and compound data are loaded at once to a
+        contexts.CompactContext of integer ID arrays. Default False.
+
+    Returns
+    -------
+    tuple
+        [0] graphs.ReactionGraph, [1] contexts.LazyContext or
+        contexts.CompactContext of data with graph indices. See
+        pw.evaluate_input.
+
+    """
+    context = contexts.LazyContext(
+        {'ignored': chebi.IGNORED_COMPOUNDS},
+        {key: (paths.JSON, filename)
+         for key, filename in _CONTEXT_FILES.items()})
+    S = context['stoichiometrics']
+    mol_rxns = context['compound_reactions']
+    version = _version_graph(S, mol_rxns)
+    try:
+        G = graphs.load_snapshot(paths.JSON, files.RXN_GRAPH, version)
+    except (FileNotFoundError, ValueError):
+        G = pw.initialize_graph(S, mol_rxns, set(), chebi.IGNORED_COMPOUNDS)
+    if compact:
+        context = contexts.CompactContext(context)
+    context.derive('landmarks', _load_landmarks, G, version)
+    context.derive('reachability', graphs.initialize_reachability, G)
+    context.derive('bitsets', pw.initialize_bitsets, context)
+    return G, context
+
+
+def _load_landmarks(G, version):
+    """
+    Return graphs.LandmarkIndex of landmark file, or None if missing.
+
+    An index of other data than version is treated as missing, so that
+    stale distances don't give wrong bounds.
+
+    """
+    try:
+        landmarks = files.get_json(paths.JSON, files.RXN_LANDMARKS)
+    except FileNotFoundError:
+        return None
+    try:
+        return graphs.load_landmarks(G, landmarks, version)
+    except ValueError as error:
+        print('LANDMARKS: {}, index not used'.format(error))
+        return None
+
+
 def initialize_intenz(rhea_ecs=set()):
     """
     Read and process IntEnz enzyme.dat file to JSON files.
@@ -181,6 +392,38 @@ def initialize_intenz(rhea_ecs=set()):
     return data
 
 
+def initialize_landmarks(n=16):
+    """
+    Build landmark distance index of the reaction graph.
+
+    Parameters
+    ----------
+    n : int
+        The amount of landmark reactions.
+
+    Returns
+    -------
+    list
+        Dicts of landmark data.
+
+    See also
+    --------
+    graphs.initialize_landmarks
+
+    """
+    stoichiometrics = files.get_json(paths.JSON, files.RXN_STOICHIOMETRICS)
+    compound_reactions = files.get_json(paths.JSON, files.MOL_REACTIONS)
+    graph = pw.initialize_graph(stoichiometrics, compound_reactions, set(),
+                                chebi.IGNORED_COMPOUNDS)
+    landmarks = graphs.initialize_landmarks(graph, n=n)
+    version = _version_graph(stoichiometrics, compound_reactions)
+    data = [
+        graphs.dump_landmarks(graph, landmarks, version),
+        ]
+    files.write_json(data[0], paths.JSON, files.RXN_LANDMARKS)
+    return data
+
+
 def initialize_market():
     """
     Evaluate demands, prices and complexities.
@@ -244,7 +487,7 @@ def initialize_market():
     return data
 
 
-def initialize_rhea(chebi_parents={}):
+def initialize_rhea(chebi_parents={}, processes=None):
     """
     Convert Rhea rd files to JSON formatted files for analysis.
 
@@ -252,6 +495,10 @@ def initialize_rhea(chebi_parents={}):
     ----------
     chebi_parents : dict
         Mapping from ChEBI ID strings to ChEBI parent ID strings.
+    processes : int
+        The amount of worker processes to parse rd files in parallel,
+        see rhea.read_rd_files. Default None, in which case files are
+        parsed in this process.
 
     Returns
     -------
@@ -263,9 +510,8 @@ def initialize_rhea(chebi_parents={}):
     rd_filenames = paths.get_names(paths.RHEA_RD)
 
     # Extract data from rd files.
-    rds_raw = files.get_contents(paths.RHEA_RD, rd_filenames)
-    rds_parsed = (files.parse_rd(rd) for rd in rds_raw)
-    data_rhea = rhea.read_rd_data(rds_parsed, chebi_parents)
+    data_rhea = rhea.read_rd_files(paths.RHEA_RD, rd_filenames,
+                                   chebi_parents, processes)
     mol_rxns, rxn_equats, rxn_master, rxn_stoich = data_rhea
     master_rxn = rhea.crosslink_master_ids(rxn_master)
 
@@ -292,10 +538,45 @@ def initialize_rhea(chebi_parents={}):
     return data
 
 
+def initialize_snapshot():
+    """
+    Build reaction graph and save to snapshot file.
+
+    The snapshot is versioned by the data it's built from, so main
+    rebuilds the graph instead of loading a stale snapshot.
+
+    Returns
+    -------
+    graphs.ReactionGraph
+
+    See also
+    --------
+    graphs.save_snapshot
+
+    """
+    stoichiometrics = files.get_json(paths.JSON, files.RXN_STOICHIOMETRICS)
+    compound_reactions = files.get_json(paths.JSON, files.MOL_REACTIONS)
+    graph = pw.initialize_graph(stoichiometrics, compound_reactions, set(),
+                                chebi.IGNORED_COMPOUNDS)
+    version = _version_graph(stoichiometrics, compound_reactions)
+    graphs.save_snapshot(graph, paths.JSON, files.RXN_GRAPH, version)
+    return graph
+
+
+def _version_graph(stoichiometrics, compound_reactions):
+    return caches.version_context({
+        'compound_reactions': compound_reactions,
+        'ignored': chebi.IGNORED_COMPOUNDS,
+        'stoichiometrics': stoichiometrics,
+        })
+
+
 def main():
     """
     Define data context, run analysis and save results.
 
+    Runs the benchmark scenarios named in MAIN_SCENARIOS.
+
     Parameters
     ----------
     None
@@ -307,94 +588,57 @@ def main():
 
     See also
     --------
-    run_analysis, show_results
+    initialize_context, run_analysis, show_results
 
     """
-    # Define context.
-    context = {
-        'ec_reactions': files.get_json(paths.JSON, files.ENZ_REACTIONS),
-        'compound_reactions': files.get_json(paths.JSON, files.MOL_REACTIONS),
-        'complexities': files.get_json(paths.JSON, files.RXN_COMPLEXITIES),
-        'demands': files.get_json(paths.JSON, files.MOL_DEMANDS),
-        'equations': files.get_json(paths.JSON, files.RXN_EQUATIONS),
-        'ignored': chebi.IGNORED_COMPOUNDS,
-        'prices': files.get_json(paths.JSON, files.MOL_PRICES),
-        'reaction_ecs': files.get_json(paths.JSON, files.RXN_ECS),
-        'stoichiometrics': files.get_json(paths.JSON,
-                                          files.RXN_STOICHIOMETRICS),
-        }
-    S = context['stoichiometrics']
-    mol_rxns = context['compound_reactions']
-    G = pw.initialize_graph(S, mol_rxns, set(), chebi.IGNORED_COMPOUNDS)
-
-    # Define reference pathways.
-    ref_eth = ['45485', '25292']
-    ref_iso = ['10189', '15991', '17066', '16342', '23733', '23285', '13370']
+    G, context = initialize_context()
+    context['cache'] = caches.QueryCache(context, path=paths.CACHE)
+    data = files.get_json(paths.BENCHMARKS, files.BENCHMARK_SCENARIOS)
+    scenarios = files.parse_scenarios(data, MAIN_SCENARIOS)
 
     # Obtain results.
-    start = 5
-    stop = 6
-    Cs_eth = [
-        [],
-#        ['any', '16236'],
-#        ['15361', 'any'],
-        ['15361', '16236'],
-#        ['any', '15343', '16236'],
-#        ['15361', '15343', 'any'],
-        ['15361', '15343', '16236'],
-        ]
-    Es_eth = [
-        [],
-        ['4.1.1.1'],
-        ['1.1.1.1'],
-        ['4.1.1.1', '1.1.1.1'],
-        ]
-    Cs_iso = [
-        [],
-#        ['any', '35194'],
-#        ['57286', 'any'],
-        ['57286', '35194'],
-        ['57286', '43074', '35194'],
-        ['57286', '57623', '35194'],
-#        ['any', '43074', '35194'],
-#        ['any', '57623', '35194'],
-#        ['any', '58146', '57557', '35194'],
-#        ['57286', '57623', 'any'],
-#        ['57286', '43074', 'any'],
-#        ['57286', '58146', '57557', 'any'],
-#        ['57286', '43074', '36464', '58146', '57557', '128769', '57623', '35194'],
-        ]
-    Es_iso = [
-        [],
-        ['2.3.3.10'],
-        ['4.2.3.27'],
-        ['2.3.3.10', '4.2.3.27'],
-        ['2.3.3.10', '5.3.3.2', '4.2.3.27'],
-        ['2.3.3.10', '1.1.1.34', '4.2.3.27'],
-#        ['2.3.3.10', '4.1.1.33', '5.3.3.2', '4.2.3.27'],
-#        ['2.3.3.10', '2.7.4.2', '4.1.1.33', '5.3.3.2', '4.2.3.27'],
-#        ['2.3.3.10', '2.7.1.36', '2.7.4.2', '4.1.1.33', '5.3.3.2', '4.2.3.27'],
-#        ['2.3.3.10', '1.1.1.34', '2.7.1.36', '2.7.4.2', '4.1.1.33', '5.3.3.2', '4.2.3.27'],
-#        ['2.3.3.10', '1.1.1.34', '2.7.1.36', '4.2.3.27'],
-#        ['2.3.3.10', '1.1.1.34', '2.7.1.36', '2.7.4.2', '4.2.3.27'],
-#        ['2.3.3.10', '1.1.1.34', '2.7.1.36', '2.7.4.2', '4.1.1.33', '4.2.3.27'],
-#        ['2.3.3.10', '1.1.1.34', '2.7.1.36', '2.7.4.2', '4.1.1.33', '5.3.3.2', '4.2.3.27'],
-        ]
-    results_eth = run_analysis(G, start, stop, Cs_eth, Es_eth, ref_eth,
-                               context)
-    results_iso = run_analysis(G, start, stop, Cs_iso, Es_iso, ref_iso,
-                               context)
-
-    return show_results([results_eth, results_iso], ['ETH', 'ISO'], context)
-
-
-def run_analysis(G, n_start, n_stop, Cs, Es, reference, context):
+    results = [
+        sweep_analysis(G, scenario.n_start, scenario.n_stop,
+                       scenario.compounds, scenario.enzymes,
+                       scenario.reference, context)
+        for scenario in scenarios]
+    return show_results(results, MAIN_SCENARIOS, context)
+
+
+def _analyze(G, C, ns, Es, reference, context):
+    raws = pw.evaluate_inputs(ns, G, C, Es, context)
+    # Compare to reference.
+    return [[compare_pathways(raw, reference, context) for raw in row]
+            for row in raws]
+
+
+def _analyze_worker(C, ns, Es):
+    return _analyze(_WORKER['G'], C, ns, Es, _WORKER['reference'],
+                    _WORKER['context'])
+
+
+def _initialize_worker(G, reference, context):
+    _WORKER['G'] = G
+    _WORKER['reference'] = reference
+    _WORKER['context'] = context
+
+
+def run_analysis(
+        G,
+        n_start,
+        n_stop,
+        Cs,
+        Es,
+        reference,
+        context,
+        processes=None,
+        ):
     """
     Run analysis with given parameters.
 
     Parameters
     ----------
-    G : networkx.DiGraph
+    G : graphs.ReactionGraph
         Reaction node graph.
     n_start : integer
         The max results range start value.
@@ -408,6 +652,9 @@ def run_analysis(G, n_start, n_stop, Cs, Es, reference, context):
         Reference pathway.
     context : dict
         Data context.
+    processes : int
+        The amount of worker processes, see sweep_analysis. Default
+        None.
 
     Returns
     -------
@@ -416,77 +663,242 @@ def run_analysis(G, n_start, n_stop, Cs, Es, reference, context):
 
     See also
     --------
-    main, show_results
+    main, show_results, sweep_analysis
 
     """
-    Parameters = namedtuple('Parameters', ['n', 'C', 'E'])
-    Result = namedtuple('Result', ['pathways', 'parameters'])
-    results = []
-    for n in range(n_start, n_stop):
-        for C in Cs:
-            for E in Es:
-                parameters = Parameters(n, C, E)
-                raw = pw.evaluate_input(n, G, C, E, context)
-                # Compare to reference and save results.
-                pathways = compare_pathways(raw, reference, context)
-                results.append(Result(pathways, parameters))
-    return results
+    return list(sweep_analysis(G, n_start, n_stop, Cs, Es, reference,
+                               context, processes))
+
+
+def run_benchmarks(names=None, filename=files.BENCHMARK_REPORT, **options):
+    """
+    Run benchmark scenarios and save a report.
+
+    Scenarios are read from the scenario file in paths.BENCHMARKS and
+    the report is written to the same directory. Query results are not
+    cached.
+
+    Parameters
+    ----------
+    names : iterable
+        Names of scenarios to run. Default None, in which case all
+        scenarios are run.
+    filename : string
+        Name of the report JSON file.
+    options
+        Keyword arguments k, constrained and weighted of
+        pw.evaluate_input.
+
+    Returns
+    -------
+    dict
+        Report with keys version, created, options and scenarios, see
+        run_scenario.
+
+    """
+    data = files.get_json(paths.BENCHMARKS, files.BENCHMARK_SCENARIOS)
+    scenarios = files.parse_scenarios(data, names)
+    start = time.perf_counter()
+    G, context = initialize_context()
+    report = {
+        'version': caches.version_context(context),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'options': options,
+        'load': time.perf_counter() - start,
+        'scenarios': [run_scenario(G, scenario, context, **options)
+                      for scenario in scenarios],
+        }
+    files.write_json(report, paths.BENCHMARKS, filename)
+    return report
+
+
+def run_scenario(G, scenario, context, **options):
+    """
+    Run a benchmark scenario and return its report.
+
+    Every query of the scenario grid is timed per stage: search, filter
+    and score of pw.evaluate_input and compare of compare_pathways.
+
+    Parameters
+    ----------
+    G : graphs.ReactionGraph
+        Reaction node graph.
+    scenario : files.Scenario
+        Scenario to run.
+    context : dict
+        Data context.
+    options
+        Keyword arguments of pw.evaluate_input.
+
+    Returns
+    -------
+    dict
+        Keys name, latency, stages and queries. Queries are dicts of
+        parameters n, C and E, latency, stages, the amount of pathways
+        and the mean and best compound and reaction similarities.
+
+    """
+    queries = []
+    stages_all = dict.fromkeys(_STAGES, 0.0)
+    for n in range(scenario.n_start, scenario.n_stop):
+        for C in scenario.compounds:
+            for E in scenario.enzymes:
+                stages = dict.fromkeys(_STAGES, 0.0)
+                start = time.perf_counter()
+                raw = pw.evaluate_input(n, G, C, E, context,
+                                        timings=stages, **options)
+                compare_start = time.perf_counter()
+                pathways = compare_pathways(raw, scenario.reference,
+                                            context)
+                stop = time.perf_counter()
+                stages['compare'] = stop - compare_start
+                s_mols = [pathway.s_mol for pathway in pathways]
+                s_rxns = [pathway.s_rxn for pathway in pathways]
+                queries.append({
+                    'n': n,
+                    'C': C,
+                    'E': E,
+                    'latency': stop - start,
+                    'stages': stages,
+                    'pathways': len(pathways),
+                    'mean_s_mol': sum(s_mols) / len(s_mols) if s_mols else 0,
+                    'mean_s_rxn': sum(s_rxns) / len(s_rxns) if s_rxns else 0,
+                    'best_s_mol': max(s_mols, default=0),
+                    'best_s_rxn': max(s_rxns, default=0),
+                    })
+                for stage in _STAGES:
+                    stages_all[stage] += stages[stage]
+    return {
+        'name': scenario.name,
+        'latency': sum(query['latency'] for query in queries),
+        'stages': stages_all,
+        'queries': queries,
+        }
 
 
 def show_results(results, names, context):
     """
     Print and save analysis results.
 
+    Results are written as they are read, so results may be generators
+    of a running analysis, see sweep_analysis. Besides the text files,
+    all pathways are appended to columnar files, see records.
+
     Parameters
     ----------
-    results : list of collections.namedtuple
-        Attributes pathways and parameters.
+    results : iterable of iterables of collections.namedtuple
+        Result collections.namedtuples of analyses.
+    names : list
+        Names of analyses.
+    context : dict
+        Data context, must contain equations.
 
     Returns
     -------
-    list of collections.namedtuple
-        Result collections.namedtuples, that score above a treshold
-        value.
+    list
+        Lists of parameters, name, mean compound and mean reaction
+        similarity of results with pathways.
 
     See also
     --------
-    main, run_analysis
+    main, run_analysis, records.read_index
 
     """
     pw_entries = ['score', 's_s', 's_p', 's_mol', 's_rxn']
     results_best = []
-    with open('results_table.txt', mode='w') as file:
+    with open('results_table.txt', mode='w') as file_table, \
+            open('results_all.txt', mode='w') as file, \
+            records.ResultWriter() as writer:
         for result, name in zip(results, names):
             for pathways, parameters in result:
-                s_mols = []
-                s_rxns = []
+                writer.write(name, parameters, pathways)
                 n = len(pathways)
+                if n == 0:
+                    continue
+                mean_mols = sum([pathway.s_mol for pathway in pathways]) / n
+                mean_rxns = sum([pathway.s_rxn for pathway in pathways]) / n
+                print('{} & {} & '.format(', '.join(parameters.C),
+                                          ', '.join(parameters.E)), end='',
+                      file=file_table)
+                print('{} & {} \\\\'.format(mean_mols, mean_rxns),
+                      file=file_table)
+                results_best.append([parameters, name, mean_mols,
+                                     mean_rxns])
+                print(name, parameters, file=file)
+                print(name, mean_mols, mean_rxns, file=file)
+                print(file=file)
                 for pathway in pathways:
-                    s_mols.append(pathway.s_mol)
-                    s_rxns.append(pathway.s_rxn)
-                if n > 0:
-                    mean_mols = sum(s_mols) / n
-                    mean_rxns = sum(s_rxns) / n
-                    print('{} & {} & '.format(', '.join(parameters.C),
-                                              ', '.join(parameters.E)), end='',
-                          file=file)
-                    print('{} & {} \\\\'.format(mean_mols, mean_rxns),
-                          file=file)
-                    results_best.append([parameters, pathways, name,
-                                         mean_mols, mean_rxns])
-    with open('results_all.txt', mode='w') as file:
-        for parameters, pathways, name, mean_mols, mean_rxns in results_best:
-            if len(pathways) == 0:
-                continue
-            print(name, parameters, file=file)
-            print(name, mean_mols, mean_rxns, file=file)
-            print(file=file)
-            for pathway in pathways:
-                print(pathway, file=file)
-                for rxn in pathway.path:
-                    print(rxn, context['equations'][rxn], file=file)
-                for value, key in zip(pathway[1:], pw_entries):
-                    print(key, value, file=file)
+                    print(pathway, file=file)
+                    for rxn in pathway.path:
+                        print(rxn, context['equations'][rxn], file=file)
+                    for value, key in zip(pathway[1:], pw_entries):
+                        print(key, value, file=file)
+                    print(file=file)
                 print(file=file)
-            print(file=file)
     return results_best
+
+
+def sweep_analysis(
+        G,
+        n_start,
+        n_stop,
+        Cs,
+        Es,
+        reference,
+        context,
+        processes=None,
+        ):
+    """
+    Yield analysis results of a parameter grid.
+
+    Parameters are swept in the order C, n, E, and results are yielded
+    in the same order. Searches are shared by all n and E of a C, see
+    pw.evaluate_inputs, so the unit of work is a compounds list, and
+    results of a C are released before the next C is analyzed. With
+    worker processes results equal those of a serial sweep.
+
+    Parameters
+    ----------
+    G, n_start, n_stop, Cs, Es, reference, context
+        See run_analysis.
+    processes : int
+        The amount of worker processes to run analyses in parallel.
+        Workers share graph and context when forked. Default None, in
+        which case analyses are run in this process.
+
+    Yields
+    ------
+    Result
+
+    See also
+    --------
+    run_analysis
+
+    """
+    ns = list(range(n_start, n_stop))
+    if not ns:
+        return
+    executor = None
+    if processes is None or processes < 2:
+        analyses = (_analyze(G, C, ns, Es, reference, context) for C in Cs)
+    else:
+        if 'fork' in mp.get_all_start_methods():
+            mp_context = mp.get_context('fork')
+        else:
+            mp_context = None
+        executor = cf.ProcessPoolExecutor(
+            processes, mp_context, _initialize_worker,
+            (G, reference, context))
+        analyses = executor.map(_analyze_worker, Cs, it.repeat(ns),
+                                it.repeat(Es))
+    try:
+        # Pathways of a C are indexed by n and E, and released before
+        # the next C is analyzed.
+        for C, analysis in zip(Cs, analyses):
+            for n, row in zip(ns, analysis):
+                for E, pathways in zip(Es, row):
+                    yield Result(pathways, Parameters(n, C, E))
+            analysis = row = pathways = None
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Benchmark pathway query functions on synthetic data.
+
+The suite runs offline on data of synthetic.generate_context, so the
+same seed always gives the same graphs and queries. Functions of the
+query path are timed per graph size and query shape, and the report
+can be compared against a stored baseline report to find regressions.
+
+Functions
+---------
+compare_reports
+    Return timings of a report slower than in a baseline report.
+run_benchmarks
+    Run the benchmark suite, save its report and compare to baseline.
+run_size
+    Return timings of one synthetic graph size.
+run_suite
+    Run the benchmark suite and return its report.
+
+Constants
+---------
+FUNCTIONS
+    Names of the timed functions.
+SHAPES
+    Names of the query shapes.
+SIZES
+    Default amounts of synthetic master reactions.
+
+"""
+
+
+import itertools as it
+import os
+import platform
+import random
+import time
+
+import files
+import paths
+import pw
+import synthetic
+
+
+FUNCTIONS = (
+    'initialize_graph',
+    'find_pathway',
+    'filter_pathways',
+    'evaluate_pathway',
+    'nbest_items',
+    'find_pathways',
+    'find_pathways_constrained',
+    )
+SHAPES = ('pair', 'enzymes', 'any_start', 'any_goal')
+SIZES = (2000, 5000, 10000)
+
+# The maximum amount of candidate pathways per query.
+_CANDIDATES = 10000
+
+# The maximum amount of source or target reactions per find_pathway query.
+_ENDPOINTS = 2
+
+# Share of most used compounds excluded from query compounds.
+_HUB_SHARE = 0.05
+
+
+def compare_reports(report, baseline, tolerance=0.25):
+    """
+    Return timings of a report slower than in a baseline report.
+
+    Parameters
+    ----------
+    report, baseline : dict
+        Reports of run_suite.
+    tolerance : float
+        Allowed relative slowdown. Default 0.25, in which case timings
+        over 1.25 times the baseline are returned.
+
+    Returns
+    -------
+    list
+        Dicts with keys size, function, shape, baseline, seconds and
+        ratio. Timings missing from baseline are not compared.
+
+    """
+    baselines = {_key(timing): timing['seconds']
+                 for timing in baseline['timings']}
+    regressions = []
+    for timing in report['timings']:
+        seconds_baseline = baselines.get(_key(timing))
+        if not seconds_baseline:
+            continue
+        ratio = timing['seconds'] / seconds_baseline
+        if ratio > 1 + tolerance:
+            regressions.append(dict(
+                timing, baseline=seconds_baseline, ratio=ratio))
+    return regressions
+
+
+def _best(repeat, function, *args):
+    """
+    Return the least seconds of repeated calls and the last result.
+
+    """
+    seconds = float('inf')
+    for __ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        seconds = min(seconds, time.perf_counter() - start)
+    return seconds, result
+
+
+def _key(timing):
+    return timing['size'], timing['function'], timing['shape']
+
+
+def _queries(context, n_queries, rng):
+    """
+    Return dict of shape keys and compound and enzyme list pair values.
+
+    """
+    compound_reactions = context['compound_reactions']
+    compounds = sorted(
+        (compound for compound, (consumers, producers)
+         in compound_reactions.items()
+         if consumers and producers and compound not in context['ignored']),
+        key=lambda compound: (-sum(map(len, compound_reactions[compound])),
+                              compound))
+    compounds = compounds[int(len(compounds) * _HUB_SHARE):]
+    enzymes = sorted(context['ec_reactions'])
+    queries = {shape: [] for shape in SHAPES}
+    for __ in range(n_queries):
+        start, goal = rng.sample(compounds, 2)
+        queries['pair'].append(([start, goal], []))
+        queries['enzymes'].append(([], rng.sample(enzymes, 2)))
+        queries['any_start'].append((['any', goal], []))
+        queries['any_goal'].append(([start, 'any'], []))
+    return queries
+
+
+def run_benchmarks(
+        filename=files.BENCHMARK_MICRO,
+        baseline=files.BENCHMARK_BASELINE,
+        tolerance=0.25,
+        **options
+        ):
+    """
+    Run the benchmark suite, save its report and compare to baseline.
+
+    Reports are read from and written to paths.BENCHMARKS. To make a
+    report the new baseline, copy it to the baseline file.
+
+    Parameters
+    ----------
+    filename : string
+        Name of the report JSON file.
+    baseline : string
+        Name of the baseline report JSON file. If the file doesn't
+        exist, nothing is compared.
+    tolerance : float
+        Allowed relative slowdown, see compare_reports.
+    options
+        Keyword arguments of run_suite.
+
+    Returns
+    -------
+    dict
+        Report of run_suite with key regressions, see compare_reports.
+
+    """
+    report = run_suite(**options)
+    if os.path.isfile(os.path.join(paths.BENCHMARKS, baseline)):
+        report['regressions'] = compare_reports(
+            report, files.get_json(paths.BENCHMARKS, baseline), tolerance)
+    else:
+        report['regressions'] = []
+    files.write_json(report, paths.BENCHMARKS, filename)
+    return report
+
+
+def run_size(size, seed=0, n_queries=4, repeat=3, n=10):
+    """
+    Return timings of one synthetic graph size.
+
+    Parameters
+    ----------
+    size : int
+        The amount of synthetic master reactions.
+    seed, n_queries, repeat, n
+        See run_suite.
+
+    Returns
+    -------
+    list
+        Timing dicts with keys size, function, shape, seconds and
+        calls. Shape of initialize_graph is None.
+
+    """
+    context = synthetic.generate_context(size, seed=seed)
+    seconds, graph = _best(
+        repeat, pw.initialize_graph, context['stoichiometrics'],
+        context['compound_reactions'], set(), context['ignored'])
+    timings = [_timing(size, 'initialize_graph', None, seconds, 1)]
+    context['bitsets'] = pw.initialize_bitsets(context)
+    queries = _queries(context, n_queries, random.Random(seed))
+    for shape in SHAPES:
+        seconds = dict.fromkeys(FUNCTIONS[1:], 0.0)
+        calls = dict.fromkeys(FUNCTIONS[1:], 0)
+        for compounds, enzymes in queries[shape]:
+            start, goal, compounds, sources, targets = pw._query_endpoints(
+                compounds, enzymes, context)
+            for source, target in it.product(sources[:_ENDPOINTS],
+                                             targets[:_ENDPOINTS]):
+                seconds_pair, __ = _best(
+                    repeat, _find_pathway, graph, source, target)
+                seconds['find_pathway'] += seconds_pair
+                calls['find_pathway'] += 1
+            candidates = list(it.islice(
+                pw.find_pathways(graph, sources, targets), _CANDIDATES))
+            seconds_query, pathways = _best(
+                repeat, _filter_pathways, candidates, start, goal,
+                compounds, enzymes, context)
+            seconds['filter_pathways'] += seconds_query
+            calls['filter_pathways'] += len(candidates)
+            seconds_query, values = _best(
+                repeat, _evaluate_pathway, pathways, context)
+            seconds['evaluate_pathway'] += seconds_query
+            calls['evaluate_pathway'] += len(pathways)
+            seconds_query, __ = _best(
+                repeat, pw.nbest_items, n, values, pathways)
+            seconds['nbest_items'] += seconds_query
+            calls['nbest_items'] += len(pathways)
+            seconds_query, __ = _best(
+                repeat, _find_pathways, graph, sources, targets, start,
+                goal, compounds, enzymes, context)
+            seconds['find_pathways'] += seconds_query
+            calls['find_pathways'] += 1
+            seconds_query, __ = _best(
+                repeat, _find_pathways_constrained, graph, sources, targets,
+                start, goal, context)
+            seconds['find_pathways_constrained'] += seconds_query
+            calls['find_pathways_constrained'] += 1
+        timings.extend(
+            _timing(size, function, shape, seconds[function],
+                    calls[function])
+            for function in FUNCTIONS[1:])
+    return timings
+
+
+def _evaluate_pathway(pathways, context):
+    return [pw.evaluate_pathway(pathway, context) for pathway in pathways]
+
+
+def _filter_pathways(pathways, start, goal, compounds, enzymes, context):
+    return list(pw.filter_pathways(pathways, start, goal, compounds,
+                                   enzymes, context))
+
+
+def _find_pathway(graph, source, target):
+    return list(pw.find_pathway(graph, source, target))
+
+
+def _find_pathways(graph, sources, targets, start, goal, compounds, enzymes,
+                   context):
+    # Searches and filters as an unconstrained query.
+    pathways = it.islice(pw.find_pathways(graph, sources, targets),
+                         _CANDIDATES)
+    return list(pw.filter_pathways(pathways, start, goal, compounds,
+                                   enzymes, context))
+
+
+def _find_pathways_constrained(graph, sources, targets, start, goal,
+                               context):
+    # Searches as a constrained query, with the rules of filter_pathways.
+    constraints = pw.initialize_constraints(graph, start, goal, context)
+    return list(it.islice(pw.find_pathways(graph, sources, targets, 1,
+                                           constraints), _CANDIDATES))
+
+
+def run_suite(sizes=SIZES, seed=0, n_queries=4, repeat=3, n=10):
+    """
+    Run the benchmark suite and return its report.
+
+    For every size, initialize_graph is timed on synthetic data and
+    the other functions on queries of every shape: a compound pair,
+    an enzyme set, and a compound pair with any start or goal.
+    find_pathway is timed on up to two source and target reactions
+    per query, filter_pathways on candidate pathways of
+    pw.find_pathways and evaluate_pathway and nbest_items on the
+    filtered pathways. Queries are also timed as a whole: find_pathways
+    as pw.find_pathways and filter_pathways, and
+    find_pathways_constrained as pw.find_pathways with the constraints
+    of pw.initialize_constraints, which apply the pathway rules of
+    filter_pathways during the search.
+
+    Parameters
+    ----------
+    sizes : iterable
+        Amounts of synthetic master reactions. Default SIZES.
+    seed : int
+        Seed of synthetic data and queries. Default 0.
+    n_queries : int
+        The amount of queries per shape. Default 4.
+    repeat : int
+        Every call is repeated and the least time kept. Default 3.
+    n : int
+        The amount of results of nbest_items. Default 10.
+
+    Returns
+    -------
+    dict
+        Keys created, python, seed, n_queries, repeat and timings,
+        see run_size.
+
+    """
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'seed': seed,
+        'n_queries': n_queries,
+        'repeat': repeat,
+        'timings': [timing for size in sizes
+                    for timing in run_size(size, seed, n_queries, repeat, n)],
+        }
+
+
+def _timing(size, function, shape, seconds, calls):
+    return {
+        'size': size,
+        'function': function,
+        'shape': shape,
+        'seconds': seconds,
+        'calls': calls,
+        }
@@ -7,6 +7,10 @@ Define directory paths used by PathWalue.
 
 Constants
 ---------
+BENCHMARKS
+    Directory path to benchmark scenario and report files.
+CACHE
+    Directory path to cached query results.
 CHEBI_TSV
     Directory path to ChEBI tsv files.
 INTENZ_DAT
@@ -49,6 +53,8 @@ _CHEBI = os.path.join(_DATA, 'chebi')
 _INTENZ = os.path.join(_DATA, 'intenz')
 _RHEA = os.path.join(_DATA, 'rhea')
 
+BENCHMARKS = os.path.join(_BASE, 'benchmarks')
+CACHE = os.path.join(_DATA, 'cache')
 CHEBI_TSV = os.path.join(_CHEBI, _TSV)
 INTENZ_DAT = os.path.join(_INTENZ, _DAT)
 JS = os.path.join(_DATA, _JS)
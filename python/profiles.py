@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Profile pathway queries stage by stage.
+
+A QueryProfile in key profile of a data context makes pw.evaluate_input
+record wall time, the amounts of pathways and search nodes and filter
+rejections per rule of its stages. Queries of a context without a
+profile aren't instrumented. If a latency threshold is set, queries are
+run under cProfile and the statistics of queries slower than the
+threshold are kept and optionally dumped to pstats files.
+
+Classes
+-------
+QueryProfile
+    Collector of query statistics.
+QueryStats
+    Statistics of one query.
+
+Functions
+---------
+profiling
+    Context manager profiling queries of a data context.
+
+"""
+
+
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import time
+
+
+# The amount of functions in summaries of slow queries.
+_SUMMARY_LINES = 20
+
+
+class QueryStats:
+    """
+    Statistics of one pw.evaluate_input query.
+
+    Attributes
+    ----------
+    key : tuple
+        Query key, see caches.query_key.
+    latency : float
+        Seconds spent in the query.
+    cached : bool
+        True if results were returned from the cache.
+    seconds : dict
+        Seconds spent in stages search, filter, score and select.
+    items : dict
+        The amounts of pathways yielded by stages search, filter and
+        score and results of select, and the amount of nodes expanded
+        by breadth-first searches in key expanded.
+    rejected : dict
+        The amounts of pathways rejected by filter rules source, target,
+        repeat, enzymes and compounds, see pw.filter_pathways.
+
+    """
+
+    __slots__ = ('key', 'latency', 'cached', 'seconds', 'items',
+                 'rejected')
+
+    def __init__(self, key=None):
+        self.key = key
+        self.latency = 0.0
+        self.cached = False
+        self.seconds = {}
+        self.items = {}
+        self.rejected = {}
+
+    def add(self, stage, seconds, items=0):
+        """
+        Add seconds and items to a stage.
+
+        """
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        self.items[stage] = self.items.get(stage, 0) + items
+
+    def update(self, other):
+        """
+        Add statistics of another QueryStats.
+
+        """
+        self.latency += other.latency
+        self.cached = self.cached or other.cached
+        for totals, counts in [
+                (self.seconds, other.seconds),
+                (self.items, other.items),
+                (self.rejected, other.rejected),
+                ]:
+            for name, count in counts.items():
+                totals[name] = totals.get(name, 0) + count
+
+    def as_dict(self):
+        """
+        Return statistics as a JSON serializable dict.
+
+        """
+        return {
+            'key': self.key,
+            'latency': self.latency,
+            'cached': self.cached,
+            'seconds': dict(self.seconds),
+            'items': dict(self.items),
+            'rejected': dict(self.rejected),
+            }
+
+
+class QueryProfile:
+    """
+    Collector of pw.evaluate_input query statistics.
+
+    Statistics of all queries are summed to total. If threshold is
+    given, every query is run under cProfile and queries slower than
+    threshold are listed in slow.
+
+    Parameters
+    ----------
+    threshold : float
+        Latency in seconds, over which queries are kept in slow.
+        Default None, in which case queries aren't run under cProfile.
+    path : string
+        Directory path of pstats files of slow queries. Default None,
+        in which case no files are written.
+
+    Attributes
+    ----------
+    total : QueryStats
+        Sum of statistics of all queries.
+    n_queries : int
+        The amount of queries.
+    slow : list
+        Dicts of slow queries, with keys of QueryStats.as_dict and
+        keys summary, the cumulative time summary of cProfile, and
+        filename, the pstats file or None.
+
+    """
+
+    __slots__ = ('threshold', 'path', 'total', 'n_queries', 'slow')
+
+    def __init__(self, threshold=None, path=None):
+        self.threshold = threshold
+        self.path = path
+        self.total = QueryStats()
+        self.n_queries = 0
+        self.slow = []
+
+    @contextlib.contextmanager
+    def query(self, key=None):
+        """
+        Return context manager, which yields QueryStats of a query.
+
+        The statistics are added to the profile on exit.
+
+        """
+        stats = QueryStats(key)
+        profiler = None
+        if self.threshold is not None:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.latency = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            self.n_queries += 1
+            self.total.update(stats)
+            if profiler is not None and stats.latency > self.threshold:
+                self._keep(stats, profiler)
+
+    def _keep(self, stats, profiler):
+        stream = io.StringIO()
+        profile_stats = pstats.Stats(profiler, stream=stream)
+        profile_stats.sort_stats('cumulative').print_stats(_SUMMARY_LINES)
+        filename = None
+        if self.path is not None:
+            os.makedirs(self.path, exist_ok=True)
+            filename = os.path.join(
+                self.path, 'query_{}.prof'.format(len(self.slow)))
+            profile_stats.dump_stats(filename)
+        self.slow.append(dict(stats.as_dict(), summary=stream.getvalue(),
+                              filename=filename))
+
+    def report(self):
+        """
+        Return JSON serializable dict of the profile.
+
+        Keys are n_queries, total, see QueryStats.as_dict, and slow.
+
+        """
+        return {
+            'n_queries': self.n_queries,
+            'total': self.total.as_dict(),
+            'slow': list(self.slow),
+            }
+
+
+@contextlib.contextmanager
+def profiling(context, threshold=None, path=None):
+    """
+    Return context manager profiling queries of a data context.
+
+    A QueryProfile is set to key profile of context and removed on
+    exit.
+
+    Parameters
+    ----------
+    context : dict
+        Data context of pw.evaluate_input.
+    threshold, path
+        See QueryProfile.
+
+    Yields
+    ------
+    QueryProfile
+
+    """
+    profile = QueryProfile(threshold, path)
+    context['profile'] = profile
+    try:
+        yield profile
+    finally:
+        del context['profile']
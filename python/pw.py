@@ -4,33 +4,140 @@
 # Pauli Losoi
 """
 
+Classes
+-------
+Bitsets
+    collections.namedtuple for compound and EC indices of reactions.
+NBest
+    Streaming collector of n highest scored unique items.
+
 Functions
 ---------
 determine_intermediates
     Determine intermediates from reactants and products.
 evaluate_input
     Evaluate user input.
+evaluate_inputs
+    Evaluate user input with multiple result amounts and enzyme lists.
 evaluate_pathway
     Evaluate pathway score.
+evaluate_pathways
+    Evaluate scores of multiple pathways at once.
 filter_pathways
     Filter pathways.
 find_pathway
     Find pathway.
+find_pathways
+    Find pathways between multiple sources and targets.
+incidence_codes
+    Return sparse binary incidence matrix in coordinate form.
 intersect_dict
     Reduce dict to have only keys present in another iterable.
+initialize_bitsets
+    Initialize compound and EC indices of reactions.
+initialize_constraints
+    Initialize search constraints matching filter_pathways rules.
 initialize_graph
-    Initialize networkx.DiGraph for pathway analysis.
+    Initialize graphs.ReactionGraph for pathway analysis.
 nbest_items
     Return n highest scored items.
 """
 
 
 import collections as cl
+import concurrent.futures as cf
+import contextlib
 import itertools as it
 import heapq as hq  # find n max values from a list
 import math as m
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+import caches
+import contexts
+import graphs
+
+
+# Integer bitmasks of compounds and EC numbers. Key compounds maps ChEBI
+# ID strings and key enzymes EC number strings to single bit integers.
+# Key reactions maps Rhea ID strings to tuples of substrate, product,
+# not ignored substrate, not ignored product and EC bitmasks.
+Bitsets = cl.namedtuple('Bitsets', ['compounds', 'enzymes', 'reactions'])
+
+# The amount of pathways scored at once by evaluate_input.
+_BATCH_SIZE = 4096
+
+
+class NBest:
+    """
+    Streaming collector of n highest scored unique items.
+
+    Keeps at most n value-item -pairs in a heap. Pairs are ranked like
+    in nbest_items, by value and then by item. An item already held is
+    ignored, so items must be hashable and always have the same value.
+
+    Parameters
+    ----------
+    n : int
+        The amount of best value-item -pairs to be kept.
+
+    Raises
+    ------
+    TypeError
+        If n is non-numeric.
+    ValueError
+        If n is less than 1.
+
+    """
+
+    __slots__ = ('n', '_heap', '_items')
+
+    def __init__(self, n):
+        if not isinstance(n, (float, int)):
+            raise TypeError('n non-numeric')
+        elif n < 1:
+            raise ValueError('n less than 1')
+        self.n = n
+        self._heap = []
+        self._items = set()
 
-import networkx as nx
+    def __len__(self):
+        return len(self._heap)
+
+    def items(self):
+        """
+        Return list of value-item -pairs in descending order.
+
+        """
+        return sorted(self._heap, reverse=True)
+
+    def push(self, value, item):
+        """
+        Add value-item -pair if it's among the n best.
+
+        """
+        if item in self._items:
+            return
+        pair = (value, item)
+        heap = self._heap
+        if len(heap) < self.n:
+            hq.heappush(heap, pair)
+        elif pair > heap[0]:
+            __, removed = hq.heapreplace(heap, pair)
+            self._items.discard(removed)
+        else:
+            return
+        self._items.add(item)
+
+    def update(self, pairs):
+        """
+        Add value-item -pairs, see push.
+
+        """
+        for value, item in pairs:
+            self.push(value, item)
 
 
 def determine_intermediates(substrates, products):
@@ -59,7 +166,18 @@ def determine_intermediates(substrates, products):
     return intermediates
 
 
-def evaluate_input(n, graph, compounds=[], enzymes=[], context={}):
+def evaluate_input(
+        n,
+        graph,
+        compounds=[],
+        enzymes=[],
+        context={},
+        k=1,
+        constrained=False,
+        weighted=False,
+        processes=None,
+        timings=None,
+        ):
     """
     Evaluate user input.
 
@@ -67,7 +185,7 @@ def evaluate_input(n, graph, compounds=[], enzymes=[], context={}):
     ----------
     n : int
         The amount of results to be returned. Must be at least 1.
-    graph : networkx.DiGraph
+    graph : graphs.ReactionGraph
         Rhea reaction ID string nodes and compound edges.
     compounds : list or tuple
         ChEBI ID strings. Order matters.
@@ -76,7 +194,38 @@ def evaluate_input(n, graph, compounds=[], enzymes=[], context={}):
     context : dict
         Mappings from ID strings to data. Must have keys ec_reactions,
         compound_reactions, complexities, demands, prices,
-        reactions_ecs, stoichiometrics.
+        reactions_ecs, stoichiometrics. Optional keys landmarks and
+        reachability map to graphs.LandmarkIndex and
+        graphs.ReachabilityIndex of graph, used to skip source and
+        target pairs without pathways. Optional key cache maps to
+        caches.QueryCache of results, which graph must be derived
+        from the cached context. Optional key profile maps to
+        profiles.QueryProfile, which records statistics of the query
+        stages. With worker processes only seconds are recorded.
+    k : int
+        The maximum amount of pathways searched per source and target
+        reaction pair. Default 1.
+    constrained : bool
+        If true, apply the source, target and repeated compound rules of
+        filter_pathways already in search, see initialize_constraints.
+        Finds the shortest pathways passing the rules instead of
+        discarding shortest pathways that don't. Default False.
+    weighted : bool
+        If true, search lowest cost pathways instead of shortest, see
+        find_pathway. Landmarks in context guide the search. Default
+        False.
+    processes : int
+        The amount of worker processes to search pathways in parallel.
+        Workers inherit graph and context when forked. The worker pool
+        is reused by queries of the same graph and context objects, so
+        changes to context after the first query are not seen by the
+        workers. Results equal those of a search in this process.
+        Default None, in which case pathways are searched in this
+        process.
+    timings : dict
+        If given, seconds spent in stages search, filter and score are
+        added to keys of the same names. With worker processes search
+        includes filter. Default None.
 
     Returns
     -------
@@ -87,53 +236,238 @@ def evaluate_input(n, graph, compounds=[], enzymes=[], context={}):
     ------
     TypeError
         If `n` is not integer.
+    ValueError
+        If `n` is less than 1.
 
     """
     if not isinstance(n, int):
         raise TypeError('`n` not int')
+    profile = context.get('profile')
+    if profile is None:
+        return _evaluate_input(n, graph, compounds, enzymes, context, k,
+                               constrained, weighted, processes, timings)
+    key = caches.query_key(n, compounds, enzymes, k, constrained, weighted)
+    with profile.query(key) as stats:
+        results = _evaluate_input(n, graph, compounds, enzymes, context, k,
+                                  constrained, weighted, processes,
+                                  stats.seconds, stats)
+    if timings is not None:
+        for stage, seconds in stats.seconds.items():
+            # Selection is a part of score outside profiles.
+            if stage == 'select':
+                stage = 'score'
+            timings[stage] = timings.get(stage, 0.0) + seconds
+    return results
 
-    ec_reactions = context['ec_reactions']
-    compound_reactions = context['compound_reactions']
-    demands = context['demands']
-    prices = context['prices']
-    stoichiometrics = context['stoichiometrics']
 
-    pathways = set()
-    start = None
-    goal = None
-    sources = [None]
-    targets = [None]
-    # Determine search and filter parameters.
+def _evaluate_input(
+        n,
+        graph,
+        compounds,
+        enzymes,
+        context,
+        k,
+        constrained,
+        weighted,
+        processes,
+        timings,
+        stats=None,
+        ):
+    """
+    Return results of evaluate_input, adding to profiles.QueryStats.
+
+    """
+    cache = context.get('cache')
+    if cache is not None:
+        key = caches.query_key(n, compounds, enzymes, k, constrained,
+                               weighted)
+        results = cache.get(key)
+        if results is not None:
+            if stats is not None:
+                stats.cached = True
+            return list(results)
+
+    best = NBest(n)
+    pathways = _find_candidates(graph, compounds, enzymes, context, k,
+                                constrained, weighted, processes, timings,
+                                stats)
+
+    # Evaluate pathways in batches as they are found.
+    pathways = iter(pathways)
+    while True:
+        batch = list(dict.fromkeys(it.islice(pathways, _BATCH_SIZE)))
+        if not batch:
+            break
+        start = time.perf_counter()
+        values = evaluate_pathways(batch, context)
+        middle = time.perf_counter()
+        best.update(zip(values, batch))
+        if stats is not None:
+            stats.add('score', middle - start, len(batch))
+            stats.add('select', time.perf_counter() - middle)
+        elif timings is not None:
+            timings['score'] = (timings.get('score', 0.0)
+                                + time.perf_counter() - start)
+    results = best.items()
+    if stats is not None:
+        stats.items['select'] = len(results)
+    if cache is not None:
+        cache.put(key, results)
+    return results
+
+
+def evaluate_inputs(
+        ns,
+        graph,
+        compounds=[],
+        enzymes_grid=[[]],
+        context={},
+        k=1,
+        constrained=False,
+        weighted=False,
+        processes=None,
+        ):
+    """
+    Evaluate user input with multiple result amounts and enzyme lists.
+
+    Results equal those of evaluate_input for every n and enzymes, but
+    pathways are searched and scored only once when only the enzyme
+    filter differs, which is the case when compounds are given, and
+    only once per enzymes for all n.
+
+    Results are read from and written to a cache in context per n and
+    enzymes, and searches are skipped when all their results are
+    cached. A profile in context records a cached query per cached
+    result and a query per search, keyed by the largest n. Enzymes of
+    pathways are compared as integers of a contexts.CompactContext.
+
+    Parameters
+    ----------
+    ns : iterable
+        The amounts of results, see evaluate_input.
+    graph : graphs.ReactionGraph
+        Rhea reaction ID string nodes and compound edges.
+    compounds : list or tuple
+        ChEBI ID strings, see evaluate_input.
+    enzymes_grid : list
+        Lists or tuples of EC number strings, see evaluate_input.
+    context, k, constrained, weighted, processes
+        See evaluate_input.
+
+    Returns
+    -------
+    list
+        Lists of results, list [i][j] is the result of evaluate_input
+        with ns[i] and enzymes_grid[j].
+
+    Raises
+    ------
+    TypeError
+        If an n is not integer.
+    ValueError
+        If an n is less than 1.
+
+    """
+    ns = list(ns)
+    if not all(isinstance(n, int) for n in ns):
+        raise TypeError('`n` not int')
+    elif not ns:
+        return []
+    n_max = max(ns)
+    if min(ns) < 1:
+        raise ValueError('n less than 1')
+    results = [[None] * len(enzymes_grid) for n in ns]
+    compact = isinstance(context, contexts.CompactContext)
+    if not compact:
+        reaction_ecs = context['reaction_ecs']
+    cache = context.get('cache')
+    profile = context.get('profile')
+    keys = [[caches.query_key(n, compounds, enzymes, k, constrained,
+                              weighted)
+             for enzymes in enzymes_grid]
+            for n in ns]
+    if cache is not None:
+        for i, j in it.product(range(len(ns)), range(len(enzymes_grid))):
+            cached = cache.get(keys[i][j])
+            if cached is None:
+                continue
+            results[i][j] = list(cached)
+            if profile is not None:
+                with profile.query(keys[i][j]) as stats:
+                    stats.cached = True
+
     if compounds:
-        start = compounds[0]
-        goal = compounds[-1]
-        if start == 'any':
-            compounds = compounds[1:]
-            if goal == 'any':
-                pass
-            else:
-                targets = compound_reactions[goal][1]
+        # Enzymes only filter pathways.
+        groups = [range(len(enzymes_grid))]
+    else:
+        # Enzymes determine search sources and targets.
+        groups = [[j] for j in range(len(enzymes_grid))]
+    for group in groups:
+        group = [j for j in group
+                 if any(row[j] is None for row in results)]
+        if not group:
+            continue
+        enzymes = [] if compounds else enzymes_grid[group[0]]
+        if profile is None:
+            query = contextlib.nullcontext()
         else:
-            sources = compound_reactions[start][0]
-            if goal == 'any':
-                compounds = compounds[:-1]
+            # Shared searches are profiled as queries of the largest n.
+            query = profile.query(caches.query_key(
+                n_max, compounds, enzymes, k, constrained, weighted))
+        with query as stats:
+            timings = None if stats is None else stats.seconds
+            pathways = list(dict.fromkeys(_find_candidates(
+                graph, compounds, enzymes, context, k, constrained,
+                weighted, processes, timings, stats)))
+            start = time.perf_counter()
+            values = evaluate_pathways(pathways, context)
+            middle = time.perf_counter()
+            if compact:
+                enzymes_pws = _pathway_enzymes_compact(pathways, context)
             else:
-                targets = compound_reactions[goal][1]
-    else:
-        sources.extend(e for ec in enzymes for e in ec_reactions[ec])
-        targets = sources
-    # Find pathways.
-    for source, target in it.product(sources, targets):
-        pws = find_pathway(graph, source, target)
-        filtered_pws = filter_pathways(
-            pws, source=start, target=goal, compounds=compounds,
-            enzymes=enzymes, context=context)
-        pathways.update(filtered_pws)
-
-    # Evaluate pathways.
-    pathways = list(pathways)
-    values = [evaluate_pathway(pathway, context) for pathway in pathways]
-    return nbest_items(n, values, pathways)
+                enzymes_pws = [
+                    set(ec for reaction in pathway
+                        for ec in reaction_ecs.get(reaction, []))
+                    for pathway in pathways]
+            n_selected = 0
+            for j in group:
+                if compact:
+                    # Unknown EC numbers are in no pathway.
+                    required = set(context.enzymes.index.get(ec, -1)
+                                   for ec in enzymes_grid[j])
+                else:
+                    required = set(enzymes_grid[j])
+                best = NBest(n_max)
+                best.update((value, pathway) for value, pathway, enzymes_pw
+                            in zip(values, pathways, enzymes_pws)
+                            if required <= enzymes_pw)
+                items = best.items()
+                n_selected += len(items)
+                for i, n in enumerate(ns):
+                    if results[i][j] is not None:
+                        continue
+                    results[i][j] = items[:n]
+                    if cache is not None:
+                        cache.put(keys[i][j], results[i][j])
+            if stats is not None:
+                stats.add('score', middle - start, len(pathways))
+                stats.add('select', time.perf_counter() - middle)
+                stats.items['select'] = n_selected
+    return results
+
+
+def _pathway_enzymes_compact(pathways, context):
+    """
+    Return sets of EC number integers of contexts.CompactContext pathways.
+
+    """
+    table = context.reaction_enzymes
+    rows = {}
+    for reaction in it.chain.from_iterable(pathways):
+        if reaction not in rows:
+            rows[reaction] = table.row(reaction) if reaction in table else []
+    return [set(it.chain.from_iterable(map(rows.__getitem__, pathway)))
+            for pathway in pathways]
 
 
 def evaluate_pathway(pathway, context):
@@ -157,6 +491,8 @@ def evaluate_pathway(pathway, context):
         Pathway's value.
 
     """
+    if isinstance(context, contexts.CompactContext):
+        return _evaluate_pathway_compact(pathway, context)
     prices = context['prices']
     demands = context['demands']
     stoich = context['stoichiometrics']
@@ -178,6 +514,235 @@ def evaluate_pathway(pathway, context):
     return value
 
 
+def _evaluate_pathway_compact(pathway, context):
+    """
+    Return evaluate_pathway value of contexts.CompactContext integers.
+
+    """
+    substrates_all = set(it.chain.from_iterable(
+        context.substrates.row(rxn) for rxn in pathway))
+    products_all = set(it.chain.from_iterable(
+        context.products.row(rxn) for rxn in pathway))
+    index = context.reactions.index
+    r = context.values[0][index[pathway[0]]]
+    p = context.values[1][index[pathway[-1]]]
+    if m.isnan(r) or m.isnan(p):
+        raise KeyError('compound without price or demand')
+    s = len(substrates_all & products_all) / len(substrates_all | products_all)
+    return m.ceil(10 * m.sqrt(s) * (p - r) / len(pathway)**2)
+
+
+def evaluate_pathways(pathways, context):
+    """
+    Evaluate multiple pathways.
+
+    Returns the same values as evaluate_pathway. Reaction data is
+    gathered once per distinct reaction, after which pathways are scored
+    with NumPy array operations on a sparse pathway-compound incidence
+    matrix in coordinate form.
+
+    Parameters
+    ----------
+    pathways : list
+        Sequences of Rhea ID strings.
+    context : dict
+        Context data, see evaluate_pathway.
+
+    Returns
+    -------
+    list
+        Integer values of pathways. Indices match.
+
+    Raises
+    ------
+    IndexError
+        If a pathway is empty.
+    KeyError
+        If a reaction or a compound is missing from context.
+
+    See also
+    --------
+    evaluate_pathway
+
+    """
+    if not pathways:
+        return []
+    lengths = np.fromiter(map(len, pathways), np.int64, len(pathways))
+    if not lengths.all():
+        raise IndexError('empty pathway')
+    if isinstance(context, contexts.CompactContext):
+        return _evaluate_pathways_compact(pathways, context, lengths)
+    prices = context['prices']
+    demands = context['demands']
+    stoich = context['stoichiometrics']
+    steps = list(it.chain.from_iterable(pathways))
+    reactions = list(dict.fromkeys(steps))
+    reaction_index = {reaction: i for i, reaction in enumerate(reactions)}
+    occurrences = np.fromiter(map(reaction_index.__getitem__, steps),
+                              np.int64, len(steps))
+
+    # Gather compound indices and values of distinct reactions.
+    compound_index = {}
+    reactants = ([], [])
+    values = ([], [])
+    for reaction in reactions:
+        for side in (0, 1):
+            compounds = stoich[reaction][side]
+            reactants[side].append([
+                compound_index.setdefault(compound, len(compound_index))
+                for compound in compounds])
+            values[side].append(sum(prices[c] * demands[c]
+                                    for c in compounds))
+
+    # Sparse incidence of pathways and their substrates and products.
+    n_compounds = len(compound_index)
+    rows = np.repeat(np.arange(len(pathways)), lengths)
+    incidences = [
+        incidence_codes(reactants[side], occurrences, rows, n_compounds)
+        for side in (0, 1)]
+    common = np.intersect1d(*incidences, assume_unique=True)
+    counts = [np.bincount(codes // n_compounds, minlength=len(pathways))
+              for codes in incidences + [common]]
+
+    values = [np.array(side, np.float64) for side in values]
+    return _score_pathways(lengths, occurrences, values, counts)
+
+
+def _evaluate_pathways_compact(pathways, context, lengths):
+    """
+    Return evaluate_pathways values of contexts.CompactContext arrays.
+
+    """
+    index = context.reactions.index
+    occurrences = np.fromiter(
+        map(index.__getitem__, it.chain.from_iterable(pathways)),
+        np.int64, int(lengths.sum()))
+    values = context.values
+    if occurrences.max() >= len(values[0]):
+        raise KeyError('reaction without stoichiometrics')
+    n_compounds = len(context.compounds)
+    rows = np.repeat(np.arange(len(pathways)), lengths)
+    incidences = [
+        _incidence_codes(table.offsets, table.items, occurrences, rows,
+                         n_compounds)
+        for table in (context.substrates, context.products)]
+    common = np.intersect1d(*incidences, assume_unique=True)
+    counts = [np.bincount(codes // n_compounds, minlength=len(pathways))
+              for codes in incidences + [common]]
+    stops = np.cumsum(lengths)
+    if (np.isnan(values[0][occurrences[stops - lengths]]).any()
+            or np.isnan(values[1][occurrences[stops - 1]]).any()):
+        raise KeyError('compound without price or demand')
+    return _score_pathways(lengths, occurrences, values, counts)
+
+
+def _score_pathways(lengths, occurrences, values, counts):
+    """
+    Return pathway values of reaction values and compound counts.
+
+    """
+    n_substrates, n_products, n_common = counts
+    # Evaluate similarity of reactants and products.
+    s = n_common / (n_substrates + n_products - n_common)
+    # Evaluate total value of products and reactants.
+    stops = np.cumsum(lengths)
+    r = values[0][occurrences[stops - lengths]]
+    p = values[1][occurrences[stops - 1]]
+    # Evaluate and return pathway values.
+    value = np.ceil(10 * np.sqrt(s) * (p - r) / lengths**2)
+    return value.astype(np.int64).tolist()
+
+
+def _find_candidates(
+        graph,
+        compounds=[],
+        enzymes=[],
+        context={},
+        k=1,
+        constrained=False,
+        weighted=False,
+        processes=None,
+        timings=None,
+        stats=None,
+        ):
+    """
+    Return iterable of filtered pathway tuples, see evaluate_input.
+
+    """
+    # Determine search and filter parameters.
+    start, goal, compounds, sources, targets = _query_endpoints(
+        compounds, enzymes, context)
+    # Find pathways.
+    parameters = {
+        'start': start,
+        'goal': goal,
+        'compounds': compounds,
+        'enzymes': enzymes,
+        'k': k,
+        'constrained': constrained,
+        'weighted': weighted,
+        }
+    if processes is None or processes < 2:
+        return _search_pathways(
+            graph, sources, targets, context, timings=timings,
+            stats=stats, **parameters)
+    elif timings is None:
+        return _search_pathways_parallel(
+            processes, graph, sources, targets, context, **parameters)
+    else:
+        return _timed(_search_pathways_parallel(
+            processes, graph, sources, targets, context, **parameters),
+            timings, 'search')
+
+
+def _query_endpoints(compounds, enzymes, context):
+    """
+    Return start, goal, compounds, sources and targets of a query.
+
+    Start and goal are filter parameters, compounds are the compounds
+    left for filtering and sources and targets are the reactions to
+    search pathways between, see evaluate_input.
+
+    """
+    start = None
+    goal = None
+    sources = [None]
+    targets = [None]
+    if compounds:
+        start = compounds[0]
+        goal = compounds[-1]
+        if start == 'any':
+            compounds = compounds[1:]
+            if goal == 'any':
+                pass
+            else:
+                targets = _compound_reactions(context, goal, 1)
+        else:
+            sources = _compound_reactions(context, start, 0)
+            if goal == 'any':
+                compounds = compounds[:-1]
+            else:
+                targets = _compound_reactions(context, goal, 1)
+    else:
+        ec_reactions = context['ec_reactions']
+        sources.extend(e for ec in enzymes for e in ec_reactions[ec])
+        targets = sources
+    return start, goal, compounds, sources, targets
+
+
+def _compound_reactions(context, compound, side):
+    """
+    Return consuming (side 0) or producing (side 1) reactions of compound.
+
+    Tables of a contexts.CompactContext are read one side at a time, so
+    IDs of the other side aren't translated.
+
+    """
+    if isinstance(context, contexts.CompactContext):
+        return (context.consumers, context.producers)[side][compound]
+    return context['compound_reactions'][compound][side]
+
+
 def filter_pathways(
         pathways,
         source=None,
@@ -185,6 +750,7 @@ def filter_pathways(
         compounds=[],
         enzymes=[],
         context={},
+        rejected=None,
         ):
     """
     Yield pathways that meet filtering conditions.
@@ -212,7 +778,14 @@ def filter_pathways(
         Key reaction_ecs maps to a dict of Rhea ID string keys to EC
         number string list values.
         Key stoichiometrics maps to a dict of Rhea ID string keys to
-        a list of dicts of substrates and products.
+        a list of dicts of substrates and products. Optional key bitsets
+        maps to Bitsets of the reactions, see initialize_bitsets, which
+        are otherwise initialized per call. Bitmasks are built per call
+        of the compounds and EC numbers of pathways.
+    rejected : dict
+        If given, the amounts of rejected pathways are added to keys of
+        the rules rejecting them: source, target, repeat, enzymes and
+        compounds. Default None.
 
     Yields
     ------
@@ -221,56 +794,116 @@ def filter_pathways(
         given arguments.
 
     """
-    reaction_ecs = context['reaction_ecs']
-    stoichiometrics = context['stoichiometrics']
-    ignored = context.get('ignored', set())
+    bitsets = context.get('bitsets')
+    if bitsets is None:
+        pathways = list(pathways)
+        reactions = set(reaction for pathway in pathways
+                        for reaction in pathway)
+        bitsets = initialize_bitsets(context, reactions)
+    # Bits of this call, assigned to indices as they are met.
+    compound_bits = {}
+    enzyme_bits = {}
+    compound_indices = bitsets.compounds
+    source_bit = 0
+    target_bit = 0
+    if source in compound_indices:
+        source_bit = _mask([compound_indices[source]], compound_bits)
+    if target in compound_indices:
+        target_bit = _mask([compound_indices[target]], compound_bits)
+    # Rule of a compound or an enzyme absent from all pathways.
+    missing = 'enzymes'
+    try:
+        enzymes_mask = _mask(_indices(set(enzymes), bitsets.enzymes),
+                             enzyme_bits)
+        missing = 'compounds'
+        compounds_mask = _mask(_indices(set(compounds) - set(['any']),
+                                        compound_indices), compound_bits)
+    except KeyError:
+        # No pathway has it, all are rejected by its rule.
+        if rejected is not None:
+            rejected[missing] = rejected.get(missing, 0) + sum(
+                1 for __ in pathways)
+        return
+    reaction_indices = bitsets.reactions
+    reaction_masks = {}
     for pathway in pathways:
-        compounds_pw = set(['any'])
-        enzymes_pw = set()
-        for i, reaction in enumerate(pathway):
-            substrates = set(stoichiometrics[reaction][0])
-            products = set(stoichiometrics[reaction][1])
-            if target in substrates:
+        compounds_pw = 0
+        enzymes_pw = 0
+        masks = []
+        for reaction in pathway:
+            mask = reaction_masks.get(reaction)
+            if mask is None:
+                indices = reaction_indices[reaction]
+                mask = reaction_masks[reaction] = (
+                    _mask(indices[0], compound_bits),
+                    _mask(indices[1], compound_bits),
+                    _mask(indices[2], compound_bits),
+                    _mask(indices[3], compound_bits),
+                    _mask(indices[4], enzyme_bits),
+                    )
+            masks.append(mask)
+        for i, mask in enumerate(masks):
+            substrates, products, __, __, ecs = mask
+            if substrates & target_bit:
+                rule = 'target'
                 break
-            elif source in products:
+            elif products & source_bit:
+                rule = 'source'
                 break
             elif i >= 2:
-                prepre_s = set(stoichiometrics[pathway[i - 2]][0])
-                pre_p = set(stoichiometrics[pathway[i - 1]][1])
-                discard_substrates_1 = substrates & (prepre_s - ignored)
-                discard_substrates_2 = substrates & (pre_p - ignored)
-                if discard_substrates_1 and discard_substrates_2:
+                __, __, prepre_s, prepre_p, __ = masks[i - 2]
+                __, __, pre_s, pre_p, __ = masks[i - 1]
+                if substrates & prepre_s and substrates & pre_p:
+                    rule = 'repeat'
                     break
-                prepre_p = set(stoichiometrics[pathway[i - 2]][1])
-                pre_s = set(stoichiometrics[pathway[i - 1]][0])
-                discard_products_1 = products & (prepre_p - ignored)
-                discard_products_2 = products & (pre_s - ignored)
-                if discard_products_1 and discard_products_2:
+                elif products & prepre_p and products & pre_s:
+                    rule = 'repeat'
                     break
-            compounds_pw.update(substrates)
-            compounds_pw.update(products)
-            try:
-                enzymes_pw.update(reaction_ecs[reaction])
-            except KeyError:
-                pass
+            compounds_pw |= substrates | products
+            enzymes_pw |= ecs
         else:
-            if not set(enzymes) <= enzymes_pw:
-                continue
-            elif not set(compounds) <= compounds_pw:
+            if enzymes_mask & ~enzymes_pw:
+                rule = 'enzymes'
+            elif compounds_mask & ~compounds_pw:
+                rule = 'compounds'
+            else:
+                yield tuple(pathway)
                 continue
-            yield tuple(pathway)
+        if rejected is not None:
+            rejected[rule] = rejected.get(rule, 0) + 1
 
 
-def find_pathway(graph, source=None, target=None):
+def find_pathway(
+        graph,
+        source=None,
+        target=None,
+        k=1,
+        weighted=False,
+        heuristic=None,
+        ):
     """
     Yield pathway lists.
 
     Parameters
     ----------
-    graph : networkx graph object
+    graph : graphs.ReactionGraph
         Rhea reaction ID nodes.
-    reactions : iterable of 1 or 2
-        Reaction graph node IDs to search pathways for.
+    source, target : string
+        Rhea IDs of the first and the last reaction of pathways. If
+        either is None, yield shortest pathways from source or to
+        target respectively.
+    k : int
+        The maximum amount of loopless pathways yielded, shortest first,
+        when both source and target are given. Pathways are searched
+        lazily, only as they are consumed. Default 1.
+    weighted : bool
+        If true, yield lowest cost pathways, where cost is the sum of
+        edge weights set by initialize_graph. Default False.
+    heuristic : callable
+        Called with graph node indices of a reaction and target, returns
+        a lower bound of cost between them, for example
+        graphs.LandmarkIndex.lower_bound. Guides the weighted search
+        when both source and target are given. Default None.
 
     Yields
     ------
@@ -282,30 +915,486 @@ def find_pathway(graph, source=None, target=None):
     initialize_graph
 
     """
-    if target is None:
-        if source is None:
-            pass
+    ids = graph.ids
+    index = graph.index
+    if source is None and target is None:
+        return
+    elif source is None or target is None:
+        root = source if target is None else target
+        reverse = source is None
+        if root not in index:
+            return
+        elif weighted:
+            paths = graphs.lowest_cost_paths(graph, index[root], None, reverse)
         else:
-            try:
-                paths = nx.single_source_shortest_path(graph, source).values()
-            except KeyError:
-                pass
-            else:
-                for path in paths:
-                    yield path
-    elif source is None:
-        with nx.utils.reversed(graph):
-            try:
-                paths = nx.single_source_shortest_path(graph, target)
-            except KeyError:
-                paths = []
-        for target in paths:
-            yield list(reversed(paths[target]))
+            paths = graphs.shortest_paths(graph, index[root], reverse)
+        for path in paths.values():
+            yield [ids[i] for i in path]
+    elif source == target:
+        yield [source]
+    elif source not in index or target not in index:
+        return
+    elif k == 1:
+        if weighted:
+            path = graphs.astar_path(
+                graph, index[source], index[target], heuristic, True)
+        else:
+            path = graphs.bidirectional_shortest_path(
+                graph, index[source], index[target])
+        if path is not None:
+            yield [ids[i] for i in path]
+    else:
+        paths = graphs.shortest_simple_paths(
+            graph, index[source], index[target], weighted, heuristic)
+        for path in it.islice(paths, k):
+            yield [ids[i] for i in path]
+
+
+def find_pathways(
+        graph,
+        sources=[None],
+        targets=[None],
+        k=1,
+        constraints=None,
+        may_reach=None,
+        weighted=False,
+        heuristic=None,
+        reverse=None,
+        counts=None,
+        ):
+    """
+    Yield pathway lists between multiple sources and targets.
+
+    Yields the same pathways as calling find_pathway for every source
+    and target pair, but searches all pairs of reaction nodes in one
+    breadth-first search per source (or per target, if there are
+    fewer targets). Among equally short pathways of a pair, the one
+    yielded may differ from find_pathway.
+
+    Parameters
+    ----------
+    graph : graphs.ReactionGraph
+        Rhea reaction ID nodes.
+    sources, targets : iterable
+        Rhea ID strings or None, see find_pathway.
+    k : int
+        The maximum amount of pathways per source and target pair, see
+        find_pathway. Pairs are searched one by one if k is over 1.
+    constraints : tuple of 2 callables
+        Node and step predicates, see initialize_constraints. If given,
+        yield the shortest pathways that pass the predicates, k must be
+        1. Default None.
+    may_reach : callable
+        Called with source and target node indices of graph, returns
+        false if there's no pathway, see graphs.multi_shortest_paths.
+        If given, such pairs are not searched. Default None.
+    weighted : bool
+        If true, yield lowest cost pathways, see find_pathway.
+    heuristic : callable
+        Guides weighted pair searches, see find_pathway.
+    reverse : bool
+        Direction of pair searches, see graphs.multi_shortest_paths.
+    counts : dict
+        If given, the amount of nodes expanded by breadth-first
+        searches of pathway trees and pairs is added to key expanded,
+        see graphs.multi_shortest_paths. Default None.
+
+    Yields
+    ------
+    list
+        Pathways from sources to targets.
+
+    Raises
+    ------
+    ValueError
+        If constraints are given with k over 1 or weighted search.
+
+    See also
+    --------
+    find_pathway, initialize_constraints
+
+    """
+    sources = list(dict.fromkeys(sources))
+    targets = list(dict.fromkeys(targets))
+    if constraints is not None:
+        if k != 1:
+            raise ValueError('constraints not supported with k over 1')
+        elif weighted:
+            raise ValueError('constraints not supported with weights')
+        yield from _find_constrained_pathways(
+            graph, sources, targets, constraints, may_reach, reverse,
+            counts)
+        return
+    if None in targets:
+        for source in sources:
+            if source is not None:
+                yield from _counted(find_pathway(
+                    graph, source, None, 1, weighted), counts)
+    if None in sources:
+        for target in targets:
+            if target is not None:
+                yield from _counted(find_pathway(
+                    graph, None, target, 1, weighted), counts)
+    index = graph.index
+    ids = graph.ids
+    if k != 1:
+        for source, target in it.product(sources, targets):
+            if source is None or target is None:
+                continue
+            elif may_reach is not None and source in index \
+                    and target in index \
+                    and not may_reach(index[source], index[target]):
+                continue
+            yield from find_pathway(
+                graph, source, target, k, weighted, heuristic)
+        return
+    sources_i = []
+    for source in sources:
+        if source in index:
+            sources_i.append(index[source])
+        elif source in targets and source is not None:
+            yield [source]
+    targets_i = [index[target] for target in targets if target in index]
+    paths = graphs.multi_shortest_paths(
+        graph, sources_i, targets_i, may_reach, weighted, reverse, counts)
+    for path in paths.values():
+        yield [ids[i] for i in path]
+
+
+def _counted(pathways, counts):
+    """
+    Return pathways of a tree, adding their amount to counts[expanded].
+
+    A tree has a pathway to every node its search expanded.
+
+    """
+    if counts is None:
+        return pathways
+    pathways = list(pathways)
+    counts['expanded'] = counts.get('expanded', 0) + len(pathways)
+    return pathways
+
+
+def _find_constrained_pathways(
+        graph,
+        sources,
+        targets,
+        constraints,
+        may_reach=None,
+        reverse=None,
+        counts=None,
+        ):
+    """
+    Yield constrained pathway lists, see find_pathways.
+
+    Pathway trees of a source or a target are searched with constraints
+    directly, keeping one state per node, so a tree pathway may be
+    longer than the shortest one passing the constraints. Pathways of
+    source and target pairs are searched as without constraints, and
+    those passing the constraints are yielded as is. The other pairs are
+    searched again with constraints, in one search per root for all of
+    its goals, so each pair gets its shortest pathway passing the
+    constraints. Unreachable pairs are never searched with constraints.
+
+    """
+    allow_node, allow_step = constraints
+    index = graph.index
+    ids = graph.ids
+    trees = []
+    if None in targets:
+        trees.extend((index[source], False) for source in sources
+                     if source in index)
+    if None in sources:
+        trees.extend((index[target], True) for target in targets
+                     if target in index)
+    for root, backward in trees:
+        paths = graphs.constrained_shortest_paths(
+            graph, [root], None, allow_node, allow_step, backward, width=1)
+        yield from _counted(
+            ([ids[i] for i in path] for path in paths.values()), counts)
+    sources = [source for source in sources if source is not None]
+    targets = [target for target in targets if target is not None]
+    if not sources or not targets:
+        return
+    if reverse is None:
+        reverse = (sum(1 for target in targets if target in index)
+                   < sum(1 for source in sources if source in index))
+    # Goals of roots, whose shortest pathways don't pass the constraints.
+    goals = {}
+    for pathway in find_pathways(graph, sources, targets, 1, None,
+                                 may_reach, reverse=reverse, counts=counts):
+        if pathway[0] not in index:
+            yield pathway
+            continue
+        nodes = [index[reaction] for reaction in pathway]
+        if _allowed(nodes, allow_node, allow_step):
+            yield pathway
+            continue
+        elif not allow_node(nodes[0]) or not allow_node(nodes[-1]):
+            # No pathway of the pair passes the constraints.
+            continue
+        if reverse:
+            nodes.reverse()
+        goals.setdefault(nodes[0], set()).add(nodes[-1])
+    for root in sorted(goals):
+        paths = graphs.constrained_shortest_paths(
+            graph, [root], goals[root], allow_node, allow_step, reverse)
+        for path in paths.values():
+            yield [ids[i] for i in path]
+
+
+def _allowed(nodes, allow_node, allow_step):
+    """
+    Return true if a path of node indices passes constraints.
+
+    """
+    if not all(map(allow_node, nodes)):
+        return False
+    for i in range(2, len(nodes)):
+        if not allow_step(nodes[i - 2], nodes[i - 1], nodes[i]):
+            return False
+    return True
+
+
+def _heuristic(context, weighted=True):
+    """
+    Return weighted search heuristic of indices in context, or None.
+
+    """
+    landmarks = context.get('landmarks')
+    if landmarks is None or not weighted:
+        return None
+    # Edge weights are at least 1, so edge counts bound costs from below.
+    return landmarks.lower_bound
+
+
+def _may_reach(context):
+    """
+    Return reachability predicate of indices in context, or None.
+
+    """
+    indices = [context[key] for key in ('reachability', 'landmarks')
+               if context.get(key) is not None]
+    if not indices:
+        return None
+    elif len(indices) == 1:
+        return indices[0].may_reach
+
+    def may_reach(source, target):
+        return all(index.may_reach(source, target) for index in indices)
+    return may_reach
+
+
+# Graph and context of pathway search worker processes.
+_WORKER = {}
+
+# Pathway search worker pool, and the amount of processes, graph and
+# context of its workers.
+_POOL = {}
+
+
+def _initialize_worker(graph, context):
+    _WORKER['graph'] = graph
+    _WORKER['context'] = context
+
+
+def _search_pathways(
+        graph,
+        sources,
+        targets,
+        context,
+        start=None,
+        goal=None,
+        compounds=[],
+        enzymes=[],
+        k=1,
+        constrained=False,
+        weighted=False,
+        reverse=None,
+        timings=None,
+        stats=None,
+        ):
+    """
+    Yield filtered pathway tuples, see evaluate_input.
+
+    """
+    if constrained:
+        constraints = initialize_constraints(graph, start, goal, context)
+    else:
+        constraints = None
+    if stats is None:
+        counts = None
+        rejected = None
+    else:
+        counts = stats.items
+        rejected = stats.rejected
+    pws = find_pathways(graph, sources, targets, k, constraints,
+                        _may_reach(context), weighted,
+                        _heuristic(context, weighted), reverse, counts)
+    if timings is not None:
+        pws = _timed(pws, timings, 'search', counts=counts)
+    filtered = filter_pathways(
+        pws, source=start, target=goal, compounds=compounds,
+        enzymes=enzymes, context=context, rejected=rejected)
+    if timings is not None:
+        filtered = _timed(filtered, timings, 'filter', 'search', counts)
+    return filtered
+
+
+def _search_pathways_worker(sources, targets, parameters):
+    """
+    Return filtered pathway tuples of worker graph and context.
+
+    """
+    graph = _WORKER['graph']
+    context = _WORKER['context']
+    return list(set(_search_pathways(
+        graph, sources, targets, context, **parameters)))
+
+
+def _search_pathways_parallel(
+        processes,
+        graph,
+        sources,
+        targets,
+        context,
+        **parameters
+        ):
+    """
+    Return set of filtered pathway tuples searched in worker processes.
+
+    Search roots are split to chunks in the direction a single process
+    would search them, so that every pair is searched the same way.
+
+    """
+    index = graph.index
+    sources = list(dict.fromkeys(sources))
+    targets = list(dict.fromkeys(targets))
+    n_sources = sum(1 for source in sources if source in index)
+    n_targets = sum(1 for target in targets if target in index)
+    reverse = n_targets < n_sources
+    roots = targets if reverse else sources
+    n_chunks = max(1, min(len(roots), 4 * processes))
+    chunks = [roots[i::n_chunks] for i in range(n_chunks)]
+    parameters['reverse'] = reverse
+    executor = _worker_pool(processes, graph, context)
+    futures = []
+    for chunk in chunks:
+        if reverse:
+            task = (sources, chunk, parameters)
+        else:
+            task = (chunk, targets, parameters)
+        futures.append(executor.submit(_search_pathways_worker, *task))
+    pathways = set()
+    for future in futures:
+        pathways.update(future.result())
+    return pathways
+
+
+def _worker_pool(processes, graph, context):
+    """
+    Return worker pool of graph and context, reusing the previous one.
+
+    Workers inherit graph and context when the pool is created, so the
+    pool is reused while called with the same amount of processes and
+    the same graph and context objects. A replaced pool is shut down.
+
+    """
+    parameters = _POOL.get('parameters')
+    if parameters is not None and parameters[0] == processes \
+            and parameters[1] is graph and parameters[2] is context:
+        return _POOL['executor']
+    elif parameters is not None:
+        _POOL.pop('executor').shutdown()
+    if 'fork' in mp.get_all_start_methods():
+        mp_context = mp.get_context('fork')
     else:
+        mp_context = None
+    executor = cf.ProcessPoolExecutor(processes, mp_context,
+                                      _initialize_worker, (graph, context))
+    _POOL['parameters'] = (processes, graph, context)
+    _POOL['executor'] = executor
+    return executor
+
+
+def incidence_codes(columns, occurrences, rows, n_columns):
+    """
+    Return sparse binary incidence matrix of rows in coordinate form.
+
+    Each occurrence of an entity, such as a reaction of a pathway, marks
+    the columns of the entity on its row.
+
+    Parameters
+    ----------
+    columns : list
+        Lists of column indices of each entity.
+    occurrences : numpy.ndarray
+        Entity indices of occurrences.
+    rows : numpy.ndarray
+        Row indices of occurrences. Indices match occurrences.
+    n_columns : int
+        The amount of columns.
+
+    Returns
+    -------
+    numpy.ndarray
+        Sorted unique row * n_columns + column codes of nonzero entries.
+
+    """
+    sizes = np.fromiter(map(len, columns), np.int64, len(columns))
+    flat = np.fromiter(it.chain.from_iterable(columns), np.int64,
+                       int(sizes.sum()))
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    return _incidence_codes(offsets, flat, occurrences, rows, n_columns)
+
+
+def _incidence_codes(offsets, flat, occurrences, rows, n_columns):
+    """
+    Return incidence_codes of columns in compressed sparse row form.
+
+    Columns of entity i are flat[offsets[i]:offsets[i + 1]].
+
+    """
+    sizes = np.diff(offsets)
+    counts = sizes[occurrences]
+    starts = offsets[occurrences]
+    # Positions of each occurrence's columns in flat.
+    shifts = np.cumsum(counts) - counts
+    positions = (np.repeat(starts - shifts, counts)
+                 + np.arange(int(counts.sum())))
+    codes = np.repeat(rows, counts) * n_columns + flat[positions].astype(
+        np.int64)
+    if not len(codes):
+        return codes
+    codes.sort()
+    return codes[np.concatenate(([True], codes[1:] != codes[:-1]))]
+
+
+def _timed(iterable, timings, stage, nested=None, counts=None):
+    """
+    Yield items of iterable adding time spent in it to timings[stage].
+
+    Time added to timings[nested] meanwhile is excluded. If counts is
+    given, the amount of items is added to counts[stage].
+
+    """
+    iterator = iter(iterable)
+    timings[stage] = timings.get(stage, 0.0)
+    if counts is not None:
+        counts[stage] = counts.get(stage, 0)
+    while True:
+        nested_start = timings.get(nested, 0.0)
+        start = time.perf_counter()
         try:
-            yield nx.bidirectional_shortest_path(graph, source, target)
-        except nx.NetworkXNoPath:
-            pass
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            timings[stage] += (time.perf_counter() - start
+                               - timings.get(nested, 0.0) + nested_start)
+        if counts is not None:
+            counts[stage] += 1
+        yield item
 
 
 def intersect_dict(target, filter_to={}):
@@ -331,6 +1420,226 @@ def intersect_dict(target, filter_to={}):
     return target
 
 
+def initialize_bitsets(context, reactions=None):
+    """
+    Initialize compound and EC indices of reactions.
+
+    Small integer indices are assigned to compounds and EC numbers in
+    the order of sorted reactions, and reactions map to sorted index
+    tuples. filter_pathways assigns bits to the indices of each query
+    for set operations, so that bitmasks grow with the compounds of
+    the query's pathways instead of all compounds. The indices of a
+    contexts.CompactContext are its interned integers.
+
+    Parameters
+    ----------
+    context : dict
+        Key reaction_ecs maps to a dict of Rhea ID string keys to EC
+        number string list values.
+        Key stoichiometrics maps to a dict of Rhea ID string keys to
+        a list of dicts of substrates and products. Optional key ignored
+        maps to a set of ChEBI ID strings.
+    reactions : iterable
+        Rhea ID strings. Default None, in which case indices of all
+        reactions in stoichiometrics are initialized.
+
+    Returns
+    -------
+    Bitsets
+        Compound and EC number index dicts, and a dict of reaction keys
+        and values of index tuples of substrates, products, substrates
+        and products not ignored, and EC numbers.
+
+    Raises
+    ------
+    KeyError
+        If a reaction is not in stoichiometrics.
+
+    """
+    if isinstance(context, contexts.CompactContext):
+        return _initialize_bitsets_compact(context, reactions)
+    reaction_ecs = context['reaction_ecs']
+    stoichiometrics = context['stoichiometrics']
+    ignored = context.get('ignored', set())
+    if reactions is None:
+        reactions = stoichiometrics
+    compound_indices = {}
+    enzyme_indices = {}
+    reaction_indices = {}
+    for reaction in sorted(reactions):
+        substrates, products = stoichiometrics[reaction]
+        for compound in it.chain(substrates, products):
+            compound_indices.setdefault(compound, len(compound_indices))
+        ecs = reaction_ecs.get(reaction, [])
+        for ec in ecs:
+            enzyme_indices.setdefault(ec, len(enzyme_indices))
+        reaction_indices[reaction] = (
+            _indices(substrates, compound_indices),
+            _indices(products, compound_indices),
+            _indices(set(substrates) - ignored, compound_indices),
+            _indices(set(products) - ignored, compound_indices),
+            _indices(ecs, enzyme_indices),
+            )
+    return Bitsets(compound_indices, enzyme_indices, reaction_indices)
+
+
+def _initialize_bitsets_compact(context, reactions=None):
+    """
+    Return initialize_bitsets of contexts.CompactContext integers.
+
+    """
+    compounds = context.compounds
+    ignored = set(compounds.index[compound]
+                  for compound in context.get('ignored', set())
+                  if compound in compounds)
+    reaction_enzymes = context.reaction_enzymes
+    if reactions is None:
+        reactions = context.substrates
+    reaction_indices = {}
+    for reaction in reactions:
+        substrates = set(context.substrates.row(reaction))
+        products = set(context.products.row(reaction))
+        if reaction in reaction_enzymes:
+            ecs = reaction_enzymes.row(reaction)
+        else:
+            ecs = []
+        reaction_indices[reaction] = (
+            tuple(sorted(substrates)),
+            tuple(sorted(products)),
+            tuple(sorted(substrates - ignored)),
+            tuple(sorted(products - ignored)),
+            tuple(sorted(set(ecs))),
+            )
+    return Bitsets(compounds.index, context.enzymes.index, reaction_indices)
+
+
+def _indices(keys, indices):
+    # Sorted tuple of distinct indices of keys.
+    return tuple(sorted(set(indices[key] for key in keys)))
+
+
+def _mask(indices, bits):
+    # Bitwise or of bits of indices. Bits are assigned to new indices.
+    mask = 0
+    for index in indices:
+        bit = bits.get(index)
+        if bit is None:
+            bit = bits[index] = 1 << len(bits)
+        mask |= bit
+    return mask
+
+
+def initialize_constraints(graph, source=None, target=None, context={}):
+    """
+    Initialize search constraints matching filter_pathways rules.
+
+    The constraints reject reactions consuming target or producing
+    source, and steps that consume and produce compounds, that are not
+    ignored, of the two preceding steps.
+
+    Parameters
+    ----------
+    graph : graphs.ReactionGraph
+        Rhea reaction ID nodes.
+    source, target : string
+        ChEBI IDs of pathway's source and target compounds, see
+        filter_pathways.
+    context : dict
+        Key stoichiometrics maps to a dict of Rhea ID string keys to
+        a list of dicts of substrates and products. Optional key ignored
+        maps to a set of ChEBI ID strings. Optional key bitsets maps to
+        Bitsets of the reactions, see initialize_bitsets. Optional key
+        compound_reactions maps to a dict of ChEBI ID string keys to
+        lists of consuming and producing Rhea ID strings, which are
+        otherwise found from stoichiometrics. Tables of a
+        contexts.CompactContext are read by integers.
+
+    Returns
+    -------
+    tuple of 2 callables
+        [0] called with a node index, returns false if the reaction
+        consumes target or produces source.
+
+        [1] called with three consecutive node indices, returns false if
+        the last reaction repeats compounds of the two preceding ones.
+
+    See also
+    --------
+    filter_pathways, graphs.constrained_shortest_paths
+
+    """
+    ids = graph.ids
+    stoichiometrics = context['stoichiometrics']
+    ignored = context.get('ignored', set())
+    bitsets = context.get('bitsets')
+    compact = isinstance(context, contexts.CompactContext)
+    if compact:
+        ignored = set(context.compounds.index[compound]
+                      for compound in ignored
+                      if compound in context.compounds)
+        reaction_index = context.reactions.index
+        # Table arrays as lists, which are faster to slice per item.
+        substrate_offsets = context.substrates.offsets.tolist()
+        substrate_items = context.substrates.items.tolist()
+        product_offsets = context.products.offsets.tolist()
+        product_items = context.products.items.tolist()
+    # Substrates and products without ignored compounds, by node index.
+    reactants = [None] * len(ids)
+
+    def compounds(node):
+        if bitsets is not None:
+            __, __, substrates, products, __ = bitsets.reactions[ids[node]]
+            reactants[node] = (frozenset(substrates), frozenset(products))
+            return reactants[node]
+        elif compact:
+            i = reaction_index[ids[node]]
+            substrates = substrate_items[
+                substrate_offsets[i]:substrate_offsets[i + 1]]
+            products = product_items[
+                product_offsets[i]:product_offsets[i + 1]]
+        else:
+            substrates, products = stoichiometrics[ids[node]]
+        reactants[node] = (frozenset(substrates).difference(ignored),
+                           frozenset(products).difference(ignored))
+        return reactants[node]
+
+    compound_reactions = context.get('compound_reactions')
+    if compact:
+        disallowed = set()
+        if target in context.consumers:
+            disallowed.update(context.consumers[target])
+        if source in context.producers:
+            disallowed.update(context.producers[source])
+    elif compound_reactions is None:
+        disallowed = set(
+            reaction for reaction in graph.index
+            if target in stoichiometrics[reaction][0]
+            or source in stoichiometrics[reaction][1])
+    else:
+        disallowed = set(compound_reactions.get(target, ([], []))[0])
+        disallowed.update(compound_reactions.get(source, ([], []))[1])
+    disallowed = set(graph.index[reaction] for reaction in disallowed
+                     if reaction in graph.index)
+
+    def allow_node(node):
+        return node not in disallowed
+
+    def allow_step(prepre, pre, node):
+        substrates, products = reactants[node] or compounds(node)
+        prepre_s, prepre_p = reactants[prepre] or compounds(prepre)
+        if substrates.isdisjoint(prepre_s):
+            if products.isdisjoint(prepre_p):
+                return True
+            pre_s = (reactants[pre] or compounds(pre))[0]
+            return products.isdisjoint(pre_s)
+        pre_s, pre_p = reactants[pre] or compounds(pre)
+        if not substrates.isdisjoint(pre_p):
+            return False
+        return products.isdisjoint(prepre_p) or products.isdisjoint(pre_s)
+
+    return allow_node, allow_step
+
+
 def initialize_graph(
         reaction_stoichiometrics={},
         compound_reactions={},
@@ -359,14 +1668,17 @@ def initialize_graph(
 
     Returns
     -------
-    nx.DiGraph object
+    graphs.ReactionGraph object
+        Edges are weighted by the amount of consumers of the connecting
+        compound. If several compounds connect the same reactions, the
+        lowest weight is kept.
 
     See also
     --------
     chebi.IGNORED_COMPOUNDS
 
     """
-    graph = nx.DiGraph()
+    edges = {}
     # Create edges.
     for reaction in set(reaction_stoichiometrics) - reactions_ignored:
         substrates, products = reaction_stoichiometrics[reaction]
@@ -378,8 +1690,9 @@ def initialize_graph(
                 __, consumer_products = reaction_stoichiometrics[consumer]
                 if consumer_products == substrates:
                     continue
-                graph.add_edge(reaction, consumer, weight=weight)
-    return graph
+                edge = (reaction, consumer)
+                edges[edge] = min(weight, edges.get(edge, weight))
+    return graphs.from_edges(edges)
 
 
 def nbest_items(n, values, items):
@@ -414,9 +1727,5 @@ def nbest_items(n, values, items):
         raise ValueError('n less than 1')
     elif not all((isinstance(value, (float, int)) for value in values)):
         raise TypeError('nonnumerical item in values')
-    maxes = hq.nlargest(n, values)
-    indices_max = [ix for ix, value in enumerate(values) if value in maxes]
-    items_max = [items[index_max] for index_max in indices_max]
-    values_max = [values[index_max] for index_max in indices_max]
-    return sorted(list(zip(values_max, items_max)), reverse=True)[:n]
+    return hq.nlargest(n, zip(values, items))
 
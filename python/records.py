@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Define streaming columnar record files for analysis results.
+
+Analysis results are appended to three files as they are produced. A
+CSV file has a row of scalar columns per pathway, a binary pathway
+table has the reaction IDs of the pathways in the same order, and an
+index has a JSON line per analysis run, with its parameters and byte
+ranges in the other two files. Single runs can be read through the
+index without parsing the whole files.
+
+Classes
+-------
+ResultWriter
+    Append analysis results to columnar files.
+
+Functions
+---------
+read_index
+    Return index entries of analysis runs.
+read_pathways
+    Return pathways of an analysis run.
+
+Constants
+---------
+FIELDS
+    CSV column names.
+
+"""
+
+
+import csv
+import io
+import json
+import os
+import struct
+
+
+# File extensions
+_EXTENSION_CSV = '.csv'
+_EXTENSION_INDEX = '.idx'
+_EXTENSION_TABLE = '.bin'
+
+# Pathway table record: reaction count followed by numeric Rhea IDs.
+_ITEM = struct.Struct('<I')
+
+FIELDS = ['name', 'n', 'C', 'E', 'rank', 'length', 'score', 's_s', 's_p',
+          's_mol', 's_rxn']
+
+
+class ResultWriter:
+    """
+    Append analysis results to columnar files.
+
+    Files are path/name.csv, path/name.bin and path/name.idx. Use as a
+    context manager or call close when done.
+
+    Parameters
+    ----------
+    path : string
+        Directory path to files. Default current directory.
+    name : string
+        Name of files without extensions. Default results.
+
+    """
+
+    __slots__ = ('_csv', '_index', '_table')
+
+    def __init__(self, path='.', name='results'):
+        filepath = os.path.join(path, name)
+        self._csv = open(filepath + _EXTENSION_CSV, 'ab')
+        self._index = open(filepath + _EXTENSION_INDEX, 'a')
+        self._table = open(filepath + _EXTENSION_TABLE, 'ab')
+        if self._csv.tell() == 0:
+            self._csv.write(_csv_rows([FIELDS]))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Close files.
+
+        """
+        self._csv.close()
+        self._index.close()
+        self._table.close()
+
+    def write(self, name, parameters, pathways):
+        """
+        Append pathways of an analysis run and return its index entry.
+
+        Parameters
+        ----------
+        name : string
+            Name of the analysis.
+        parameters : collections.namedtuple
+            Attributes n, C and E, see main.Parameters.
+        pathways : iterable of collections.namedtuple
+            Attributes path, score, s_s, s_p, s_mol and s_rxn, see
+            main.Pathway.
+
+        Returns
+        -------
+        dict
+
+        Raises
+        ------
+        ValueError
+            If a Rhea ID is not numeric.
+
+        """
+        C = ' '.join(parameters.C)
+        E = ' '.join(parameters.E)
+        rows = []
+        records = []
+        for rank, pathway in enumerate(pathways):
+            rows.append([name, parameters.n, C, E, rank, len(pathway.path),
+                         pathway.score, pathway.s_s, pathway.s_p,
+                         pathway.s_mol, pathway.s_rxn])
+            reactions = [int(reaction) for reaction in pathway.path]
+            records.append(struct.pack('<{}I'.format(len(reactions) + 1),
+                                       len(reactions), *reactions))
+        data_csv = _csv_rows(rows)
+        data_table = b''.join(records)
+        entry = {
+            'name': name,
+            'n': parameters.n,
+            'C': list(parameters.C),
+            'E': list(parameters.E),
+            'count': len(rows),
+            'csv': [self._csv.tell(), len(data_csv)],
+            'table': [self._table.tell(), len(data_table)],
+            }
+        self._csv.write(data_csv)
+        self._table.write(data_table)
+        # Index last, so that it never points past written data.
+        self._csv.flush()
+        self._table.flush()
+        self._index.write(json.dumps(entry) + '\n')
+        self._index.flush()
+        return entry
+
+
+def _csv_rows(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def read_index(path='.', name='results'):
+    """
+    Return index entries of analysis runs.
+
+    Parameters
+    ----------
+    path, name : string
+        See ResultWriter.
+
+    Returns
+    -------
+    list
+        Dicts with keys name, n, C, E, count, csv and table, in the
+        order the runs were written.
+
+    """
+    filename = os.path.join(path, name + _EXTENSION_INDEX)
+    with open(filename) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def read_pathways(entry, path='.', name='results'):
+    """
+    Return pathways of an analysis run.
+
+    Parameters
+    ----------
+    entry : dict
+        Index entry of the run, see read_index.
+    path, name : string
+        See ResultWriter.
+
+    Returns
+    -------
+    list
+        Tuples of reaction ID string tuple, score, s_s, s_p, s_mol and
+        s_rxn, see main.Pathway, in rank order.
+
+    """
+    filepath = os.path.join(path, name)
+    with open(filepath + _EXTENSION_CSV, 'rb') as file:
+        file.seek(entry['csv'][0])
+        data_csv = file.read(entry['csv'][1]).decode()
+    with open(filepath + _EXTENSION_TABLE, 'rb') as file:
+        file.seek(entry['table'][0])
+        data_table = file.read(entry['table'][1])
+    pathways = []
+    position = 0
+    for row in csv.reader(io.StringIO(data_csv)):
+        values = dict(zip(FIELDS, row))
+        length, = _ITEM.unpack_from(data_table, position)
+        reactions = struct.unpack_from('<{}I'.format(length), data_table,
+                                       position + _ITEM.size)
+        position += _ITEM.size * (length + 1)
+        pathways.append((
+            tuple(str(reaction) for reaction in reactions),
+            int(values['score']),
+            float(values['s_s']),
+            float(values['s_p']),
+            float(values['s_mol']),
+            float(values['s_rxn']),
+            ))
+    return pathways
@@ -15,11 +15,19 @@ read_ecs
     Read EC number to Rhea ID mapping data.
 read_rd_data
     Read rd records.
+read_rd_files
+    Read rd records of rd files, optionally in parallel.
 
 """
 
+import concurrent.futures as cf
+import multiprocessing as mp
+import os
+
 from collections import Counter
 
+import files
+
 # Rd file contants:
 # An rd file is rejected, if it contains denied qualifiers, if it
 # doesn't contain required qualifiers or if it isn't approved.
@@ -27,6 +35,9 @@ _RD_APPROVED = 'approved'
 _RD_QUALIFIERS_DENIED = ['TR', 'CR']  # transport, class
 _RD_QUALIFIERS_REQUIRED = ['CB', 'FO', 'MA']  # balanced, formula, mass
 
+# ChEBI parents of rd worker processes.
+_WORKER = {}
+
 
 def crosslink_master_ids(reaction_masters):
     """
@@ -107,7 +118,8 @@ def read_rd_data(rds_parsed, chebi_parents):
     Parameters
     ----------
     rds_parsed : iterable of files.Rd namedtuples
-        Parsed rd files.
+        Parsed rd files. Records may be any iterables, such as those
+        streamed by files.get_rds.
 
     Returns
     -------
@@ -127,7 +139,69 @@ def read_rd_data(rds_parsed, chebi_parents):
 
     See also
     --------
-        files.parse_rd
+        files.get_rds, files.parse_rd
+    """
+    return _merge_rd_data(_read_records(rd.records, chebi_parents)
+                          for rd in rds_parsed)
+
+
+def read_rd_files(path, filenames, chebi_parents={}, processes=None):
+    """
+    Read rd records of rd files, optionally in parallel.
+
+    Files are parsed in worker processes and their data is merged in
+    the order of filenames, so that results equal those of a serial
+    read.
+
+    Parameters
+    ----------
+    path : string
+        Directory path to rd files.
+    filenames : list of strings
+        Names of the rd files.
+    chebi_parents : dict
+        Mapping from ChEBI ID strings to ChEBI parent ID strings.
+    processes : int
+        The amount of worker processes. Default None, in which case
+        files are read in this process.
+
+    Returns
+    -------
+    tuple of 4 dicts
+        See read_rd_data.
+
+    See also
+    --------
+        files.get_rds, read_rd_data
+    """
+    if processes is None or processes < 2:
+        return read_rd_data(files.get_rds(path, filenames), chebi_parents)
+    if 'fork' in mp.get_all_start_methods():
+        mp_context = mp.get_context('fork')
+    else:
+        mp_context = None
+    chunksize = max(1, len(filenames) // (4 * processes))
+    with cf.ProcessPoolExecutor(processes, mp_context, _initialize_worker,
+                                (chebi_parents,)) as executor:
+        return _merge_rd_data(executor.map(
+            _read_rd_file, [path] * len(filenames), filenames,
+            chunksize=chunksize))
+
+
+def _initialize_worker(chebi_parents):
+    _WORKER['chebi_parents'] = chebi_parents
+
+
+def _read_rd_file(path, filename):
+    with open(os.path.join(path, filename)) as file:
+        rd = files.parse_rd_file(file)
+        return _read_records(rd.records, _WORKER['chebi_parents'])
+
+
+def _read_records(records, chebi_parents):
+    """
+    Return rd data of records before merging, see _merge_rd_data.
+
     """
     mol_rxns, rxn_equats, rxn_masters, rxn_stoich = {}, {}, {}, {}
     n_records = 0
@@ -135,59 +209,94 @@ def read_rd_data(rds_parsed, chebi_parents):
     types_dtype = Counter()
     types_status = Counter()
     types_qualifier = Counter()
-    for rd in rds_parsed:
-        for record in rd.records:
-            approve_reaction = True
-            print('RHEA: {}'.format(record.identifier), end='')
-            n_records += 1
-            # Save datatypes.
-            types_dtype.update(record.data.keys())
-            # Check reaction status and qualifiers.
-            status = record.data['status']
-            types_status[status] += 1
-            if status != _RD_APPROVED:
-                print(', status {}'.format(status), end='')
-                approve_reaction = False
-            # Check reaction qualifiers.
-            qualifiers_raw = record.data['qualifiers']
-            qualifiers = qualifiers_raw.strip('[]').replace(' ', '').split(',')
-            types_qualifier.update(qualifiers)
-            if any(q in qualifiers for q in _RD_QUALIFIERS_DENIED):
-                print(', forbidden qualifiers {}'.format(qualifiers), end='')
-                approve_reaction = False
-            elif not all(q in qualifiers for q in _RD_QUALIFIERS_REQUIRED):
-                print(', inadequate qualifiers {}'.format(qualifiers), end='')
+    for record in records:
+        approve_reaction = True
+        print('RHEA: {}'.format(record.identifier), end='')
+        n_records += 1
+        # Save datatypes.
+        types_dtype.update(record.data.keys())
+        # Check reaction status and qualifiers.
+        status = record.data['status']
+        types_status[status] += 1
+        if status != _RD_APPROVED:
+            print(', status {}'.format(status), end='')
+            approve_reaction = False
+        # Check reaction qualifiers.
+        qualifiers_raw = record.data['qualifiers']
+        qualifiers = qualifiers_raw.strip('[]').replace(' ', '').split(',')
+        types_qualifier.update(qualifiers)
+        if any(q in qualifiers for q in _RD_QUALIFIERS_DENIED):
+            print(', forbidden qualifiers {}'.format(qualifiers), end='')
+            approve_reaction = False
+        elif not all(q in qualifiers for q in _RD_QUALIFIERS_REQUIRED):
+            print(', inadequate qualifiers {}'.format(qualifiers), end='')
+            approve_reaction = False
+        # Check that reaction molecules belong to ChEBI.
+        rxn = record.rxn
+        for mol in rxn.mols:
+            if mol.name.partition(':')[0] != 'CHEBI':
+                print(', non-ChEBI $MOL entry {}'.format(mol.name), end='')
                 approve_reaction = False
-            # Check that reaction molecules belong to ChEBI.
-            rxn = record.rxn
-            for mol in rxn.mols:
-                if mol.name.partition(':')[0] != 'CHEBI':
-                    print(', non-ChEBI $MOL entry {}'.format(mol.name), end='')
-                    approve_reaction = False
-            # Save reaction data.
-            if approve_reaction:
-                *__, id_rhea = record.identifier.partition(' ')
-                print(', saving reaction {}'.format(id_rhea))
-                reactants = Counter()
-                for mol in rxn.mols[:rxn.n_reactants]:
-                    *__, id_chebi = mol.name.partition(':')
-                    chebi = chebi_parents.get(id_chebi, id_chebi)
-                    mol_rxns.setdefault(id_chebi, [[], []])[0].append(id_rhea)
-                    reactants[chebi] += 1
-                products = Counter()
-                for mol in rxn.mols[rxn.n_reactants:]:
-                    *__, id_chebi = mol.name.partition(':')
-                    chebi = chebi_parents.get(id_chebi, id_chebi)
-                    mol_rxns.setdefault(id_chebi, [[], []])[1].append(id_rhea)
-                    products[chebi] += 1
-                rxn_stoich[id_rhea] = [dict(reactants), dict(products)]
-                rxn_equats[id_rhea] = record.data['equation']
-                rxn_masters[id_rhea] = record.data['masterId']
-                n_accepted += 1
-            else:
-                print()
+        # Save reaction data.
+        if approve_reaction:
+            *__, id_rhea = record.identifier.partition(' ')
+            print(', saving reaction {}'.format(id_rhea))
+            reactants = Counter()
+            for mol in rxn.mols[:rxn.n_reactants]:
+                *__, id_chebi = mol.name.partition(':')
+                chebi = chebi_parents.get(id_chebi, id_chebi)
+                mol_rxns.setdefault(id_chebi, [[], []])[0].append(id_rhea)
+                reactants[chebi] += 1
+            products = Counter()
+            for mol in rxn.mols[rxn.n_reactants:]:
+                *__, id_chebi = mol.name.partition(':')
+                chebi = chebi_parents.get(id_chebi, id_chebi)
+                mol_rxns.setdefault(id_chebi, [[], []])[1].append(id_rhea)
+                products[chebi] += 1
+            rxn_stoich[id_rhea] = [dict(reactants), dict(products)]
+            rxn_equats[id_rhea] = record.data['equation']
+            rxn_masters[id_rhea] = record.data['masterId']
+            n_accepted += 1
+        else:
+            print()
+    counts = [n_records, n_accepted, types_status, types_qualifier,
+              types_dtype]
+    return mol_rxns, rxn_equats, rxn_masters, rxn_stoich, counts
+
+
+def _merge_rd_data(data):
+    """
+    Merge rd data of _read_records in order and return read_rd_data.
+
+    Later reactions replace earlier ones of the same Rhea ID, and
+    reactions of molecules are listed in order before removing
+    duplicates, as in a single read of all records. Duplicates are
+    removed keeping first occurrences, so that the order doesn't depend
+    on string hashing of the process.
+
+    """
+    mol_rxns, rxn_equats, rxn_masters, rxn_stoich = {}, {}, {}, {}
+    n_records = 0
+    n_accepted = 0
+    types_status = Counter()
+    types_qualifier = Counter()
+    types_dtype = Counter()
+    for mol_reactions, equations, masters, stoichiometrics, counts in data:
+        for chebi, reactions in mol_reactions.items():
+            merged = mol_rxns.setdefault(chebi, [[], []])
+            merged[0].extend(reactions[0])
+            merged[1].extend(reactions[1])
+        rxn_equats.update(equations)
+        rxn_masters.update(masters)
+        rxn_stoich.update(stoichiometrics)
+        n_records += counts[0]
+        n_accepted += counts[1]
+        types_status.update(counts[2])
+        types_qualifier.update(counts[3])
+        types_dtype.update(counts[4])
     for chebi, reactions in mol_rxns.items():
-        mol_rxns[chebi] = [list(set(reactions[0])), list(set(reactions[1]))]
+        mol_rxns[chebi] = [list(dict.fromkeys(reactions[0])),
+                           list(dict.fromkeys(reactions[1]))]
     print('RHEA: {} records read, {} accepted'.format(n_records, n_accepted))
     print('RHEA: found statuses {}'.format(types_status))
     print('RHEA: found qualifiers {}'.format(types_qualifier))
@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Generate deterministic synthetic PathWalue data.
+
+Synthetic data has the structure of the JSON data converted from Rhea,
+ChEBI and IntEnz: master reactions have left-to-right and right-to-left
+directed reactions, compound usage follows a power law so that a few
+compounds, including ignored ones such as water, take part in many
+reactions, and EC numbers map to directed reactions. The same seed and
+sizes always give the same data, so data of 10 or 100 times the size of
+Rhea can be generated for scale tests.
+
+Besides the JSON files read by main, synthetic Rhea rd and EC tsv files
+and ChEBI tsv files can be written for benchmarking the conversion of
+database files.
+
+Functions
+---------
+generate_context
+    Return synthetic data context.
+generate_data
+    Generate synthetic data and write it to data directories.
+write_chebi_tsv
+    Write synthetic ChEBI tsv files of a context.
+write_jsons
+    Write JSON data files of a context.
+write_rhea
+    Write synthetic Rhea rd and EC tsv files of a context.
+
+"""
+
+
+import itertools as it
+import os
+import random
+
+import chebi
+import files
+import paths
+
+
+# First synthetic master reaction and compound IDs. Master IDs are
+# multiples of 4, directed reactions follow them like in Rhea.
+_MASTER_START = 10000
+_COMPOUND_START = 20000
+
+# Ignored compounds used as cofactors, see chebi.IGNORED_COMPOUNDS.
+_COFACTORS = sorted(chebi.IGNORED_COMPOUNDS)[:8]
+
+# Rank offset of compound usage weights, limits the degree of hubs.
+_HUB_OFFSET = 100
+
+# Share of compounds with a secondary ChEBI ID.
+_SECONDARY_SHARE = 0.1
+
+# Time stamp of synthetic rd files.
+_RD_TIME = '01/01/2017 00:00'
+
+
+def generate_context(n_reactions=1000, n_compounds=None, n_enzymes=None,
+                     seed=0, exponent=1.0):
+    """
+    Return synthetic data context.
+
+    Parameters
+    ----------
+    n_reactions : int
+        The amount of master reactions. Each has two directed reactions.
+    n_compounds : int
+        The amount of compounds, cofactors excluded. Default None, in
+        which case half of n_reactions.
+    n_enzymes : int
+        The amount of EC numbers. Default None, in which case a quarter
+        of n_reactions.
+    seed : int
+        Seed of the random number generator.
+    exponent : float
+        Power law exponent of compound usage by rank. Higher exponents
+        give fewer and larger hub compounds. Default 1.0.
+
+    Returns
+    -------
+    dict
+        Data context with keys compound_reactions, complexities,
+        demands, ec_reactions, equations, ignored, prices, reaction_ecs
+        and stoichiometrics, see pw.evaluate_input.
+
+    """
+    rng = random.Random(seed)
+    if n_compounds is None:
+        n_compounds = max(2, n_reactions // 2)
+    if n_enzymes is None:
+        n_enzymes = max(1, n_reactions // 4)
+    compounds = [str(_COMPOUND_START + i) for i in range(n_compounds)]
+    weights = list(it.accumulate(
+        (rank + _HUB_OFFSET) ** -exponent for rank in range(n_compounds)))
+    enzymes = sorted(set(
+        '{}.{}.{}.{}'.format(rng.randint(1, 6), rng.randint(1, 20),
+                             rng.randint(1, 30), rng.randint(1, 200))
+        for __ in range(n_enzymes)))
+
+    stoichiometrics = {}
+    equations = {}
+    complexities = {}
+    reaction_ecs = {}
+    for i in range(n_reactions):
+        master = _MASTER_START + 4 * i
+        size = rng.randint(2, 5)
+        chosen = set()
+        while len(chosen) < size:
+            chosen.update(rng.choices(compounds, cum_weights=weights))
+        chosen = sorted(chosen)
+        rng.shuffle(chosen)
+        split = rng.randint(1, len(chosen) - 1)
+        left = {compound: rng.randint(1, 2) for compound in chosen[:split]}
+        right = {compound: rng.randint(1, 2) for compound in chosen[split:]}
+        if rng.random() < 0.5:
+            cofactors = rng.sample(_COFACTORS, 2)
+            left[cofactors[0]] = 1
+            right[cofactors[1]] = 1
+        ecs = sorted(set(rng.sample(enzymes, rng.randint(0, 2))))
+        for reaction, (substrates, products) in [
+                (str(master + 1), (left, right)),
+                (str(master + 2), (right, left)),
+                ]:
+            stoichiometrics[reaction] = [substrates, products]
+            equations[reaction] = '{} => {}'.format(
+                ' + '.join(sorted(substrates)), ' + '.join(sorted(products)))
+            complexities[reaction] = rng.randint(0, 10)
+            if ecs:
+                reaction_ecs[reaction] = ecs
+
+    compound_reactions = {}
+    for reaction, (substrates, products) in stoichiometrics.items():
+        for compound in substrates:
+            compound_reactions.setdefault(compound, [[], []])[0].append(
+                reaction)
+        for compound in products:
+            compound_reactions.setdefault(compound, [[], []])[1].append(
+                reaction)
+    ec_reactions = {}
+    for reaction, ecs in reaction_ecs.items():
+        for ec in ecs:
+            ec_reactions.setdefault(ec, []).append(reaction)
+    prices = {compound: round(rng.uniform(0, 10), 3)
+              for compound in sorted(compound_reactions)}
+    demands = {compound: round(rng.uniform(0, 10), 3)
+               for compound in sorted(compound_reactions)}
+    return {
+        'compound_reactions': compound_reactions,
+        'complexities': complexities,
+        'demands': demands,
+        'ec_reactions': ec_reactions,
+        'equations': equations,
+        'ignored': chebi.IGNORED_COMPOUNDS,
+        'prices': prices,
+        'reaction_ecs': reaction_ecs,
+        'stoichiometrics': stoichiometrics,
+        }
+
+
+def generate_data(n_reactions=1000, seed=0, rhea=False, chebi_tsv=False,
+                  **options):
+    """
+    Generate synthetic data and write it to data directories.
+
+    JSON files are written to paths.JSON, where main reads them. Files
+    of the same names are overwritten.
+
+    Parameters
+    ----------
+    n_reactions, seed
+        See generate_context.
+    rhea : bool
+        If true, write Rhea rd and tsv files too, see write_rhea.
+        Default False.
+    chebi_tsv : bool
+        If true, write ChEBI tsv files too, see write_chebi_tsv.
+        Default False.
+    options
+        Keyword arguments n_compounds, n_enzymes and exponent of
+        generate_context.
+
+    Returns
+    -------
+    dict
+        Data context, see generate_context.
+
+    """
+    context = generate_context(n_reactions, seed=seed, **options)
+    write_jsons(context)
+    if rhea:
+        write_rhea(context)
+    if chebi_tsv:
+        write_chebi_tsv(context, seed=seed)
+    return context
+
+
+def _master(reaction):
+    """
+    Return master reaction ID string of a directed reaction ID string.
+
+    """
+    return str(int(reaction) // 4 * 4)
+
+
+def _write_lines(lines, path, filename):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, filename), 'w') as file:
+        for line in lines:
+            file.write(line)
+            file.write('\n')
+
+
+def write_chebi_tsv(context, path=paths.CHEBI_TSV, seed=0):
+    """
+    Write synthetic ChEBI tsv files of a context.
+
+    Writes compound, chemical data, vertex and relation files of the
+    context compounds, see main.initialize_chebi. A share of compounds
+    gets a secondary ID, whose parent is the compound.
+
+    Parameters
+    ----------
+    context : dict
+        Data context, see generate_context.
+    path : string
+        Directory path of the files. Default paths.CHEBI_TSV.
+    seed : int
+        Seed of the random number generator.
+
+    """
+    rng = random.Random(seed)
+    compounds = sorted(context['compound_reactions'], key=int)
+    secondary = max(int(compound) for compound in compounds) + 1
+
+    rows_compounds = ['\t'.join(['ID', 'STATUS', 'PARENT_ID', 'NAME'])]
+    rows_data = ['\t'.join(
+        ['ID', 'COMPOUND_ID', 'SOURCE', 'TYPE', 'CHEMICAL_DATA'])]
+    rows_vertices = ['\t'.join(
+        ['ID', 'VERTICE_REF', 'COMPOUND_CHILD_ID', 'ONTOLOGY_ID'])]
+    rows_relations = ['\t'.join(
+        ['ID', 'TYPE', 'INIT_ID', 'FINAL_ID', 'STATUS'])]
+    for compound in compounds:
+        rows_compounds.append('\t'.join(
+            [compound, 'C', 'null', 'compound {}'.format(compound)]))
+        if rng.random() < _SECONDARY_SHARE:
+            rows_compounds.append('\t'.join(
+                [str(secondary), 'C', compound, 'null']))
+            secondary += 1
+        n_carbons = rng.randint(1, 30)
+        n_hydrogens = rng.randint(0, 2 * n_carbons + 2)
+        n_oxygens = rng.randint(0, 10)
+        for type_, datum in [
+                ('FORMULA', 'C{}H{}O{}'.format(
+                    n_carbons, n_hydrogens, n_oxygens)),
+                ('MASS', '{:.5f}'.format(
+                    12.0107 * n_carbons + 1.00794 * n_hydrogens
+                    + 15.9994 * n_oxygens)),
+                ('CHARGE', str(rng.randint(-2, 1))),
+                ]:
+            rows_data.append('\t'.join([
+                str(len(rows_data)), compound, 'ChEBI', type_, datum]))
+        rows_vertices.append('\t'.join([
+            str(len(rows_vertices)), 'CHEBI:' + compound, compound, '1']))
+    # Relate compounds to earlier ones, so that ontology is acyclic.
+    for index in range(1, len(compounds)):
+        final = rng.randrange(index)
+        rows_relations.append('\t'.join([
+            str(len(rows_relations)), rng.choice(['is_a', 'has_part']),
+            str(index + 1), str(final + 1), rng.choice(['C', 'E'])]))
+
+    for rows, filename in [
+            (rows_compounds, files.CHEBI_COMPOUNDS),
+            (rows_data, files.CHEBI_DATA),
+            (rows_vertices, files.CHEBI_VERTICES),
+            (rows_relations, files.CHEBI_RELATIONS),
+            ]:
+        _write_lines(rows, path, filename)
+
+
+def write_jsons(context, path=paths.JSON):
+    """
+    Write JSON data files of a context.
+
+    Parameters
+    ----------
+    context : dict
+        Data context, see generate_context.
+    path : string
+        Directory path of the files. Default paths.JSON.
+
+    """
+    data = [
+        context['ec_reactions'],
+        context['compound_reactions'],
+        context['demands'],
+        context['prices'],
+        context['complexities'],
+        context['reaction_ecs'],
+        context['equations'],
+        context['stoichiometrics'],
+        ]
+    filenames = [
+        files.ENZ_REACTIONS,
+        files.MOL_REACTIONS,
+        files.MOL_DEMANDS,
+        files.MOL_PRICES,
+        files.RXN_COMPLEXITIES,
+        files.RXN_ECS,
+        files.RXN_EQUATIONS,
+        files.RXN_STOICHIOMETRICS,
+        ]
+    os.makedirs(path, exist_ok=True)
+    files.write_jsons(data, path, filenames)
+
+
+def write_rhea(context, path_rd=paths.RHEA_RD, path_tsv=paths.RHEA_TSV):
+    """
+    Write synthetic Rhea rd and EC tsv files of a context.
+
+    Every master reaction is written to an rd file of its own with
+    records of both directed reactions. Stoichiometric coefficients are
+    written as repeated $MOL entries, which rhea.read_rd_data counts.
+    EC numbers are mapped to master reactions in the tsv file. Reading
+    the files with main.initialize_rhea returns the context data.
+
+    Parameters
+    ----------
+    context : dict
+        Data context, see generate_context.
+    path_rd : string
+        Directory path of rd files. Default paths.RHEA_RD.
+    path_tsv : string
+        Directory path of the tsv file. Default paths.RHEA_TSV.
+
+    """
+    master_reactions = {}
+    for reaction in sorted(context['stoichiometrics'], key=int):
+        master_reactions.setdefault(_master(reaction), []).append(reaction)
+    for master, reactions in master_reactions.items():
+        rows = ['$RDFILE 1', '$DATM ' + _RD_TIME]
+        for reaction in reactions:
+            rows.extend(_rd_record(reaction, master, context))
+        _write_lines(rows, path_rd, master + '.rd')
+
+    rows = []
+    for ec in sorted(context['ec_reactions']):
+        masters = sorted(set(map(_master, context['ec_reactions'][ec])),
+                         key=int)
+        rows.extend('\t'.join([ec, master, 'UN']) for master in masters)
+    _write_lines(rows, path_tsv, files.RHEA_EC)
+
+
+def _rd_record(reaction, master, context):
+    """
+    Return rd file rows of a directed reaction.
+
+    """
+    substrates, products = context['stoichiometrics'][reaction]
+    mols = [compound for reactants in (substrates, products)
+            for compound in sorted(reactants, key=int)
+            for __ in range(reactants[compound])]
+    n_substrates = sum(substrates.values())
+    rows = [
+        '$RFMT $RIREG ' + reaction,
+        '$RXN',
+        '',
+        'Rhea  synthetic  ' + reaction,
+        'RHEA:release=synthetic',
+        '{:3d}{:3d}'.format(n_substrates, len(mols) - n_substrates),
+        ]
+    for compound in mols:
+        rows.extend([
+            '$MOL',
+            'CHEBI:' + compound,
+            '',
+            '',
+            '  0  0  0  0  0  0            999 V2000',
+            'M  END',
+            ])
+    for dtype, datum in [
+            ('masterId', master),
+            ('status', 'approved'),
+            ('qualifiers', '[CB, FO, MA]'),
+            ('equation', context['equations'][reaction]),
+            ]:
+        rows.extend(['$DTYPE ' + dtype, '$DATUM ' + datum])
+    return rows
@@ -16,11 +16,18 @@ import sys
 
 sys.path.insert(0, os.path.normpath('../python/'))
 
+import caches
 import chebi
+import contexts
 import files
+import graphs
 import intenz
-# import main
+import main
 import market
+import microbenchmarks
 import paths
+import profiles
 import pw
+import records
 import rhea
+import synthetic
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Test caches module.
+
+"""
+
+import os
+
+import pytest
+
+from context import caches
+
+
+CONTEXT = {
+    'ignored': {'2', '1'},
+    'prices': {'1': 1, '2': 2},
+    }
+KEY = caches.query_key(5, ['1', '2'], ['1.1.1.1'])
+RESULTS = [(3, ('1', '2')), (1, ('3',))]
+
+
+class TestQueryCache:
+
+    def test_return_none_missing_key(self):
+        cache = caches.QueryCache(CONTEXT)
+        assert cache.get(KEY) is None
+        assert KEY not in cache
+
+    def test_return_put_results(self):
+        cache = caches.QueryCache(CONTEXT)
+        cache.put(KEY, RESULTS)
+        assert cache.get(KEY) == RESULTS
+
+    def test_discard_least_recently_used(self):
+        cache = caches.QueryCache(CONTEXT, maxsize=2)
+        keys = [caches.query_key(n) for n in (1, 2, 3)]
+        cache.put(keys[0], RESULTS)
+        cache.put(keys[1], RESULTS)
+        cache.get(keys[0])
+        cache.put(keys[2], RESULTS)
+        assert len(cache) == 2
+        assert keys[0] in cache
+        assert keys[1] not in cache
+
+    def test_return_results_after_restart(self, tmp_path):
+        cache = caches.QueryCache(CONTEXT, path=str(tmp_path))
+        cache.put(KEY, RESULTS)
+        cache = caches.QueryCache(CONTEXT, path=str(tmp_path))
+        assert len(cache) == 0
+        assert cache.get(KEY) == RESULTS
+        assert len(cache) == 1
+
+    def test_invalidate_new_data(self, tmp_path):
+        cache = caches.QueryCache(CONTEXT, path=str(tmp_path))
+        cache.put(KEY, RESULTS)
+        context = dict(CONTEXT, prices={'1': 1, '2': 3})
+        cache = caches.QueryCache(context, path=str(tmp_path))
+        assert cache.get(KEY) is None
+        assert os.listdir(str(tmp_path)) == [cache.version]
+
+    def test_clear_both_tiers(self, tmp_path):
+        cache = caches.QueryCache(CONTEXT, path=str(tmp_path))
+        cache.put(KEY, RESULTS)
+        cache.clear()
+        assert cache.get(KEY) is None
+
+
+class TestQueryKey:
+
+    def test_return_same_key_enzyme_order(self):
+        key_1 = caches.query_key(5, ['1', '2'], ['1.1.1.1', '4.1.1.1'])
+        key_2 = caches.query_key(5, ('1', '2'), ['4.1.1.1', '1.1.1.1'])
+        assert key_1 == key_2
+
+    def test_return_different_key_compound_order(self):
+        key_1 = caches.query_key(5, ['1', '2'])
+        key_2 = caches.query_key(5, ['2', '1'])
+        assert key_1 != key_2
+
+
+class TestVersionContext:
+
+    def test_return_same_version_derived_keys(self):
+        context = dict(CONTEXT, cache=None, landmarks=None)
+        version = caches.version_context(context)
+        assert version == caches.version_context(CONTEXT)
+
+    def test_return_same_version_set_order(self):
+        context = dict(CONTEXT, ignored={'1', '2'})
+        version = caches.version_context(context)
+        assert version == caches.version_context(CONTEXT)
+
+    def test_return_new_version_new_data(self):
+        context = dict(CONTEXT, prices={'1': 1})
+        version = caches.version_context(context)
+        assert version != caches.version_context(CONTEXT)
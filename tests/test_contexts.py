@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Test contexts module.
+
+"""
+
+import numpy as np
+import pytest
+
+from context import caches, contexts, files
+
+
+PRICES = {'1': 1, '2': 2}
+CONTEXT = {
+    'stoichiometrics': {'10': [{'1': 1}, {'2': 2}], '20': [{'2': 1}, {}]},
+    'compound_reactions': {'1': [['10'], []], '2': [['20'], ['10']]},
+    'reaction_ecs': {'10': ['1.1.1.1']},
+    'ec_reactions': {'1.1.1.1': ['10']},
+    'prices': PRICES,
+    'demands': {'2': 3},
+    'ignored': ['1'],
+    }
+
+
+def lazy_context(path):
+    files.write_json(PRICES, path, 'prices.json')
+    return contexts.LazyContext(
+        {'ignored': ['1']}, {'prices': (path, 'prices.json')})
+
+
+class TestLazyContext:
+
+    def test_load_source_on_access(self, tmp_path):
+        context = lazy_context(str(tmp_path))
+        assert 'prices' in context
+        assert context.loaded() == set(['ignored'])
+        assert context['prices'] == PRICES
+        assert context.loaded() == set(['ignored', 'prices'])
+
+    def test_derive_value_on_access(self, tmp_path):
+        context = lazy_context(str(tmp_path))
+        context.derive('n_prices', lambda context: len(context['prices']),
+                       context)
+        assert 'n_prices' not in context.loaded()
+        assert context['n_prices'] == 2
+
+    def test_unload_and_reload_source(self, tmp_path):
+        context = lazy_context(str(tmp_path))
+        context['prices']
+        context.unload('prices', 'ignored')
+        assert context.loaded() == set(['ignored'])
+        assert context['prices'] == PRICES
+
+    def test_iterate_keys_without_loading(self, tmp_path):
+        context = lazy_context(str(tmp_path))
+        assert sorted(context) == ['ignored', 'prices']
+        assert len(context) == 2
+        assert context.loaded() == set(['ignored'])
+
+    def test_raise_keyerror_missing_key(self, tmp_path):
+        context = lazy_context(str(tmp_path))
+        with pytest.raises(KeyError):
+            context['demands']
+        assert context.get('demands') is None
+
+    def test_replace_source_by_set_value(self, tmp_path):
+        context = lazy_context(str(tmp_path))
+        context['prices'] = {}
+        context.unload()
+        assert context['prices'] == {}
+
+    def test_version_without_loading(self, tmp_path):
+        context = lazy_context(str(tmp_path))
+        version = caches.version_context(context)
+        assert context.loaded() == set(['ignored'])
+        context = contexts.LazyContext(
+            {'ignored': ['1']}, {'prices': (str(tmp_path), 'prices.json')})
+        assert version == caches.version_context(context)
+
+
+class TestCompactContext:
+
+    def test_return_same_tables(self):
+        context = contexts.CompactContext(CONTEXT)
+        for key in ['stoichiometrics', 'compound_reactions', 'reaction_ecs',
+                    'ec_reactions', 'prices', 'demands']:
+            assert dict(context[key]) == CONTEXT[key]
+        assert context['ignored'] == ['1']
+
+    def test_evaluate_reaction_values(self):
+        context = contexts.CompactContext(CONTEXT)
+        i = context.reactions.index['10']
+        assert np.isnan(context.values[0][i])
+        assert context.values[1][i] == 6
+
+    def test_return_row_integers(self):
+        context = contexts.CompactContext(CONTEXT)
+        row = context.substrates.row('10')
+        assert [context.compounds[i] for i in row] == list(
+            CONTEXT['stoichiometrics']['10'][0])
+        with pytest.raises(KeyError):
+            context.substrates.row('missing')
+
+    def test_raise_typeerror_set_table(self):
+        context = contexts.CompactContext(CONTEXT)
+        with pytest.raises(TypeError):
+            context['prices'] = {}
+        context['profile'] = None
+        assert 'profile' in context
+
+    def test_unload_tables_of_lazy_context(self, tmp_path):
+        lazy = lazy_context(str(tmp_path))
+        for key, value in CONTEXT.items():
+            if key != 'prices':
+                lazy[key] = value
+        context = contexts.CompactContext(lazy)
+        assert 'prices' not in lazy.loaded()
+        assert context.fingerprint('prices') == lazy.fingerprint('prices')
+        assert dict(context['prices']) == PRICES
+
+
+class TestIdRegistry:
+
+    def test_intern_ids_in_order(self):
+        registry = contexts.IdRegistry(['a', 'b'])
+        assert registry.intern('c') == 2
+        assert registry.intern('a') == 0
+        assert registry[1] == 'b'
+        assert len(registry) == 3
+        assert 'c' in registry
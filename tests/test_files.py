@@ -7,6 +7,8 @@ Test files module.
 
 """
 
+import os
+
 import pytest
 
 from context import files
@@ -246,6 +248,44 @@ class TestParseRd:
         assert rd.version == '1'
 
 
+class TestParseRdFile:
+
+    rd_valid = files.get_content(_VALID_PATH, _VALID_RD)
+
+    def test_raise_rd_error_invalid_header(self):
+        with open(os.path.join(_VALID_PATH, _VALID_RD)) as file:
+            next(file)
+            with pytest.raises(files.RdError):
+                files.parse_rd_file(file)
+
+    def test_yield_same_records(self):
+        with open(os.path.join(_VALID_PATH, _VALID_RD)) as file:
+            rd = files.parse_rd_file(file)
+            assert list(rd.records) == files.parse_rd(self.rd_valid).records
+        assert rd.time == '12/20/2016 12:24'
+        assert rd.version == '1'
+
+    def test_yield_records_lazily(self):
+        with open(os.path.join(_VALID_PATH, _VALID_RD)) as file:
+            rd = files.parse_rd_file(file)
+            record = next(rd.records)
+            assert record == files._parse_rd_record(self.rd_valid[2:17])
+            assert not file.closed
+
+
+class TestGetRds:
+
+    def test_yield_rd_per_file(self):
+        rds = files.get_rds(_VALID_PATH, [_VALID_RD, _VALID_RD])
+        records = [list(rd.records) for rd in rds]
+        correct = files.parse_rd(files.get_content(_VALID_PATH, _VALID_RD))
+        assert records == [correct.records, correct.records]
+
+    def test_raise_typeerror_filenames_not_list(self):
+        with pytest.raises(TypeError):
+            list(files.get_rds(_VALID_PATH, _VALID_RD))
+
+
 class TestParseRdRecord:
 
     rd_record_valid_1 = files.get_content(_VALID_PATH, _VALID_RD)[2:17]
@@ -351,6 +391,40 @@ class TestParseRxn:
             files.parse_rxn(self.rxn_invalid_header)
 
 
+class TestParseScenarios:
+
+    data = {
+        'B': {'reference': ['1', '2'], 'n_start': 5, 'n_stop': 6,
+              'compounds': [[], ['1', 'any']], 'enzymes': [[], ['1.1.1.1']]},
+        'A': {'reference': ['3'], 'n_start': 1, 'n_stop': 3,
+              'compounds': [['2', '3']], 'enzymes': [[]]},
+        }
+
+    def test_return_all_scenarios_in_order(self):
+        output = files.parse_scenarios(self.data)
+        assert [scenario.name for scenario in output] == ['B', 'A']
+        assert output[0] == files.Scenario(
+            'B', ['1', '2'], 5, 6, [[], ['1', 'any']], [[], ['1.1.1.1']])
+
+    def test_return_named_scenarios(self):
+        output = files.parse_scenarios(self.data, ['A'])
+        assert [scenario.name for scenario in output] == ['A']
+
+    def test_raise_keyerror_unknown_name(self):
+        with pytest.raises(KeyError):
+            files.parse_scenarios(self.data, ['C'])
+
+    def test_raise_scenarioerror_missing_field(self):
+        data = {'A': {'reference': ['3'], 'n_start': 1, 'n_stop': 3}}
+        with pytest.raises(files.ScenarioError):
+            files.parse_scenarios(data)
+
+    def test_parse_benchmark_scenarios(self):
+        data = files.get_json(paths.BENCHMARKS, files.BENCHMARK_SCENARIOS)
+        names = [scenario.name for scenario in files.parse_scenarios(data)]
+        assert names[:2] == ['ETH', 'ISO']
+
+
 class TestParseTsv:
 
     tsv_valid = [
@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Test graphs module.
+
+"""
+
+import pickle
+
+import pytest
+
+from context import graphs
+
+
+EDGES = {
+    ('a', 'b'): 1,
+    ('a', 'c'): 2,
+    ('b', 'd'): 3,
+    ('c', 'd'): 4,
+    ('d', 'e'): 5,
+    }
+GRAPH = graphs.from_edges(EDGES)
+LANDMARKS = graphs.initialize_landmarks(GRAPH, n=2)
+
+
+class TestAstarPath:
+
+    def test_return_none_no_path(self):
+        e, a = GRAPH.index['e'], GRAPH.index['a']
+        assert graphs.astar_path(GRAPH, e, a) is None
+
+    def test_return_shortest_path_landmark_heuristic(self):
+        a, e = GRAPH.index['a'], GRAPH.index['e']
+        path = graphs.astar_path(GRAPH, a, e, LANDMARKS.lower_bound)
+        assert [GRAPH.ids[i] for i in path] in (['a', 'b', 'd', 'e'],
+                                                ['a', 'c', 'd', 'e'])
+
+    def test_return_lowest_cost_path_weighted(self):
+        a, e = GRAPH.index['a'], GRAPH.index['e']
+        for heuristic in (None, LANDMARKS.lower_bound):
+            path = graphs.astar_path(GRAPH, a, e, heuristic, True)
+            assert [GRAPH.ids[i] for i in path] == ['a', 'b', 'd', 'e']
+
+    def test_avoid_ignored_nodes(self):
+        a, b, e = GRAPH.index['a'], GRAPH.index['b'], GRAPH.index['e']
+        path = graphs.astar_path(GRAPH, a, e, None, True, set([b]))
+        assert [GRAPH.ids[i] for i in path] == ['a', 'c', 'd', 'e']
+
+
+class TestBidirectionalShortestPath:
+
+    def test_return_none_no_path(self):
+        e, a = GRAPH.index['e'], GRAPH.index['a']
+        assert graphs.bidirectional_shortest_path(GRAPH, e, a) is None
+
+    def test_return_shortest_path(self):
+        a, e = GRAPH.index['a'], GRAPH.index['e']
+        path = graphs.bidirectional_shortest_path(GRAPH, a, e)
+        assert [GRAPH.ids[i] for i in path] in (['a', 'b', 'd', 'e'],
+                                                ['a', 'c', 'd', 'e'])
+
+    def test_return_source_source_equals_target(self):
+        a = GRAPH.index['a']
+        assert graphs.bidirectional_shortest_path(GRAPH, a, a) == [a]
+
+
+class TestConstrainedShortestPaths:
+
+    def paths(self, root, **kwargs):
+        paths = graphs.constrained_shortest_paths(
+            GRAPH, [GRAPH.index[root]], **kwargs)
+        return {GRAPH.ids[i]: [GRAPH.ids[j] for j in path]
+                for i, path in paths.items()}
+
+    def test_return_all_paths_no_constraints(self):
+        output = self.paths('b')
+        assert output == {'b': ['b'], 'd': ['b', 'd'], 'e': ['b', 'd', 'e']}
+
+    def test_return_goal_paths_only(self):
+        output = self.paths('b', goals=[GRAPH.index['e']])
+        assert output == {'e': ['b', 'd', 'e']}
+
+    def test_return_nothing_root_not_allowed(self):
+        output = self.paths('a', allow_node=lambda node: False)
+        assert output == {}
+
+    def test_avoid_nodes_not_allowed(self):
+        b = GRAPH.index['b']
+        output = self.paths('a', allow_node=lambda node: node != b)
+        assert output['e'] == ['a', 'c', 'd', 'e']
+        assert 'b' not in output
+
+    def test_avoid_steps_not_allowed(self):
+        a, b, d = GRAPH.index['a'], GRAPH.index['b'], GRAPH.index['d']
+        output = self.paths(
+            'a', allow_step=lambda *steps: steps != (a, b, d))
+        assert output['e'] == ['a', 'c', 'd', 'e']
+        assert output['b'] == ['a', 'b']
+
+    def test_avoid_steps_not_allowed_reverse(self):
+        b, d, e = GRAPH.index['b'], GRAPH.index['d'], GRAPH.index['e']
+        output = self.paths(
+            'e', allow_step=lambda *steps: steps != (b, d, e), reverse=True)
+        assert output['a'] == ['a', 'c', 'd', 'e']
+        assert 'b' not in output
+
+    def test_return_paths_from_nearest_root(self):
+        index = GRAPH.index
+        paths = graphs.constrained_shortest_paths(
+            GRAPH, [index['a'], index['d']], [index['c'], index['e']])
+        assert paths == {index['c']: [index['a'], index['c']],
+                         index['e']: [index['d'], index['e']]}
+
+    def test_return_no_paths_over_max_length(self):
+        a, c, d = GRAPH.index['a'], GRAPH.index['c'], GRAPH.index['d']
+        output = self.paths(
+            'a', allow_step=lambda *steps: steps != (a, c, d),
+            max_length=3)
+        assert output['d'] == ['a', 'b', 'd']
+        assert 'e' not in output
+
+    def test_return_shortest_path_longer_than_deepening(self):
+        detour = ['a', 'p', 'q', 'r', 's', 't', 'g']
+        edges = dict.fromkeys(list(zip(detour, detour[1:]))
+                              + [('a', 'x'), ('x', 'g')], 1)
+        graph = graphs.from_edges(edges)
+        a, x, g = graph.index['a'], graph.index['x'], graph.index['g']
+        paths = graphs.constrained_shortest_paths(
+            graph, [a], [g], allow_step=lambda *steps: steps != (a, x, g))
+        assert [graph.ids[i] for i in paths[g]] == detour
+
+    def test_return_same_paths_width_1(self):
+        b = GRAPH.index['b']
+        output = self.paths('a', allow_node=lambda node: node != b, width=1)
+        assert output == {'a': ['a'], 'c': ['a', 'c'], 'd': ['a', 'c', 'd'],
+                          'e': ['a', 'c', 'd', 'e']}
+
+
+class TestFromEdges:
+
+    def test_has_correct_edges(self):
+        assert set(GRAPH.edges()) == set(EDGES)
+
+    def test_has_correct_nodes(self):
+        assert GRAPH.nodes() == ['a', 'b', 'c', 'd', 'e']
+
+    def test_has_correct_predecessors(self):
+        assert GRAPH.predecessors('d') == ['b', 'c']
+
+    def test_has_correct_successors(self):
+        assert GRAPH.successors('a') == ['b', 'c']
+
+    def test_has_correct_weights(self):
+        for (u, v), weight in EDGES.items():
+            assert GRAPH.weight(u, v) == weight
+
+    def test_raise_keyerror_missing_edge(self):
+        with pytest.raises(KeyError):
+            GRAPH.weight('a', 'e')
+
+    def test_return_empty_graph_no_edges(self):
+        graph = graphs.from_edges({})
+        assert len(graph) == 0
+        assert graph.edges() == []
+
+
+class TestLandmarkIndex:
+
+    def distance(self, source, target):
+        path = graphs.bidirectional_shortest_path(GRAPH, source, target)
+        return graphs.INFINITY if path is None else len(path) - 1
+
+    def test_bound_distances_all_pairs(self):
+        for source in range(len(GRAPH)):
+            for target in range(len(GRAPH)):
+                distance = self.distance(source, target)
+                assert LANDMARKS.lower_bound(source, target) <= distance
+                assert LANDMARKS.upper_bound(source, target) >= distance
+
+    def test_return_infinite_lower_bound_no_path(self):
+        e, a = GRAPH.index['e'], GRAPH.index['a']
+        assert LANDMARKS.lower_bound(e, a) == graphs.INFINITY
+
+    def test_return_within(self):
+        a, e = GRAPH.index['a'], GRAPH.index['e']
+        landmarks = graphs.initialize_landmarks(GRAPH, [GRAPH.index['d']])
+        assert landmarks.within(a, e, 3)
+        assert landmarks.within(e, a, 3) is False
+
+    def test_load_dumped_landmarks(self):
+        data = graphs.dump_landmarks(GRAPH, LANDMARKS)
+        landmarks = graphs.load_landmarks(GRAPH, data)
+        assert landmarks.landmarks == LANDMARKS.landmarks
+        assert landmarks.distances_from == LANDMARKS.distances_from
+        assert landmarks.distances_to == LANDMARKS.distances_to
+
+    def test_raise_valueerror_load_other_version(self):
+        data = graphs.dump_landmarks(GRAPH, LANDMARKS, '1')
+        assert graphs.load_landmarks(GRAPH, data, '1').landmarks == (
+            LANDMARKS.landmarks)
+        with pytest.raises(ValueError):
+            graphs.load_landmarks(GRAPH, data, '2')
+
+    def test_raise_valueerror_load_other_graph(self):
+        data = graphs.dump_landmarks(GRAPH, LANDMARKS)
+        graph = graphs.from_edges({('a', 'b'): 1})
+        with pytest.raises(ValueError):
+            graphs.load_landmarks(graph, data)
+
+
+class TestLoadSnapshot:
+
+    def load(self, tmp_path, graph=GRAPH, version=''):
+        graphs.save_snapshot(graph, str(tmp_path), 'graph.dat', version)
+        return graphs.load_snapshot(str(tmp_path), 'graph.dat', version)
+
+    def test_return_same_graph(self, tmp_path):
+        graph = self.load(tmp_path, version='1')
+        assert graph.nodes() == GRAPH.nodes()
+        assert graph.edges() == GRAPH.edges()
+        for (u, v), weight in EDGES.items():
+            assert graph.weight(u, v) == weight
+
+    def test_return_same_paths(self, tmp_path):
+        graph = self.load(tmp_path)
+        for root in range(len(GRAPH)):
+            output = graphs.shortest_paths(graph, root)
+            assert output == graphs.shortest_paths(GRAPH, root)
+
+    def test_return_empty_graph(self, tmp_path):
+        graph = self.load(tmp_path, graphs.from_edges({}))
+        assert len(graph) == 0
+        assert graph.edges() == []
+
+    def test_return_picklable_graph(self, tmp_path):
+        graph = pickle.loads(pickle.dumps(self.load(tmp_path)))
+        assert graph.edges() == GRAPH.edges()
+
+    def test_raise_valueerror_other_version(self, tmp_path):
+        graphs.save_snapshot(GRAPH, str(tmp_path), 'graph.dat', '1')
+        with pytest.raises(ValueError):
+            graphs.load_snapshot(str(tmp_path), 'graph.dat', '2')
+
+    def test_raise_valueerror_not_snapshot(self, tmp_path):
+        (tmp_path / 'graph.dat').write_bytes(b'{}' * 64)
+        with pytest.raises(ValueError):
+            graphs.load_snapshot(str(tmp_path), 'graph.dat')
+
+    def test_raise_filenotfounderror_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            graphs.load_snapshot(str(tmp_path), 'graph.dat')
+
+    def test_raise_valueerror_truncated_file(self, tmp_path):
+        graphs.save_snapshot(GRAPH, str(tmp_path), 'graph.dat', '1')
+        data = (tmp_path / 'graph.dat').read_bytes()
+        for size in range(1, len(data)):
+            (tmp_path / 'truncated.dat').write_bytes(data[:size])
+            with pytest.raises(ValueError):
+                graphs.load_snapshot(str(tmp_path), 'truncated.dat')
+
+
+class TestLowestCostPaths:
+
+    graph = graphs.from_edges({
+        ('a', 'b'): 5, ('a', 'c'): 1, ('c', 'b'): 1, ('b', 'd'): 1})
+
+    def paths(self, root, goals=None, reverse=False):
+        index = self.graph.index
+        if goals is not None:
+            goals = [index[goal] for goal in goals]
+        paths = graphs.lowest_cost_paths(
+            self.graph, index[root], goals, reverse)
+        return {self.graph.ids[i]: [self.graph.ids[j] for j in path]
+                for i, path in paths.items()}
+
+    def test_return_lowest_cost_paths(self):
+        output = self.paths('a')
+        assert output == {'a': ['a'], 'b': ['a', 'c', 'b'], 'c': ['a', 'c'],
+                          'd': ['a', 'c', 'b', 'd']}
+
+    def test_return_lowest_cost_paths_reverse(self):
+        output = self.paths('d', reverse=True)
+        assert output['a'] == ['a', 'c', 'b', 'd']
+
+    def test_return_goal_paths_only(self):
+        assert self.paths('a', ['b']) == {'b': ['a', 'c', 'b']}
+
+
+class TestMultiShortestPaths:
+
+    def test_return_paths_all_reachable_pairs(self):
+        index = GRAPH.index
+        sources = [index['a'], index['b']]
+        targets = [index['d'], index['e'], index['a']]
+        paths = graphs.multi_shortest_paths(GRAPH, sources, targets)
+        pairs = set((GRAPH.ids[s], GRAPH.ids[t]) for s, t in paths)
+        assert pairs == set([('a', 'd'), ('a', 'e'), ('a', 'a'),
+                             ('b', 'd'), ('b', 'e')])
+
+    def test_return_shortest_paths_forward(self):
+        index = GRAPH.index
+        paths = graphs.multi_shortest_paths(
+            GRAPH, [index['b']], [index['d'], index['e']])
+        assert paths[index['b'], index['e']] \
+            == [index['b'], index['d'], index['e']]
+
+    def test_return_same_paths_landmarks(self):
+        nodes = list(range(len(GRAPH)))
+        paths = graphs.multi_shortest_paths(GRAPH, nodes, nodes)
+        output = graphs.multi_shortest_paths(
+            GRAPH, nodes, nodes, LANDMARKS.may_reach)
+        assert output == paths
+
+    def test_return_lowest_cost_paths_weighted(self):
+        index = GRAPH.index
+        for sources in ([index['a']], [index['a'], index['b']]):
+            paths = graphs.multi_shortest_paths(
+                GRAPH, sources, [index['e']], weighted=True)
+            assert paths[index['a'], index['e']] \
+                == [index['a'], index['b'], index['d'], index['e']]
+
+    def test_return_shortest_paths_reverse(self):
+        index = GRAPH.index
+        paths = graphs.multi_shortest_paths(
+            GRAPH, [index['a'], index['b']], [index['e']])
+        assert paths[index['b'], index['e']] \
+            == [index['b'], index['d'], index['e']]
+        assert len(paths[index['a'], index['e']]) == 4
+
+
+class TestReachabilityIndex:
+
+    graph = graphs.from_edges({
+        ('a', 'b'): 1, ('b', 'c'): 1, ('c', 'a'): 1, ('c', 'd'): 1,
+        ('d', 'e'): 1, ('e', 'd'): 1, ('f', 'e'): 1, ('f', 'g'): 1,
+        })
+    reachability = graphs.initialize_reachability(graph)
+
+    def reachable(self, source, target):
+        return target in graphs.shortest_paths(self.graph, source)
+
+    def test_condense_strong_components(self):
+        components = self.reachability.components
+        index = self.graph.index
+        assert components[index['a']] == components[index['c']]
+        assert components[index['d']] == components[index['e']]
+        assert len(set(components)) == 4
+
+    def test_return_correct_reachability_all_pairs(self):
+        for source in range(len(self.graph)):
+            for target in range(len(self.graph)):
+                correct = self.reachable(source, target)
+                assert self.reachability.reachable(source, target) \
+                    == correct
+                if correct:
+                    assert self.reachability.may_reach(source, target)
+
+    def test_reject_unreachable_pair(self):
+        index = self.graph.index
+        assert not self.reachability.may_reach(index['e'], index['a'])
+        assert not self.reachability.may_reach(index['a'], index['g'])
+
+    def test_load_dumped_reachability(self):
+        data = graphs.dump_reachability(self.graph, self.reachability)
+        reachability = graphs.load_reachability(self.graph, data)
+        assert reachability.components == self.reachability.components
+        assert reachability.labels == self.reachability.labels
+
+    def test_raise_valueerror_load_other_version(self):
+        data = graphs.dump_landmarks(GRAPH, LANDMARKS, '1')
+        assert graphs.load_landmarks(GRAPH, data, '1').landmarks == (
+            LANDMARKS.landmarks)
+        with pytest.raises(ValueError):
+            graphs.load_landmarks(GRAPH, data, '2')
+
+    def test_raise_valueerror_load_other_graph(self):
+        data = graphs.dump_reachability(self.graph, self.reachability)
+        with pytest.raises(ValueError):
+            graphs.load_reachability(GRAPH, data)
+
+
+class TestShortestPaths:
+
+    def test_return_correct_paths_forward(self):
+        paths = graphs.shortest_paths(GRAPH, GRAPH.index['b'])
+        paths = {GRAPH.ids[i]: [GRAPH.ids[j] for j in path]
+                 for i, path in paths.items()}
+        assert paths == {'b': ['b'], 'd': ['b', 'd'], 'e': ['b', 'd', 'e']}
+
+    def test_return_correct_paths_reverse(self):
+        paths = graphs.shortest_paths(GRAPH, GRAPH.index['b'], True)
+        paths = {GRAPH.ids[i]: [GRAPH.ids[j] for j in path]
+                 for i, path in paths.items()}
+        assert paths == {'b': ['b'], 'a': ['a', 'b']}
+
+
+class TestShortestSimplePaths:
+
+    def paths(self, source, target):
+        index = GRAPH.index
+        paths = graphs.shortest_simple_paths(
+            GRAPH, index[source], index[target])
+        return [[GRAPH.ids[i] for i in path] for path in paths]
+
+    def test_yield_all_simple_paths(self):
+        output = self.paths('a', 'e')
+        assert sorted(output) == [['a', 'b', 'd', 'e'], ['a', 'c', 'd', 'e']]
+
+    def test_yield_nothing_no_path(self):
+        assert self.paths('e', 'a') == []
+
+    def test_yield_paths_in_cost_order_weighted(self):
+        index = GRAPH.index
+        paths = graphs.shortest_simple_paths(
+            GRAPH, index['a'], index['e'], True)
+        output = [[GRAPH.ids[i] for i in path] for path in paths]
+        assert output == [['a', 'b', 'd', 'e'], ['a', 'c', 'd', 'e']]
+
+    def test_yield_paths_in_length_order(self):
+        graph = graphs.from_edges({
+            (0, 1): 1, (1, 2): 1, (2, 3): 1, (0, 3): 1, (0, 2): 1})
+        output = list(graphs.shortest_simple_paths(graph, 0, 3))
+        assert [len(path) for path in output] == [2, 3, 4]
+        assert output[-1] == [0, 1, 2, 3]
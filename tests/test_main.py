@@ -8,3 +8,35 @@ Test main module.
 Might get removed in future.
 
 """
+
+import gc
+import itertools as it
+import weakref
+
+from context import main
+
+
+class Pathways(list):
+    pass
+
+
+class TestSweepAnalysis:
+
+    def test_release_results_of_earlier_compounds(self, monkeypatch):
+        refs = []
+
+        def analyze(G, C, ns, Es, reference, context):
+            analysis = [[Pathways() for E in Es] for n in ns]
+            refs.extend(weakref.ref(pathways) for row in analysis
+                        for pathways in row)
+            return analysis
+
+        monkeypatch.setattr(main, '_analyze', analyze)
+        results = main.sweep_analysis(
+            None, 1, 3, [['1'], ['2']], [[], ['1']], [], {})
+        output = [result.parameters for result in it.islice(results, 5)]
+        gc.collect()
+        assert [ref() is None for ref in refs] == [True] * 4 + [False] * 4
+        assert output == [
+            main.Parameters(n, C, E) for C in (['1'], ['2'])
+            for n in (1, 2) for E in ([], ['1'])][:5]
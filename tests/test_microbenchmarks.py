@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Test microbenchmarks module.
+
+"""
+
+from context import microbenchmarks
+
+
+def timing(function, seconds):
+    return {
+        'size': 100,
+        'function': function,
+        'shape': 'pair',
+        'seconds': seconds,
+        'calls': 1,
+        }
+
+
+class TestCompareReports:
+
+    def test_return_regressions_over_tolerance(self):
+        baseline = {'timings': [timing('find_pathway', 1.0),
+                                timing('nbest_items', 1.0)]}
+        report = {'timings': [timing('find_pathway', 1.2),
+                              timing('nbest_items', 1.5)]}
+        regressions = microbenchmarks.compare_reports(report, baseline, 0.25)
+        assert len(regressions) == 1
+        assert regressions[0]['function'] == 'nbest_items'
+        assert regressions[0]['baseline'] == 1.0
+        assert regressions[0]['ratio'] == 1.5
+
+    def test_skip_timings_missing_from_baseline(self):
+        report = {'timings': [timing('find_pathway', 1.0)]}
+        regressions = microbenchmarks.compare_reports(
+            report, {'timings': []})
+        assert regressions == []
+
+
+class TestRunSize:
+
+    def test_return_every_function_and_shape(self):
+        timings = microbenchmarks.run_size(50, n_queries=1, repeat=1)
+        keys = set((t['function'], t['shape']) for t in timings)
+        assert ('initialize_graph', None) in keys
+        for function in microbenchmarks.FUNCTIONS[1:]:
+            for shape in microbenchmarks.SHAPES:
+                assert (function, shape) in keys
+        assert len(timings) == len(keys)
+        assert all(t['seconds'] >= 0 for t in timings)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Test profiles module.
+
+"""
+
+import os
+
+from context import profiles
+
+
+class TestQueryStats:
+
+    def test_add_stage_seconds_and_items(self):
+        stats = profiles.QueryStats()
+        stats.add('search', 1.0, 2)
+        stats.add('search', 0.5, 1)
+        assert stats.seconds == {'search': 1.5}
+        assert stats.items == {'search': 3}
+
+    def test_update_sums_statistics(self):
+        stats_1 = profiles.QueryStats()
+        stats_1.add('search', 1.0, 2)
+        stats_1.rejected['target'] = 1
+        stats_2 = profiles.QueryStats()
+        stats_2.add('search', 1.0, 1)
+        stats_2.rejected['target'] = 2
+        stats_2.latency = 3.0
+        stats_1.update(stats_2)
+        assert stats_1.seconds == {'search': 2.0}
+        assert stats_1.items == {'search': 3}
+        assert stats_1.rejected == {'target': 3}
+        assert stats_1.latency == 3.0
+
+
+class TestQueryProfile:
+
+    def test_sum_query_statistics(self):
+        profile = profiles.QueryProfile()
+        for __ in range(2):
+            with profile.query(('key',)) as stats:
+                stats.add('score', 1.0, 1)
+        assert profile.n_queries == 2
+        assert profile.total.seconds == {'score': 2.0}
+        assert profile.slow == []
+
+    def test_keep_queries_over_threshold(self, tmp_path):
+        profile = profiles.QueryProfile(threshold=0.0, path=str(tmp_path))
+        with profile.query(('key',)):
+            sum(range(1000))
+        assert len(profile.slow) == 1
+        assert profile.slow[0]['key'] == ('key',)
+        assert os.path.isfile(profile.slow[0]['filename'])
+
+    def test_skip_queries_under_threshold(self):
+        profile = profiles.QueryProfile(threshold=60.0)
+        with profile.query():
+            pass
+        assert profile.slow == []
+
+    def test_report_json_serializable(self):
+        profile = profiles.QueryProfile()
+        with profile.query() as stats:
+            stats.add('score', 1.0, 1)
+        report = profile.report()
+        assert report['n_queries'] == 1
+        assert report['total']['seconds'] == {'score': 1.0}
+
+
+class TestProfiling:
+
+    def test_set_and_remove_profile(self):
+        context = {}
+        with profiles.profiling(context) as profile:
+            assert context['profile'] is profile
+        assert 'profile' not in context
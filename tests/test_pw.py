@@ -7,13 +7,20 @@ Test pw module.
 
 """
 
+import itertools as it
+import os
+
 from collections import OrderedDict
 
-import networkx as nx
 import pytest
 
 from context import pw
+from context import caches
 from context import chebi
+from context import contexts
+from context import graphs
+from context import profiles
+from context import synthetic
 
 
 STOICHIOMETRICS = {
@@ -246,6 +253,293 @@ class TestEvaluateInput:
         assert sorted(pathways) == sorted(correct)
 
 
+class TestEvaluateInputConstrained:
+
+    queries = [
+        (['1', 'any'], []),
+        (['any', '1'], []),
+        (['1', '3'], []),
+        (['1', '3', '5'], []),
+        ([], ['1']),
+        ([], ['1', '2', '3']),
+        (['any', '1'], ['1']),
+        ]
+
+    def test_return_filtered_pathways(self):
+        for compounds, enzymes in self.queries:
+            output = pw.evaluate_input(
+                100, GRAPH, compounds, enzymes, CONTEXT, constrained=True)
+            pathways = [pw for __, pw in output]
+            start = compounds[0] if compounds else None
+            goal = compounds[-1] if compounds else None
+            filtered = list(pw.filter_pathways(
+                pathways, source=start, target=goal, context=CONTEXT))
+            assert sorted(filtered) == sorted(pathways)
+
+    def test_return_unconstrained_pathways(self):
+        for compounds, enzymes in self.queries:
+            output = pw.evaluate_input(
+                100, GRAPH, compounds, enzymes, CONTEXT, constrained=True)
+            correct = pw.evaluate_input(
+                100, GRAPH, compounds, enzymes, CONTEXT)
+            assert set(correct) <= set(output)
+
+
+class TestEvaluateInputIndices:
+
+    queries = TestEvaluateInputConstrained.queries
+
+    def evaluate_same_pathways(self, context):
+        for compounds, enzymes in self.queries:
+            for k in (1, 2):
+                output = pw.evaluate_input(
+                    100, GRAPH, compounds, enzymes, context, k)
+                correct = pw.evaluate_input(
+                    100, GRAPH, compounds, enzymes, CONTEXT, k)
+                assert output == correct
+
+    def test_return_same_pathways_landmarks(self):
+        landmarks = graphs.initialize_landmarks(GRAPH)
+        self.evaluate_same_pathways(dict(CONTEXT, landmarks=landmarks))
+
+    def test_return_same_pathways_reachability(self):
+        reachability = graphs.initialize_reachability(GRAPH)
+        self.evaluate_same_pathways(dict(CONTEXT, reachability=reachability))
+
+    def test_return_same_pathways_weighted(self):
+        context = dict(CONTEXT, landmarks=graphs.initialize_landmarks(GRAPH))
+        for compounds, enzymes in self.queries:
+            output = pw.evaluate_input(
+                100, GRAPH, compounds, enzymes, context, weighted=True)
+            correct = pw.evaluate_input(
+                100, GRAPH, compounds, enzymes, CONTEXT)
+            assert output == correct
+
+    def test_return_same_pathways_both(self):
+        context = dict(CONTEXT,
+                       landmarks=graphs.initialize_landmarks(GRAPH),
+                       reachability=graphs.initialize_reachability(GRAPH))
+        self.evaluate_same_pathways(context)
+
+
+class TestEvaluateInputParallel:
+
+    queries = TestEvaluateInputConstrained.queries
+
+    def evaluate_same_pathways(self, **kwargs):
+        for compounds, enzymes in self.queries:
+            output = pw.evaluate_input(
+                100, GRAPH, compounds, enzymes, CONTEXT, processes=2,
+                **kwargs)
+            correct = pw.evaluate_input(
+                100, GRAPH, compounds, enzymes, CONTEXT, **kwargs)
+            assert output == correct
+
+    def test_return_same_pathways(self):
+        self.evaluate_same_pathways()
+
+    def test_return_same_pathways_k_2(self):
+        self.evaluate_same_pathways(k=2)
+
+    def test_return_same_pathways_constrained(self):
+        self.evaluate_same_pathways(constrained=True)
+
+    def test_return_same_pathways_weighted(self):
+        self.evaluate_same_pathways(weighted=True)
+
+    def test_return_same_pathways_constrained_synthetic(self):
+        context = synthetic.generate_context(200, seed=1)
+        graph = pw.initialize_graph(
+            context['stoichiometrics'], context['compound_reactions'],
+            set(), context['ignored'])
+        compounds = sorted(
+            compound for compound, (consumers, producers)
+            in context['compound_reactions'].items()
+            if consumers and producers
+            and compound not in context['ignored'])
+        for query in [compounds[:2], compounds[2:4], [compounds[4], 'any'],
+                      ['any', compounds[5]]]:
+            output = pw.evaluate_input(100, graph, query, [], context,
+                                       constrained=True, processes=2)
+            correct = pw.evaluate_input(100, graph, query, [], context,
+                                        constrained=True)
+            assert output == correct
+
+    def test_reuse_worker_pool(self):
+        query = self.queries[0]
+        pw.evaluate_input(100, GRAPH, *query, CONTEXT, processes=2)
+        executor = pw._POOL['executor']
+        pw.evaluate_input(100, GRAPH, *query, CONTEXT, processes=2)
+        assert pw._POOL['executor'] is executor
+        pw.evaluate_input(100, GRAPH, *query, dict(CONTEXT), processes=2)
+        assert pw._POOL['executor'] is not executor
+
+
+class TestEvaluateInputCache:
+
+    queries = TestEvaluateInputConstrained.queries
+
+    def test_return_same_pathways(self):
+        context = dict(CONTEXT)
+        context['cache'] = caches.QueryCache(context)
+        for compounds, enzymes in self.queries:
+            correct = pw.evaluate_input(100, GRAPH, compounds, enzymes,
+                                        CONTEXT)
+            for __ in range(2):
+                output = pw.evaluate_input(100, GRAPH, compounds, enzymes,
+                                           context)
+                assert output == correct
+
+    def test_return_cached_results(self):
+        context = dict(CONTEXT)
+        context['cache'] = caches.QueryCache(context)
+        key = caches.query_key(100, ['1', '3'], [])
+        context['cache'].put(key, [(1, ('1',))])
+        output = pw.evaluate_input(100, GRAPH, ['1', '3'], [], context)
+        assert output == [(1, ('1',))]
+
+
+class TestEvaluateInputTimings:
+
+    queries = TestEvaluateInputConstrained.queries
+
+    def test_return_same_pathways(self):
+        for compounds, enzymes in self.queries:
+            timings = {}
+            output = pw.evaluate_input(100, GRAPH, compounds, enzymes,
+                                       CONTEXT, timings=timings)
+            correct = pw.evaluate_input(100, GRAPH, compounds, enzymes,
+                                        CONTEXT)
+            assert output == correct
+
+    def test_add_stage_timings(self):
+        timings = {'score': 1.0}
+        pw.evaluate_input(100, GRAPH, ['1', '3'], [], CONTEXT,
+                          timings=timings)
+        assert set(timings) == set(['search', 'filter', 'score'])
+        assert all(value >= 0 for value in timings.values())
+        assert timings['score'] > 1.0
+
+
+class TestEvaluateInputProfile:
+
+    queries = TestEvaluateInputConstrained.queries
+
+    def test_return_same_pathways(self):
+        context = dict(CONTEXT)
+        with profiles.profiling(context) as profile:
+            for compounds, enzymes in self.queries:
+                output = pw.evaluate_input(100, GRAPH, compounds, enzymes,
+                                           context)
+                correct = pw.evaluate_input(100, GRAPH, compounds, enzymes,
+                                            CONTEXT)
+                assert output == correct
+        assert profile.n_queries == len(self.queries)
+        assert 'profile' not in context
+
+    def test_record_stage_statistics(self):
+        context = dict(CONTEXT)
+        with profiles.profiling(context) as profile:
+            results = pw.evaluate_input(100, GRAPH, ['1', '3'], [], context)
+        total = profile.total
+        assert set(total.seconds) == set(
+            ['search', 'filter', 'score', 'select'])
+        assert total.items['select'] == len(results)
+        assert total.items['filter'] == total.items['score']
+        assert total.items['search'] == (
+            total.items['filter'] + sum(total.rejected.values()))
+        assert total.items['expanded'] > 0
+
+    def test_add_stage_timings(self):
+        context = dict(CONTEXT)
+        timings = {}
+        with profiles.profiling(context):
+            pw.evaluate_input(100, GRAPH, ['1', '3'], [], context,
+                              timings=timings)
+        assert set(timings) == set(['search', 'filter', 'score'])
+
+    def test_keep_slow_queries(self, tmp_path):
+        context = dict(CONTEXT)
+        with profiles.profiling(context, 0.0, str(tmp_path)) as profile:
+            pw.evaluate_input(100, GRAPH, ['1', '3'], [], context)
+        assert len(profile.slow) == 1
+        assert 'evaluate_input' in profile.slow[0]['summary']
+        assert os.path.isfile(profile.slow[0]['filename'])
+
+
+class TestEvaluateInputs:
+
+    ns = [1, 3, 100]
+    compounds = [[], ['1', 'any'], ['any', '1'], ['1', '3'], ['1', '3', '5']]
+    enzymes_grid = [[], ['1'], ['2', '3'], ['1', '2', '3'], ['4']]
+
+    def test_return_same_results(self):
+        for compounds in self.compounds:
+            output = pw.evaluate_inputs(self.ns, GRAPH, compounds,
+                                        self.enzymes_grid, CONTEXT)
+            correct = [[pw.evaluate_input(n, GRAPH, compounds, enzymes,
+                                          CONTEXT)
+                        for enzymes in self.enzymes_grid]
+                       for n in self.ns]
+            assert output == correct
+
+    def test_return_same_results_compact_context(self):
+        context = contexts.CompactContext(CONTEXT)
+        for compounds in self.compounds:
+            output = pw.evaluate_inputs(self.ns, GRAPH, compounds,
+                                        self.enzymes_grid, context)
+            correct = pw.evaluate_inputs(self.ns, GRAPH, compounds,
+                                         self.enzymes_grid, CONTEXT)
+            assert output == correct
+
+    def test_return_same_results_cache(self):
+        context = dict(CONTEXT)
+        context['cache'] = caches.QueryCache(context)
+        for compounds in self.compounds:
+            correct = pw.evaluate_inputs(self.ns, GRAPH, compounds,
+                                         self.enzymes_grid, CONTEXT)
+            for __ in range(2):
+                output = pw.evaluate_inputs(self.ns, GRAPH, compounds,
+                                            self.enzymes_grid, context)
+                assert output == correct
+            key = caches.query_key(3, compounds, ['1'])
+            assert context['cache'].get(key) == correct[1][1]
+
+    def test_return_cached_results(self):
+        context = dict(CONTEXT)
+        context['cache'] = caches.QueryCache(context)
+        key = caches.query_key(3, ['1', '3'], ['1'])
+        context['cache'].put(key, [(1, ('1',))])
+        output = pw.evaluate_inputs(self.ns, GRAPH, ['1', '3'],
+                                    self.enzymes_grid, context)
+        assert output[1][1] == [(1, ('1',))]
+
+    def test_record_profile(self):
+        context = dict(CONTEXT)
+        context['cache'] = caches.QueryCache(context)
+        with profiles.profiling(context) as profile:
+            pw.evaluate_inputs(self.ns, GRAPH, ['1', '3'],
+                               self.enzymes_grid, context)
+            assert profile.n_queries == 1
+            assert set(profile.total.seconds) == set(
+                ['search', 'filter', 'score', 'select'])
+            pw.evaluate_inputs(self.ns, GRAPH, ['1', '3'],
+                               self.enzymes_grid, context)
+        assert profile.n_queries == 1 + len(self.ns) * len(self.enzymes_grid)
+        assert profile.total.cached
+
+    def test_return_empty_list_no_ns(self):
+        assert pw.evaluate_inputs([], GRAPH, context=CONTEXT) == []
+
+    def test_raise_typeerror_n_not_int(self):
+        with pytest.raises(TypeError):
+            pw.evaluate_inputs([1, 2.0], GRAPH, context=CONTEXT)
+
+    def test_raise_valueerror_n_less_than_1(self):
+        with pytest.raises(ValueError):
+            pw.evaluate_inputs([0, 1], GRAPH, context=CONTEXT)
+
+
 class TestEvaluatePathway:
 
     pathway_1 = ['6']
@@ -268,6 +562,50 @@ class TestEvaluatePathway:
         output = pw.evaluate_pathway(self.pathway_3, CONTEXT)
         assert output == self.evaluate(2/3, 16, 24, 3)
 
+    def test_return_same_value_compact_context(self):
+        context = contexts.CompactContext(CONTEXT)
+        for pathway in (self.pathway_1, self.pathway_2, self.pathway_3):
+            output = pw.evaluate_pathway(pathway, context)
+            assert output == pw.evaluate_pathway(pathway, CONTEXT)
+        with pytest.raises(KeyError):
+            pw.evaluate_pathway(['7'], context)
+
+
+class TestEvaluatePathways:
+
+    pathways = [
+        ['6'], ['2', '6'], ['4', '6', '3'], ('1', '4', '5', '1'),
+        ['3', '3'],
+        ]
+
+    def test_return_same_values(self):
+        output = pw.evaluate_pathways(self.pathways, CONTEXT)
+        correct = [pw.evaluate_pathway(pathway, CONTEXT)
+                   for pathway in self.pathways]
+        assert output == correct
+
+    def test_return_empty_list_no_pathways(self):
+        assert pw.evaluate_pathways([], CONTEXT) == []
+
+    def test_raise_indexerror_empty_pathway(self):
+        with pytest.raises(IndexError):
+            pw.evaluate_pathways([['6'], []], CONTEXT)
+
+    def test_raise_keyerror_missing_reaction(self):
+        with pytest.raises(KeyError):
+            pw.evaluate_pathways([['7']], CONTEXT)
+
+    def test_return_same_values_compact_context(self):
+        context = contexts.CompactContext(CONTEXT)
+        output = pw.evaluate_pathways(self.pathways, context)
+        correct = pw.evaluate_pathways(self.pathways, CONTEXT)
+        assert output == correct
+
+    def test_raise_keyerror_missing_reaction_compact_context(self):
+        context = contexts.CompactContext(CONTEXT)
+        with pytest.raises(KeyError):
+            pw.evaluate_pathways([['7']], context)
+
 
 class TestFilterPathways:
 
@@ -461,9 +799,93 @@ class TestFilterPathways:
         assert output == correct
 
 
+class TestFilterPathwaysBitsets:
+
+    pathways = TestFilterPathways.pathways
+    queries = [
+        {},
+        {'compounds': ['1', '3']},
+        {'compounds': ['any', '5']},
+        {'enzymes': ['1', '3']},
+        {'source': '3'},
+        {'target': '5'},
+        {'compounds': ['7']},
+        {'enzymes': ['7']},
+        ]
+
+    def test_yield_same_pathways(self):
+        context = dict(CONTEXT, bitsets=pw.initialize_bitsets(CONTEXT))
+        for query in self.queries:
+            output = list(pw.filter_pathways(
+                iter(self.pathways), context=context, **query))
+            correct = list(pw.filter_pathways(
+                self.pathways, context=CONTEXT, **query))
+            assert output == correct
+
+
+    def test_yield_same_pathways_compact_context(self):
+        compact = contexts.CompactContext(CONTEXT)
+        context = dict(CONTEXT, bitsets=pw.initialize_bitsets(compact))
+        for query in self.queries:
+            output = list(pw.filter_pathways(
+                self.pathways, context=compact, **query))
+            output_bitsets = list(pw.filter_pathways(
+                self.pathways, context=context, **query))
+            correct = list(pw.filter_pathways(
+                self.pathways, context=CONTEXT, **query))
+            assert output == output_bitsets == correct
+
+
+class TestFilterPathwaysRejected:
+
+    pathways = TestFilterPathways.pathways
+    queries = TestFilterPathwaysBitsets.queries
+
+    def test_count_rejected_pathways(self):
+        for query in self.queries:
+            rejected = {}
+            output = list(pw.filter_pathways(
+                self.pathways, context=CONTEXT, rejected=rejected, **query))
+            assert len(output) + sum(rejected.values()) == len(
+                self.pathways)
+
+    def test_count_rejecting_rule(self):
+        rejected = {}
+        list(pw.filter_pathways(self.pathways, compounds=['1'],
+                                context=CONTEXT, rejected=rejected))
+        assert rejected == {'compounds': 1}
+
+    def test_count_all_rejected_absent_compound_or_enzyme(self):
+        for rule in ('compounds', 'enzymes'):
+            rejected = {}
+            output = list(pw.filter_pathways(
+                iter(self.pathways), context=CONTEXT, rejected=rejected,
+                **{rule: ['7']}))
+            assert output == []
+            assert rejected == {rule: len(self.pathways)}
+
+
 class TestFindPathway:
 
     graph = pw.initialize_graph(STOICHIOMETRICS, COMPOUND_REACTIONS)
+    branched = pw.initialize_graph(
+        {
+            '1': [{'a': 1}, {'b': 1}],
+            '2': [{'b': 1}, {'c': 1}],
+            '3': [{'b': 1}, {'d': 1}],
+            '4': [{'c': 1}, {'e': 1}],
+            '5': [{'d': 1}, {'e': 1}],
+            '6': [{'e': 1}, {'f': 1}],
+            },
+        {
+            'a': [['1'], []],
+            'b': [['2', '3'], ['1']],
+            'c': [['4'], ['2']],
+            'd': [['5'], ['3']],
+            'e': [['6'], ['4', '5']],
+            'f': [[], ['6']],
+            },
+        )
 
     def test_catch_keyerror_invalid_source_id(self):
         list(pw.find_pathway(self.graph, source='source', target=None))
@@ -495,57 +917,256 @@ class TestFindPathway:
         output = list(pw.find_pathway(self.graph, source='1', target='6'))
         assert output == []
 
+    def test_yield_k_shortest_pathways(self):
+        output = list(pw.find_pathway(self.branched, '1', '6', k=3))
+        correct = [['1', '2', '4', '6'], ['1', '3', '5', '6']]
+        assert sorted(output) == correct
+
+    def test_yield_at_most_k_pathways(self):
+        output = list(pw.find_pathway(self.branched, '1', '6', k=1))
+        assert len(output) == 1
+
+    def test_yield_correct_pathways_weighted(self):
+        for source, target in [('1', '5'), ('5', '1'), ('1', None),
+                               (None, '5'), ('1', '6')]:
+            output = list(pw.find_pathway(
+                self.graph, source, target, weighted=True))
+            correct = list(pw.find_pathway(self.graph, source, target))
+            assert sorted(output) == sorted(correct)
+
+    def test_yield_k_lowest_cost_pathways(self):
+        output = list(pw.find_pathway(
+            self.branched, '1', '6', k=3, weighted=True))
+        assert sorted(output) == [['1', '2', '4', '6'], ['1', '3', '5', '6']]
+
+
+class TestFindPathways:
+
+    reactions = [None, '1', '2', '3', '4', '5', '6', 'missing']
+
+    def per_pair(self, sources, targets, weighted=False):
+        return sorted(
+            tuple(path) for source in sources for target in targets
+            for path in pw.find_pathway(GRAPH, source, target, 1, weighted))
+
+    def test_match_find_pathway_all_pairs(self):
+        output = sorted(tuple(path) for path in pw.find_pathways(
+            GRAPH, self.reactions, self.reactions))
+        assert output == self.per_pair(self.reactions, self.reactions)
+
+    def test_match_find_pathway_more_sources(self):
+        sources = ['1', '2', '4', '5']
+        targets = ['3', '5']
+        output = sorted(tuple(path) for path in pw.find_pathways(
+            GRAPH, sources, targets))
+        assert output == self.per_pair(sources, targets)
+
+    def test_match_find_pathway_weighted(self):
+        for sources, targets in [(['1', '2', '4', '5'], ['3', '5']),
+                                 (['1'], ['3', '5', '6']),
+                                 (['1', '2'], ['1', '2', '3'])]:
+            output = sorted(tuple(path) for path in pw.find_pathways(
+                GRAPH, sources, targets, weighted=True))
+            assert output == self.per_pair(sources, targets, True)
+
+    def test_yield_nothing_no_reachable_pairs(self):
+        output = list(pw.find_pathways(GRAPH, ['1'], ['6']))
+        assert output == []
+
+    def test_match_brute_force_constrained_competing_roots(self):
+        edges = [('a', 'x'), ('b', 'x'), ('c', 'x'), ('x', 'g'),
+                 ('b', 'p'), ('p', 'q'), ('q', 'g'),
+                 ('a', 'y'), ('y', 'z'), ('z', 'r'), ('r', 'g')]
+        graph = graphs.from_edges(dict((edge, 1) for edge in edges))
+        x, g = graph.index['x'], graph.index['g']
+        allowed = set([graph.index['c']])
+
+        def allow_step(prepre, pre, node):
+            return (pre, node) != (x, g) or prepre in allowed
+
+        def brute_force(path, target):
+            if path[-1] == target:
+                nodes = [graph.index[node] for node in path]
+                if all(allow_step(*nodes[i - 2:i + 1])
+                       for i in range(2, len(nodes))):
+                    yield path
+                return
+            for source, node in edges:
+                if source == path[-1] and node not in path:
+                    yield from brute_force(path + [node], target)
+
+        sources = ['a', 'b', 'c']
+        correct = dict(
+            (source, min(map(len, brute_force([source], 'g'))))
+            for source in sources)
+        assert correct == {'a': 5, 'b': 4, 'c': 3}
+        for reverse in (False, True):
+            output = pw.find_pathways(
+                graph, sources, ['g'], 1, (lambda node: True, allow_step),
+                reverse=reverse)
+            lengths = dict((pathway[0], len(pathway)) for pathway in output)
+            assert lengths == correct
+
+
+class TestIncidenceCodes:
+
+    def test_return_unique_sorted_codes(self):
+        columns = [[0, 1], [1, 2], []]
+        occurrences = pw.np.array([0, 1, 1, 2, 0])
+        rows = pw.np.array([0, 0, 1, 1, 1])
+        output = pw.incidence_codes(columns, occurrences, rows, 3)
+        assert output.tolist() == [0, 1, 2, 3, 4, 5]
+
+    def test_return_empty_codes_no_occurrences(self):
+        empty = pw.np.array([], pw.np.int64)
+        output = pw.incidence_codes([[0]], empty, empty, 1)
+        assert output.tolist() == []
+
+
+class TestInitializeBitsets:
+
+    def test_return_masks_of_all_reactions(self):
+        bitsets = pw.initialize_bitsets(CONTEXT)
+        assert set(bitsets.reactions) == set(STOICHIOMETRICS)
+
+    def test_return_masks_of_given_reactions(self):
+        bitsets = pw.initialize_bitsets(CONTEXT, ['1'])
+        assert set(bitsets.reactions) == set(['1'])
+        assert set(bitsets.compounds) == set(['1', '2', '3', '4'])
+
+    def test_return_correct_indices(self):
+        bitsets = pw.initialize_bitsets(dict(CONTEXT, ignored=set(['2'])))
+        indices = bitsets.compounds
+        substrates, products, substrates_kept, __, ecs = \
+            bitsets.reactions['1']
+        assert substrates == tuple(sorted([indices['1'], indices['2']]))
+        assert products == tuple(sorted([indices['3'], indices['4']]))
+        assert substrates_kept == (indices['1'],)
+        assert ecs == tuple(sorted([bitsets.enzymes['1'],
+                                    bitsets.enzymes['2']]))
+
+    def test_return_dense_indices(self):
+        bitsets = pw.initialize_bitsets(CONTEXT)
+        assert sorted(bitsets.compounds.values()) == list(
+            range(len(bitsets.compounds)))
+
+    def test_raise_keyerror_missing_reaction(self):
+        with pytest.raises(KeyError):
+            pw.initialize_bitsets(CONTEXT, ['7'])
+
+    def test_return_compact_context_integers(self):
+        context = contexts.CompactContext(CONTEXT)
+        bitsets = pw.initialize_bitsets(context)
+        assert set(bitsets.reactions) == set(STOICHIOMETRICS)
+        substrates, products, __, __, ecs = bitsets.reactions['1']
+        assert substrates == tuple(sorted(
+            context.compounds.index[compound] for compound in ['1', '2']))
+        assert ecs == tuple(sorted(
+            context.enzymes.index[ec] for ec in ['1', '2']))
+        with pytest.raises(KeyError):
+            pw.initialize_bitsets(context, ['7'])
+
+
+class TestInitializeConstraints:
+
+    def test_disallow_reactions_consuming_target(self):
+        allow_node, __ = pw.initialize_constraints(
+            GRAPH, target='3', context=CONTEXT)
+        allowed = [r for r in GRAPH if allow_node(GRAPH.index[r])]
+        assert sorted(allowed) == ['1', '2', '5', '6']
+
+    def test_disallow_reactions_producing_source(self):
+        allow_node, __ = pw.initialize_constraints(
+            GRAPH, source='3', context=CONTEXT)
+        allowed = [r for r in GRAPH if allow_node(GRAPH.index[r])]
+        assert sorted(allowed) == ['2', '3', '4', '5']
+
+    def test_disallow_steps_repeating_compounds(self):
+        __, allow_step = pw.initialize_constraints(GRAPH, context=CONTEXT)
+        index = GRAPH.index
+        assert not allow_step(index['1'], index['3'], index['2'])
+        assert not allow_step(index['5'], index['1'], index['3'])
+        assert allow_step(index['1'], index['4'], index['5'])
+
+    def test_return_same_constraints_compact_context(self):
+        context = contexts.CompactContext(CONTEXT)
+        for source, target in [(None, None), ('3', None), (None, '3')]:
+            output = pw.initialize_constraints(GRAPH, source, target, context)
+            correct = pw.initialize_constraints(
+                GRAPH, source, target, CONTEXT)
+            nodes = range(len(GRAPH))
+            for node in nodes:
+                assert output[0](node) == correct[0](node)
+            for steps in it.permutations(nodes, 3):
+                assert output[1](*steps) == correct[1](*steps)
+
+    def test_raise_valueerror_constraints_k_over_1(self):
+        constraints = pw.initialize_constraints(GRAPH, context=CONTEXT)
+        with pytest.raises(ValueError):
+            list(pw.find_pathways(GRAPH, ['1'], ['5'], 2, constraints))
+
+    def test_raise_valueerror_constraints_weighted(self):
+        constraints = pw.initialize_constraints(GRAPH, context=CONTEXT)
+        with pytest.raises(ValueError):
+            list(pw.find_pathways(GRAPH, ['1'], ['5'], 1, constraints,
+                                  weighted=True))
+
 
 class TestInitializeGraph:
 
     def test_has_correct_edges(self):
         G = pw.initialize_graph(STOICHIOMETRICS, COMPOUND_REACTIONS)
-        assert set(nx.edges(G)) \
+        assert set(G.edges()) \
             == set([('1', '4'), ('2', '6'), ('3', '2'),
                     ('4', '5'), ('5', '1'), ('6', '3')])
 
     def test_has_correct_nodes(self):
         G = pw.initialize_graph(STOICHIOMETRICS, COMPOUND_REACTIONS)
-        assert set(nx.nodes(G)) == set(['1', '2', '3', '4', '5', '6'])
+        assert set(G.nodes()) == set(['1', '2', '3', '4', '5', '6'])
+
+    def test_has_correct_weights(self):
+        G = pw.initialize_graph(STOICHIOMETRICS, COMPOUND_REACTIONS)
+        assert G.weight('1', '4') == 2
+        assert G.weight('5', '1') == 2
 
     def test_ignores_correct_compounds_1(self):
         G = pw.initialize_graph(
             STOICHIOMETRICS, COMPOUND_REACTIONS,
             set(), set(('1', '3', '6'))
             )
-        assert set(nx.edges(G)) \
+        assert set(G.edges()) \
             == set([('1', '4'), ('2', '6'), ('3', '2'),
                     ('4', '5'), ('5', '1'), ('6', '3')])
-        assert set(nx.nodes(G)) == set(['1', '2', '3', '4', '5', '6'])
+        assert set(G.nodes()) == set(['1', '2', '3', '4', '5', '6'])
 
     def test_ignores_correct_compounds_2(self):
         G = pw.initialize_graph(
             STOICHIOMETRICS, COMPOUND_REACTIONS,
             set(), set(('1', '2'))
             )
-        assert set(nx.edges(G)) \
+        assert set(G.edges()) \
             == set([('1', '4'), ('2', '6'), ('4', '5'), ('6', '3')])
-        assert set(nx.nodes(G)) == set(['1', '2', '3', '4', '5', '6'])
+        assert set(G.nodes()) == set(['1', '2', '3', '4', '5', '6'])
 
     def test_ignores_correct_reactions_1(self):
         G = pw.initialize_graph(
             STOICHIOMETRICS, COMPOUND_REACTIONS,
             set('1'), set()
             )
-        assert set(nx.edges(G)) \
+        assert set(G.edges()) \
             == set([('2', '6'), ('3', '2'), ('4', '5'), ('6', '3')])
-        assert set(nx.nodes(G)) == set(['2', '3', '4', '5', '6'])
+        assert set(G.nodes()) == set(['2', '3', '4', '5', '6'])
 
     def test_ignores_correct_reactions_2(self):
         G = pw.initialize_graph(
             STOICHIOMETRICS, COMPOUND_REACTIONS,
             set(('1', '2')), set()
             )
-        assert set(nx.edges(G)) == set([('4', '5'), ('6', '3')])
-        assert set(nx.nodes(G)) == set(['3', '4', '5', '6'])
+        assert set(G.edges()) == set([('4', '5'), ('6', '3')])
+        assert set(G.nodes()) == set(['3', '4', '5', '6'])
 
     def test_returns_default_null_graph(self):
-        assert not nx.nodes(pw.initialize_graph())
+        assert not pw.initialize_graph().nodes()
 
 
 class TestIntersectDict:
@@ -560,6 +1181,33 @@ class TestIntersectDict:
         assert output == correct
 
 
+class TestNBest:
+
+    pairs = [(1, 'worst'), (6, 'best'), (3, 'bad'), (6, 'best'),
+             (5, 'better'), (2, 'worse'), (4, 'good'), (5, 'tie')]
+
+    def test_raise_typeerror_n_invalid_type(self):
+        with pytest.raises(TypeError):
+            pw.NBest('3')
+
+    def test_raise_valueerror_n_less_than_1(self):
+        with pytest.raises(ValueError):
+            pw.NBest(0)
+
+    def test_return_same_items_as_nbest_items(self):
+        unique = list(dict.fromkeys(self.pairs))
+        for n in range(1, 10):
+            best = pw.NBest(n)
+            best.update(self.pairs)
+            correct = pw.nbest_items(n, *zip(*unique))
+            assert best.items() == correct
+
+    def test_keep_at_most_n_items(self):
+        best = pw.NBest(3)
+        best.update(self.pairs)
+        assert len(best) == 3
+
+
 class TestNBestItems:
 
     n = 3
@@ -587,3 +1235,7 @@ class TestNBestItems:
         correct = [(6, 'best'), (5, 'better'), (4, 'good')]
         assert output == correct
 
+    def test_return_ties_sorted_by_item(self):
+        output = pw.nbest_items(2, [1, 2, 2, 2], ['a', 'b', 'd', 'c'])
+        assert output == [(2, 'd'), (2, 'c')]
+
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Test records module.
+
+"""
+
+from collections import namedtuple
+
+import pytest
+
+from context import records
+
+
+Parameters = namedtuple('Parameters', ['n', 'C', 'E'])
+Pathway = namedtuple('Pathway', ['path', 'score', 's_s', 's_p', 's_mol',
+                                 's_rxn'])
+RUNS = [
+    ('ETH', Parameters(5, ['15361', '16236'], []), [
+        Pathway(('45485', '25292'), 12, 1.0, 0.5, 2 / 3, 1 / 3),
+        Pathway(('10189',), -7, 0.0, 0.25, 0.1, 0.0),
+        ]),
+    ('ETH', Parameters(5, [], ['4.1.1.1']), []),
+    ('ISO', Parameters(6, ['57286', '35194'], ['2.3.3.10', '4.2.3.27']), [
+        Pathway(('15991', '17066', '16342'), 3, 0.2, 0.4, 0.6, 0.8),
+        ]),
+    ]
+
+
+def write(path):
+    with records.ResultWriter(str(path)) as writer:
+        return [writer.write(*run) for run in RUNS]
+
+
+class TestReadIndex:
+
+    def test_return_written_entries(self, tmp_path):
+        entries = write(tmp_path)
+        assert records.read_index(str(tmp_path)) == entries
+
+    def test_return_parameters(self, tmp_path):
+        write(tmp_path)
+        entry = records.read_index(str(tmp_path))[2]
+        assert entry['name'] == 'ISO'
+        assert entry['n'] == 6
+        assert entry['E'] == ['2.3.3.10', '4.2.3.27']
+        assert entry['count'] == 1
+
+    def test_append_entries(self, tmp_path):
+        write(tmp_path)
+        write(tmp_path)
+        assert len(records.read_index(str(tmp_path))) == 2 * len(RUNS)
+
+
+class TestReadPathways:
+
+    def test_return_written_pathways(self, tmp_path):
+        write(tmp_path)
+        write(tmp_path)
+        entries = records.read_index(str(tmp_path))
+        for entry, (__, __, pathways) in zip(entries, RUNS + RUNS):
+            output = records.read_pathways(entry, str(tmp_path))
+            assert output == [tuple(pathway) for pathway in pathways]
+
+
+class TestResultWriter:
+
+    def test_raise_valueerror_non_numeric_id(self, tmp_path):
+        pathways = [Pathway(('a',), 0, 0.0, 0.0, 0.0, 0.0)]
+        with records.ResultWriter(str(tmp_path)) as writer:
+            with pytest.raises(ValueError):
+                writer.write('ETH', Parameters(1, [], []), pathways)
+
+    def test_write_csv_header_once(self, tmp_path):
+        write(tmp_path)
+        write(tmp_path)
+        with open(str(tmp_path / 'results.csv')) as file:
+            lines = file.read().splitlines()
+        assert lines[0] == ','.join(records.FIELDS)
+        assert lines.count(lines[0]) == 1
+        assert len(lines) == 1 + 2 * 3
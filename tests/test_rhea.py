@@ -7,6 +7,35 @@ Test rhea module.
 
 """
 
+import json
+import os
+
 import pytest
 
 from context import rhea
+from context import synthetic
+
+
+def write_rds(path):
+    context = synthetic.generate_context(20, seed=1)
+    synthetic.write_rhea(context, path, path)
+    return sorted(name for name in os.listdir(path) if name.endswith('.rd'))
+
+
+class TestReadRdFiles:
+
+    def test_return_same_data_in_parallel(self, tmp_path):
+        path = str(tmp_path)
+        filenames = write_rds(path)
+        serial = rhea.read_rd_files(path, filenames)
+        parallel = rhea.read_rd_files(path, filenames, processes=2)
+        assert json.dumps(serial) == json.dumps(parallel)
+        assert len(serial[3]) == 40
+
+    def test_list_molecule_reactions_once(self, tmp_path):
+        path = str(tmp_path)
+        filenames = write_rds(path)
+        mol_rxns, *__ = rhea.read_rd_files(path, filenames + filenames)
+        for consumers, producers in mol_rxns.values():
+            assert len(set(consumers)) == len(consumers)
+            assert len(set(producers)) == len(producers)
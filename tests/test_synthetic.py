@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# (C) 2017 Tampere University of Technology
+# MIT License
+# Pauli Losoi
+"""
+Test synthetic module.
+
+"""
+
+import os
+import subprocess
+import sys
+
+from context import chebi, files, rhea, synthetic
+
+
+def read_rhea(path_rd, path_tsv):
+    names = sorted(os.listdir(path_rd))
+    rds = (files.parse_rd(rd) for rd in files.get_contents(path_rd, names))
+    data = rhea.read_rd_data(rds, {})
+    master_reactions = rhea.crosslink_master_ids(data[2])
+    content = files.get_content(path_tsv, files.RHEA_EC)
+    entries = files.parse_tsv(content, ['EC', 'RHEA', 'DIRECTION'])
+    return data + rhea.read_ecs(entries, data[2], master_reactions)
+
+
+def run_seeded(code, hash_seed):
+    """
+    Return stdout of code run in a Python process of a hash seed.
+
+    """
+    environment = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    code = 'import sys\nsys.path.insert(0, "../python")\n' + code
+    return subprocess.run(
+        [sys.executable, '-c', code], env=environment, check=True,
+        stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+
+class TestGenerateContext:
+
+    def test_return_same_context_different_hash_seed(self):
+        code = (
+            'import json, synthetic\n'
+            'context = synthetic.generate_context(50, seed=1)\n'
+            'del context["ignored"]\n'
+            'print(json.dumps(context))\n')
+        assert run_seeded(code, 1) == run_seeded(code, 2)
+
+    def test_return_same_context_same_seed(self):
+        context_1 = synthetic.generate_context(50, seed=1)
+        context_2 = synthetic.generate_context(50, seed=1)
+        assert context_1 == context_2
+
+    def test_return_different_context_different_seed(self):
+        context_1 = synthetic.generate_context(50, seed=1)
+        context_2 = synthetic.generate_context(50, seed=2)
+        assert context_1 != context_2
+
+    def test_return_opposite_directions(self):
+        context = synthetic.generate_context(50)
+        stoichiometrics = context['stoichiometrics']
+        assert len(stoichiometrics) == 100
+        substrates, products = stoichiometrics['10001']
+        assert stoichiometrics['10002'] == [products, substrates]
+
+    def test_return_consistent_mappings(self):
+        context = synthetic.generate_context(50)
+        stoichiometrics = context['stoichiometrics']
+        for compound, (consumers, producers) in (
+                context['compound_reactions'].items()):
+            assert all(compound in stoichiometrics[r][0] for r in consumers)
+            assert all(compound in stoichiometrics[r][1] for r in producers)
+            assert compound in context['prices']
+            assert compound in context['demands']
+        for ec, reactions in context['ec_reactions'].items():
+            assert all(ec in context['reaction_ecs'][r] for r in reactions)
+
+    def test_return_larger_hubs_higher_exponent(self):
+        degrees = []
+        for exponent in (0.5, 2.0):
+            context = synthetic.generate_context(200, exponent=exponent)
+            compound_reactions = context['compound_reactions']
+            degrees.append(max(
+                len(compound_reactions[compound][0])
+                for compound in compound_reactions
+                if compound not in context['ignored']))
+        assert degrees[0] < degrees[1]
+
+
+class TestGenerateData:
+
+    def test_write_same_files_different_hash_seed(self, tmp_path):
+        contents = []
+        for hash_seed in (1, 2):
+            path = str(tmp_path / str(hash_seed))
+            run_seeded(
+                'import synthetic\n'
+                'context = synthetic.generate_context(50, seed=1)\n'
+                'synthetic.write_jsons(context, {0!r})\n'
+                'synthetic.write_rhea(context, {0!r}, {0!r})\n'
+                'synthetic.write_chebi_tsv(context, {0!r}, seed=1)\n'
+                .format(path), hash_seed)
+            names = sorted(os.listdir(path))
+            contents.append([
+                files.get_content(path, name) for name in names])
+        assert contents[0] == contents[1]
+
+
+class TestWriteChebiTsv:
+
+    def test_read_compounds(self, tmp_path):
+        context = synthetic.generate_context(20)
+        synthetic.write_chebi_tsv(context, str(tmp_path))
+        content = files.get_content(str(tmp_path), files.CHEBI_COMPOUNDS)
+        parents, names = chebi.parse_compounds(files.parse_tsv(content))
+        assert set(names) == set(context['compound_reactions'])
+        assert set(parents.values()) <= set(names)
+        content = files.get_content(str(tmp_path), files.CHEBI_DATA)
+        charges, formulae, masses = chebi.parse_chemical_data(
+            files.parse_tsv(content), parents)
+        assert set(masses) == set(names)
+
+
+class TestWriteJsons:
+
+    def test_write_readable_data(self, tmp_path):
+        context = synthetic.generate_context(20)
+        synthetic.write_jsons(context, str(tmp_path))
+        stoichiometrics = files.get_json(
+            str(tmp_path), files.RXN_STOICHIOMETRICS)
+        assert stoichiometrics == context['stoichiometrics']
+        prices = files.get_json(str(tmp_path), files.MOL_PRICES)
+        assert prices == context['prices']
+
+
+class TestWriteRhea:
+
+    def test_read_context_data(self, tmp_path):
+        context = synthetic.generate_context(20)
+        path_rd = str(tmp_path / 'rd')
+        path_tsv = str(tmp_path / 'tsv')
+        synthetic.write_rhea(context, path_rd, path_tsv)
+        data = read_rhea(path_rd, path_tsv)
+        compound_reactions, equations, __, stoichiometrics, *ecs = data
+        assert stoichiometrics == context['stoichiometrics']
+        assert equations == context['equations']
+        for compound, reactions in context['compound_reactions'].items():
+            assert list(map(set, compound_reactions[compound])) == list(
+                map(set, reactions))
+        for ec, reactions in context['ec_reactions'].items():
+            assert set(ecs[0][ec]) == set(reactions)